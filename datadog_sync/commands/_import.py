@@ -6,17 +6,41 @@
 import os
 from sys import exit
 
-from click import command
+from click import command, option
 
 from datadog_sync.constants import SOURCE_RESOURCES_DIR, CMD_IMPORT
-from datadog_sync.commands.shared.options import common_options, source_auth_options
-from datadog_sync.utils.configuration import build_config
+from datadog_sync.commands.shared.options import (
+    CustomOptionClass,
+    common_options,
+    http_cache_options,
+    source_auth_options,
+)
+from datadog_sync.utils.configuration import build_config, log_client_stats
 from datadog_sync.utils.resources_handler import ResourcesHandler
 
 
 @command(CMD_IMPORT, short_help="Import Datadog resources.")
 @source_auth_options
 @common_options
+@http_cache_options
+@option(
+    "--resume",
+    required=False,
+    is_flag=True,
+    default=False,
+    help="Resume an interrupted import. Resources already imported by it are not fetched again unless they "
+    "were modified since.",
+    cls=CustomOptionClass,
+)
+@option(
+    "--incremental",
+    required=False,
+    is_flag=True,
+    default=False,
+    help="Only fetch the resources modified since the last import, based on the modification date in the list "
+    "responses. Other resources are kept from the source state files.",
+    cls=CustomOptionClass,
+)
 def _import(**kwargs):
     """Import Datadog resources."""
     os.makedirs(SOURCE_RESOURCES_DIR, exist_ok=True)
@@ -29,6 +53,7 @@ def _import(**kwargs):
     handler.import_resources()
 
     cfg.logger.info(f"Finished import")
+    log_client_stats(cfg)
 
     if cfg.logger.exception_logged:
         exit(1)
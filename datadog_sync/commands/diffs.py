@@ -12,7 +12,7 @@ from datadog_sync.commands.shared.options import (
     destination_auth_options,
     non_import_common_options,
 )
-from datadog_sync.utils.configuration import build_config
+from datadog_sync.utils.configuration import build_config, log_client_stats
 from datadog_sync.utils.resources_handler import ResourcesHandler
 from datadog_sync.constants import CMD_DIFFS
 
@@ -32,6 +32,7 @@ def diffs(**kwargs):
     handler.diffs()
 
     cfg.logger.info(f"Finished diffs ")
+    log_client_stats(cfg)
 
     if cfg.logger.exception_logged:
         exit(1)
@@ -0,0 +1,45 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import os
+from sys import exit
+
+from click import command
+
+from datadog_sync.constants import CMD_MIGRATE, DESTINATION_RESOURCES_DIR, SOURCE_RESOURCES_DIR
+from datadog_sync.commands.shared.options import (
+    common_options,
+    source_auth_options,
+    destination_auth_options,
+    http_cache_options,
+    non_import_common_options,
+)
+from datadog_sync.utils.resources_handler import ResourcesHandler
+from datadog_sync.utils.configuration import build_config, log_client_stats
+
+
+@command(CMD_MIGRATE, short_help="Import and sync Datadog resources in a single pass.")
+@source_auth_options
+@destination_auth_options
+@common_options
+@http_cache_options
+@non_import_common_options
+def migrate(**kwargs):
+    """Import and sync Datadog resources in a single pass."""
+    os.makedirs(SOURCE_RESOURCES_DIR, exist_ok=True)
+    os.makedirs(DESTINATION_RESOURCES_DIR, exist_ok=True)
+    cfg = build_config(CMD_MIGRATE, **kwargs)
+
+    handler = ResourcesHandler(cfg, False)
+
+    cfg.logger.info(f"Starting migrate...")
+
+    successes, errors = handler.migrate_resources()
+
+    cfg.logger.info(f"Finished migrate: {successes} successes, {errors} errors")
+    log_client_stats(cfg)
+
+    if cfg.logger.exception_logged:
+        exit(1)
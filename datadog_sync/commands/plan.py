@@ -0,0 +1,53 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from sys import exit
+
+from click import command, option
+
+from datadog_sync.commands.shared.options import (
+    CustomOptionClass,
+    common_options,
+    source_auth_options,
+    destination_auth_options,
+    non_import_common_options,
+)
+from datadog_sync.utils.configuration import build_config, log_client_stats
+from datadog_sync.utils.plan import write_plan
+from datadog_sync.utils.resources_handler import ResourcesHandler
+from datadog_sync.constants import CMD_PLAN, PLAN_FILE_PATH
+
+
+@command(CMD_PLAN, short_help="Compute the changes a sync would make and write them to a plan file.")
+@source_auth_options
+@destination_auth_options
+@common_options
+@non_import_common_options
+@option(
+    "--plan-file",
+    required=False,
+    default=PLAN_FILE_PATH,
+    show_default=True,
+    help="Path of the plan file to write. Apply it with `sync --plan`.",
+    cls=CustomOptionClass,
+)
+def plan(**kwargs):
+    """Compute the changes a sync would make and write them to a plan file."""
+    cfg = build_config(CMD_PLAN, **kwargs)
+    handler = ResourcesHandler(cfg)
+
+    cfg.logger.info(f"Starting plan...")
+
+    sync_plan = handler.plan_resources()
+    write_plan(kwargs.get("plan_file"), sync_plan)
+
+    creates = sum(len(ids) for ids in sync_plan["creates"].values())
+    updates = sum(len(ids) for ids in sync_plan["updates"].values())
+    deletes = sum(len(ids) for ids in sync_plan["deletes"].values())
+    cfg.logger.info(f"Finished plan: {creates} creates, {updates} updates, {deletes} deletes")
+    log_client_stats(cfg)
+
+    if cfg.logger.exception_logged:
+        exit(1)
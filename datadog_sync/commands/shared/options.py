@@ -130,6 +130,43 @@ _common_options = [
         help="Max number of workers when running operations in multi-threads.",
         cls=CustomOptionClass,
     ),
+    option(
+        "--max-concurrency",
+        envvar=constants.DD_MAX_CONCURRENCY,
+        required=False,
+        type=int,
+        help="Max number of in-flight requests per client. The limit starts at `--max-workers` and grows up to it "
+        "while the API responds without throttling. Defaults to `--max-workers`, which disables the growth.",
+        cls=CustomOptionClass,
+    ),
+    option(
+        "--engine",
+        envvar=constants.DD_ENGINE,
+        required=False,
+        default=constants.THREADS_ENGINE,
+        show_default=True,
+        type=Choice([constants.THREADS_ENGINE, constants.ASYNC_ENGINE], case_sensitive=False),
+        help="HTTP execution engine. `async` sends every request through a single asyncio event loop, which also "
+        "runs the `sync`, `import` and `diffs` workers as coroutines. Requires `pip install datadog-sync-cli[async]`.",
+        cls=CustomOptionClass,
+    ),
+    option(
+        "--type-concurrency",
+        envvar=constants.DD_TYPE_CONCURRENCY,
+        required=False,
+        help="Optional comma separated list of per resource type worker limits. e.g. `dashboards=4,monitors=16`.",
+        cls=CustomOptionClass,
+    ),
+    option(
+        "--page-concurrency",
+        envvar=constants.DD_PAGE_CONCURRENCY,
+        required=False,
+        type=int,
+        default=4,
+        show_default=True,
+        help="Max number of pages of a paginated resource list fetched concurrently once its total count is known.",
+        cls=CustomOptionClass,
+    ),
     option(
         "--filter-operator",
         envvar=constants.DD_FILTER_OPERATOR,
@@ -186,6 +223,48 @@ _non_import_common_options = [
         envvar=constants.DD_CLEANUP,
         cls=CustomOptionClass,
     ),
+    option(
+        "--diff-workers",
+        envvar=constants.DD_DIFF_WORKERS,
+        required=False,
+        type=int,
+        default=0,
+        show_default=True,
+        help="Number of processes used to compute resource diffs. Diffs are computed in the worker threads if 0.",
+        cls=CustomOptionClass,
+    ),
+]
+
+_http_cache_options = [
+    option(
+        "--http-cache",
+        envvar=constants.DD_HTTP_CACHE,
+        required=False,
+        is_flag=True,
+        default=False,
+        help="Cache the source organization's GET responses on disk and revalidate them on later runs.",
+        cls=CustomOptionClass,
+    ),
+    option(
+        "--http-cache-ttl",
+        envvar=constants.DD_HTTP_CACHE_TTL,
+        required=False,
+        type=int,
+        default=3600,
+        show_default=True,
+        help="Seconds cached responses without an `ETag` or `Last-Modified` header are reused for.",
+        cls=CustomOptionClass,
+    ),
+    option(
+        "--http-cache-max-size",
+        envvar=constants.DD_HTTP_CACHE_MAX_SIZE,
+        required=False,
+        type=int,
+        default=512,
+        show_default=True,
+        help="Max size of the response cache in MB. The least recently used responses are evicted beyond it.",
+        cls=CustomOptionClass,
+    ),
 ]
 
 
@@ -201,6 +280,10 @@ def common_options(func: Callable) -> Callable:
     return _build_options_helper(func, _common_options)
 
 
+def http_cache_options(func: Callable) -> Callable:
+    return _build_options_helper(func, _http_cache_options)
+
+
 def non_import_common_options(func: Callable) -> Callable:
     return _build_options_helper(func, _non_import_common_options)
 
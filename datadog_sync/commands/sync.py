@@ -6,9 +6,15 @@
 import os
 from sys import exit
 
-from click import command, option
+from click import Choice, Path, command, option
 
-from datadog_sync.constants import DESTINATION_RESOURCES_DIR, CMD_SYNC
+from datadog_sync.constants import (
+    CMD_SYNC,
+    CRITICAL_PATH_POLICY,
+    DD_SCHEDULING_POLICY,
+    DESTINATION_RESOURCES_DIR,
+    FIFO_POLICY,
+)
 from datadog_sync.commands.shared.options import (
     CustomOptionClass,
     common_options,
@@ -16,8 +22,9 @@ from datadog_sync.commands.shared.options import (
     destination_auth_options,
     non_import_common_options,
 )
+from datadog_sync.utils.plan import read_plan, stale_plan_inputs
 from datadog_sync.utils.resources_handler import ResourcesHandler
-from datadog_sync.utils.configuration import build_config
+from datadog_sync.utils.configuration import build_config, log_client_stats
 
 
 @command(CMD_SYNC, short_help="Sync Datadog resources to destination.")
@@ -33,18 +40,64 @@ from datadog_sync.utils.configuration import build_config
     help="Force importing and syncing resources that could be potential dependencies to the requested resources.",
     cls=CustomOptionClass,
 )
+@option(
+    "--scheduling-policy",
+    envvar=DD_SCHEDULING_POLICY,
+    required=False,
+    default=CRITICAL_PATH_POLICY,
+    show_default=True,
+    type=Choice([CRITICAL_PATH_POLICY, FIFO_POLICY], case_sensitive=False),
+    help="Order in which ready resources are dispatched. `critical-path` runs resources with the longest chain of "
+    "dependents first, `fifo` runs them in the order they become ready.",
+    cls=CustomOptionClass,
+)
+@option(
+    "--plan",
+    "plan_file",
+    required=False,
+    type=Path(exists=True, dir_okay=False),
+    help="Apply the plan file written by the `plan` command instead of computing the changes. "
+    "Refused if the state files or options changed since the plan was computed.",
+    cls=CustomOptionClass,
+)
+@option(
+    "--resume",
+    required=False,
+    is_flag=True,
+    default=False,
+    help="Resume an interrupted sync. Only resources which were not completed by the interrupted sync are synced.",
+    cls=CustomOptionClass,
+)
+@option(
+    "--full",
+    required=False,
+    is_flag=True,
+    default=False,
+    help="Sync every resource, including the resources whose source and destination objects did not change "
+    "since their last successful sync.",
+    cls=CustomOptionClass,
+)
 def sync(**kwargs):
     """Sync Datadog resources to destination."""
     cfg = build_config(CMD_SYNC, **kwargs)
     os.makedirs(DESTINATION_RESOURCES_DIR, exist_ok=True)
 
-    handler = ResourcesHandler(cfg)
+    plan = None
+    if kwargs.get("plan_file"):
+        plan = read_plan(kwargs["plan_file"])
+        stale = stale_plan_inputs(cfg, plan)
+        if stale:
+            cfg.logger.error(f"Plan {kwargs['plan_file']} is stale. Changed since it was computed: {', '.join(stale)}")
+            exit(1)
+
+    handler = ResourcesHandler(cfg, plan=plan)
 
     cfg.logger.info(f"Starting sync...")
 
     successes, errors = handler.apply_resources()
 
     cfg.logger.info(f"Finished sync: {successes} successes, {errors} errors")
+    log_client_stats(cfg)
 
     if cfg.logger.exception_logged:
         exit(1)
@@ -14,10 +14,19 @@ DD_HTTP_CLIENT_RETRY_TIMEOUT = "DD_HTTP_CLIENT_RETRY_TIMEOUT"
 DD_HTTP_CLIENT_TIMEOUT = "DD_HTTP_CLIENT_TIMEOUT"
 DD_RESOURCES = "DD_RESOURCES"
 MAX_WORKERS = "MAX_WORKERS"
+DD_MAX_CONCURRENCY = "DD_MAX_CONCURRENCY"
 DD_FILTER = "DD_FILTER"
 DD_FILTER_OPERATOR = "DD_FILTER_OPERATOR"
 DD_CLEANUP = "DD_CLEANUP"
 DD_VALIDATE = "DD_VALIDATE"
+DD_SCHEDULING_POLICY = "DD_SCHEDULING_POLICY"
+DD_TYPE_CONCURRENCY = "DD_TYPE_CONCURRENCY"
+DD_PAGE_CONCURRENCY = "DD_PAGE_CONCURRENCY"
+DD_HTTP_CACHE = "DD_HTTP_CACHE"
+DD_HTTP_CACHE_TTL = "DD_HTTP_CACHE_TTL"
+DD_HTTP_CACHE_MAX_SIZE = "DD_HTTP_CACHE_MAX_SIZE"
+DD_ENGINE = "DD_ENGINE"
+DD_DIFF_WORKERS = "DD_DIFF_WORKERS"
 
 # Default variables
 DEFAULT_API_URL = "https://api.datadoghq.com"
@@ -25,6 +34,12 @@ RESOURCES_DIR = "resources/"
 RESOURCE_FILE_PATH = "resources/{}/{}.json"
 SOURCE_RESOURCES_DIR = "resources/source"
 DESTINATION_RESOURCES_DIR = "resources/destination"
+PLAN_FILE_PATH = "resources/plan.json"
+JOURNAL_FILE_PATH = "resources/journal.jsonl"
+FINGERPRINTS_FILE_PATH = "resources/fingerprints.json"
+IMPORT_CHECKPOINTS_DIR = "resources/source/.checkpoints"
+IMPORT_INDEX_DIR = "resources/source/.import_index"
+HTTP_CACHE_DIR = "resources/source/.http_cache"
 
 LOGGER_NAME = "datadog_sync_cli"
 SOURCE_ORIGIN = "source"
@@ -35,6 +50,20 @@ VALIDATE_ENDPOINT = "/api/v1/validate"
 CMD_IMPORT = "import"
 CMD_SYNC = "sync"
 CMD_DIFFS = "diffs"
+CMD_MIGRATE = "migrate"
+CMD_PLAN = "plan"
+
+# Scheduling policies
+CRITICAL_PATH_POLICY = "critical-path"
+FIFO_POLICY = "fifo"
+
+# Plan actions
+PLAN_CREATE = "create"
+PLAN_UPDATE = "update"
+
+# Execution engines
+THREADS_ENGINE = "threads"
+ASYNC_ENGINE = "async"
 
 # Bool constants
 FALSE = 0
@@ -4,7 +4,7 @@
 # Copyright 2019 Datadog, Inc.
 
 from __future__ import annotations
-from typing import TYPE_CHECKING, Optional, List, Dict, cast
+from typing import TYPE_CHECKING, Optional, List, Dict, Iterable, cast
 
 from datadog_sync.utils.base_resource import BaseResource, ResourceConfig
 
@@ -25,10 +25,8 @@ class Dashboards(BaseResource):
     )
     # Additional Dashboards specific attributes
 
-    def get_resources(self, client: CustomClient) -> List[Dict]:
-        resp = client.get(self.resource_config.base_path).json()
-
-        return resp["dashboards"]
+    def get_resources(self, client: CustomClient) -> Iterable[Dict]:
+        return client.get_items(self.resource_config.base_path, key="dashboards")
 
     def import_resource(self, _id: Optional[str] = None, resource: Optional[Dict] = None) -> None:
         source_client = self.config.source_client
@@ -4,7 +4,7 @@
 # Copyright 2019 Datadog, Inc.
 from __future__ import annotations
 import math
-from typing import TYPE_CHECKING, Optional, List, Dict, cast
+from typing import TYPE_CHECKING, Optional, List, Dict, Iterable, cast
 from datetime import datetime
 
 from datadog_sync.utils.base_resource import BaseResource, ResourceConfig
@@ -41,10 +41,8 @@ class Downtimes(BaseResource):
     )
     # Additional Downtimes specific attributes
 
-    def get_resources(self, client: CustomClient) -> List[Dict]:
-        resp = client.get(self.resource_config.base_path).json()
-
-        return resp
+    def get_resources(self, client: CustomClient) -> Iterable[Dict]:
+        return client.get_items(self.resource_config.base_path)
 
     def import_resource(self, _id: Optional[str] = None, resource: Optional[Dict] = None) -> None:
         if _id:
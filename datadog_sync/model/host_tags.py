@@ -16,6 +16,7 @@ class HostTags(BaseResource):
     resource_type = "host_tags"
     resource_config = ResourceConfig(
         base_path="/api/v1/tags/hosts",
+        per_resource_import=False,
     )
     # Additional HostTags specific attributes
 
@@ -5,7 +5,7 @@
 
 from __future__ import annotations
 import re
-from typing import TYPE_CHECKING, Optional, List, Dict, cast
+from typing import TYPE_CHECKING, Optional, List, Dict, Iterable, cast
 
 from datadog_sync.utils.base_resource import BaseResource, ResourceConfig
 
@@ -33,10 +33,8 @@ class Monitors(BaseResource):
     )
     # Additional Monitors specific attributes
 
-    def get_resources(self, client: CustomClient) -> List[Dict]:
-        resp = client.get(self.resource_config.base_path).json()
-
-        return resp
+    def get_resources(self, client: CustomClient) -> Iterable[Dict]:
+        return client.get_items(self.resource_config.base_path)
 
     def import_resource(self, _id: Optional[str] = None, resource: Optional[Dict] = None) -> None:
         if _id:
@@ -16,9 +16,11 @@ class ServiceLevelObjectives(BaseResource):
     resource_config = ResourceConfig(
         resource_connections={"monitors": ["monitor_ids"], "synthetics_tests": []},
         base_path="/api/v1/slo",
+        bulk_delete_size=100,
         excluded_attributes=["creator", "id", "created_at", "modified_at"],
     )
     # Additional ServiceLevelObjectives specific attributes
+    bulk_delete_path: str = "/api/v1/slo/bulk_delete"
 
     def get_resources(self, client: CustomClient) -> List[Dict]:
         resp = client.get(self.resource_config.base_path).json()
@@ -60,6 +62,22 @@ class ServiceLevelObjectives(BaseResource):
             params={"force": True},
         )
 
+    def delete_resources(self, _ids: List[str]) -> List[str]:
+        # Bulk deletes remove the given timeframes of each SLO, and the SLO itself once all of them are removed
+        destination_client = self.config.destination_client
+        body = {}
+        for _id in _ids:
+            resource = self.resource_config.destination_resources[_id]
+            timeframes = sorted(set(threshold["timeframe"] for threshold in resource.get("thresholds") or []))
+            if timeframes:
+                body[resource["id"]] = timeframes
+
+        deleted = set()
+        if body:
+            resp = destination_client.post(self.bulk_delete_path, body).json()
+            deleted = set((resp.get("data") or {}).get("deleted") or [])
+        return [_id for _id in _ids if self.resource_config.destination_resources[_id]["id"] not in deleted]
+
     def connect_id(self, key: str, r_obj: Dict, resource_to_connect: str) -> Optional[List[str]]:
         monitors = self.config.resources["monitors"].resource_config.destination_resources
         synthetics_tests = self.config.resources["synthetics_tests"].resource_config.destination_resources
@@ -4,7 +4,7 @@
 # Copyright 2019 Datadog, Inc.
 
 from __future__ import annotations
-from typing import TYPE_CHECKING, Any, Optional, List, Dict, cast
+from typing import TYPE_CHECKING, Any, Optional, List, Dict, Iterable, cast
 
 from datadog_sync.utils.base_resource import BaseResource, ResourceConfig
 
@@ -22,6 +22,7 @@ class SyntheticsTests(BaseResource):
             "synthetics_global_variables": ["config.configVariables.id"],
         },
         base_path="/api/v1/synthetics/tests",
+        bulk_delete_size=100,
         excluded_attributes=["deleted_at", "org_id", "public_id", "monitor_id", "modified_at", "created_at", "creator"],
         excluded_attributes_re=[
             "updatedAt",
@@ -36,10 +37,8 @@ class SyntheticsTests(BaseResource):
     browser_test_path: str = "/api/v1/synthetics/tests/browser/{}"
     api_test_path: str = "/api/v1/synthetics/tests/api/{}"
 
-    def get_resources(self, client: CustomClient) -> List[Dict]:
-        resp = client.get(self.resource_config.base_path).json()
-
-        return resp["tests"]
+    def get_resources(self, client: CustomClient) -> Iterable[Dict]:
+        return client.get_items(self.resource_config.base_path, key="tests")
 
     def import_resource(self, _id: Optional[str] = None, resource: Optional[Dict] = None) -> None:
         source_client = self.config.source_client
@@ -85,6 +84,15 @@ class SyntheticsTests(BaseResource):
         body = {"public_ids": [self.resource_config.destination_resources[_id]["public_id"]]}
         destination_client.post(self.resource_config.base_path + "/delete", body)
 
+    def delete_resources(self, _ids: List[str]) -> List[str]:
+        destination_client = self.config.destination_client
+        public_ids = {self.resource_config.destination_resources[_id]["public_id"]: _id for _id in _ids}
+        body = {"public_ids": sorted(public_ids)}
+        resp = destination_client.post(self.resource_config.base_path + "/delete", body)
+
+        deleted = set(test["public_id"] for test in resp.json().get("deleted_tests") or [])
+        return [_id for public_id, _id in public_ids.items() if public_id not in deleted]
+
     def connect_id(self, key: str, r_obj: Dict, resource_to_connect: str) -> Optional[List[str]]:
         failed_connections: List[str] = []
         if resource_to_connect == "synthetics_private_locations":
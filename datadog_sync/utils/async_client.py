@@ -0,0 +1,278 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import json
+import atexit
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional
+
+import requests
+
+from datadog_sync.utils.custom_client import (
+    CustomClient,
+    PaginationConfig,
+    async_request_with_retry,
+    build_default_headers,
+    cached_request,
+    next_pages,
+    single_flight_request,
+)
+from datadog_sync.utils.async_worker import AsyncWorkerExecutor, await_, in_async_worker
+from datadog_sync.utils.limiter import AdaptiveLimiter, RateLimiter
+from datadog_sync.utils.retry import CircuitBreaker, RetryBudget
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+
+class AsyncResponse:
+    """Buffered aiohttp response exposing the subset of `requests.Response` used by the resources."""
+
+    def __init__(self, status_code: int, reason: str, headers: Any, content: bytes, url: str) -> None:
+        self.status_code = status_code
+        self.reason = reason
+        self.headers = headers
+        self.content = content
+        self.url = url
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self) -> Any:
+        return json.loads(self.content)
+
+    def raise_for_status(self) -> None:
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} {self.reason} for url: {self.url}", response=self)
+
+    def iter_content(self, chunk_size: int = 1) -> Iterator[bytes]:
+        # Responses are buffered by the event loop, streamed requests included
+        for i in range(0, len(self.content), chunk_size):
+            yield self.content[i : i + chunk_size]
+
+    def close(self) -> None:
+        pass
+
+
+class AsyncCustomClient:
+    def __init__(
+        self,
+        host: Optional[str],
+        auth: Dict[str, str],
+        retry_timeout: int,
+        timeout: int,
+        max_connections: int = 100,
+        page_concurrency: int = 1,
+    ) -> None:
+        self.host = host
+        self.timeout = timeout
+        self.retry_timeout = retry_timeout
+        self.max_connections = max_connections
+        self.page_concurrency = page_concurrency
+        self.headers = build_default_headers(auth)
+        self.default_pagination = PaginationConfig()
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.limiter: Optional[AdaptiveLimiter] = None
+        self.rate_limiter = RateLimiter()
+        self.retry_budget = RetryBudget()
+        self.circuit_breaker = CircuitBreaker()
+        self.new_connections = 0
+        self.reused_connections = 0
+
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        body: Any = None,
+        params: Optional[Dict] = None,
+        headers: Optional[Dict] = None,
+        stream: bool = False,
+    ) -> AsyncResponse:
+        if self.session is None:
+            # aiohttp sessions are bound to the running loop so they are created lazily
+            self.session = aiohttp.ClientSession(
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                trace_configs=[self._connection_trace_config()],
+            )
+
+        url = self.host + path
+        async with self.session.request(method, url, json=body, params=_encode_params(params), headers=headers) as resp:
+            content = await resp.read()
+            return AsyncResponse(resp.status, resp.reason, resp.headers, content, str(resp.url))
+
+    @async_request_with_retry
+    async def get(self, path, **kwargs):
+        return await self._request("GET", path, **kwargs)
+
+    @async_request_with_retry
+    async def post(self, path, body, **kwargs):
+        return await self._request("POST", path, body, **kwargs)
+
+    @async_request_with_retry
+    async def put(self, path, body, **kwargs):
+        return await self._request("PUT", path, body, **kwargs)
+
+    @async_request_with_retry
+    async def patch(self, path, body, **kwargs):
+        return await self._request("PATCH", path, body, **kwargs)
+
+    @async_request_with_retry
+    async def delete(self, path, body=None, **kwargs):
+        return await self._request("DELETE", path, body, **kwargs)
+
+    def paginated_request(self, func: Callable[..., Awaitable[AsyncResponse]]) -> Callable[..., Awaitable[List]]:
+        async def wrapper(*args, **kwargs):
+            pagination_config = kwargs.pop("pagination_config", self.default_pagination)
+            page_size = pagination_config.page_size
+            base_params = kwargs.pop("params", None) or {}
+            semaphore = asyncio.Semaphore(max(1, self.page_concurrency))
+
+            async def fetch_page(page_number: int) -> Dict:
+                params = {
+                    **base_params,
+                    pagination_config.page_size_param: page_size,
+                    pagination_config.page_number_param: page_number,
+                }
+                async with semaphore:
+                    resp = await func(*args, params=params, **kwargs)
+                resp.raise_for_status()
+                return resp.json()
+
+            resources = []
+            pages = [(0, pagination_config.page_number)]
+            while pages:
+                responses = await asyncio.gather(*(fetch_page(page_number) for _, page_number in pages))
+                for resp_json in responses:
+                    resources.extend(resp_json["data"])
+
+                idx, page_number = pages[-1]
+                pages = next_pages(pagination_config, idx, page_number, responses[-1])
+            return resources
+
+        return wrapper
+
+    def _connection_trace_config(self) -> aiohttp.TraceConfig:
+        async def on_connection_create_end(session, context, params):
+            self.new_connections += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.reused_connections += 1
+
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace_config
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+
+class AsyncEngine:
+    """Runs an asyncio event loop in a background thread which serves the HTTP requests of every worker.
+
+    The resource workers of `sync`, `import` and `diffs` run as coroutines of the loop, see `AsyncWorkerExecutor`.
+    """
+
+    def __init__(self) -> None:
+        self.loop = asyncio.new_event_loop()
+        self.clients: List[AsyncCustomClient] = []
+        self._thread = threading.Thread(target=self.loop.run_forever, name="datadog-sync-async-engine", daemon=True)
+        self._thread.start()
+        atexit.register(self.shutdown)
+
+    def run(self, coro: Awaitable) -> Any:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    def shutdown(self) -> None:
+        if not self.loop.is_running():
+            return
+
+        for client in self.clients:
+            self.run(client.close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+    def executor(self, max_workers: Optional[int] = None) -> AsyncWorkerExecutor:
+        """Returns an executor running its calls as async workers of the event loop."""
+        return AsyncWorkerExecutor(self.loop, max_workers)
+
+
+class AsyncEngineClient(CustomClient):
+    """CustomClient sending every request through the async engine's event loop.
+
+    Connections, retries, backoff sleeps and in-flight slots are handled by the event loop. Async workers
+    await the request on the loop, so the number of in-flight requests is only bounded by the limiter.
+    Worker threads block until the loop sends the response."""
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        host: Optional[str],
+        auth: Dict[str, str],
+        retry_timeout: int,
+        timeout: int,
+        max_connections: int = 100,
+        page_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+    ) -> None:
+        super().__init__(host, auth, retry_timeout, timeout, max_connections, page_concurrency, initial_concurrency)
+        self.engine = engine
+        self.async_client = AsyncCustomClient(host, auth, retry_timeout, timeout, max_connections, page_concurrency)
+        self.async_client.limiter = self.limiter
+        self.async_client.rate_limiter = self.rate_limiter
+        self.async_client.retry_budget = self.retry_budget
+        self.async_client.circuit_breaker = self.circuit_breaker
+        self.engine.clients.append(self.async_client)
+
+    def connection_stats(self) -> Dict[str, int]:
+        return {
+            "new_connections": self.async_client.new_connections,
+            "reused_connections": self.async_client.reused_connections,
+        }
+
+    @single_flight_request
+    @cached_request
+    def get(self, path, **kwargs):
+        return self._run(self.async_client.get(path, **kwargs))
+
+    def post(self, path, body, **kwargs):
+        return self._run(self.async_client.post(path, body, **kwargs))
+
+    def put(self, path, body, **kwargs):
+        return self._run(self.async_client.put(path, body, **kwargs))
+
+    def patch(self, path, body, **kwargs):
+        return self._run(self.async_client.patch(path, body, **kwargs))
+
+    def delete(self, path, body=None, **kwargs):
+        return self._run(self.async_client.delete(path, body, **kwargs))
+
+    def _run(self, coro: Awaitable) -> Any:
+        if in_async_worker():
+            return await_(coro)
+        return self.engine.run(coro)
+
+    def _page_executor(self) -> AsyncWorkerExecutor:
+        # Pages are fetched by async workers so a paginated request never blocks the event loop
+        with self._page_executor_lock:
+            if self._page_executor_pool is None:
+                self._page_executor_pool = self.engine.executor(self.page_concurrency)
+            return self._page_executor_pool
+
+
+def _encode_params(params: Optional[Dict]) -> Optional[Dict[str, str]]:
+    # aiohttp only accepts str values. Encode them the same way requests does.
+    if not params:
+        return None
+    return {k: str(v) for k, v in params.items()}
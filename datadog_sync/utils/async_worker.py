@@ -0,0 +1,103 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+"""Runs the synchronous resource workers as coroutines of an asyncio event loop.
+
+Each worker runs in a greenlet on the event loop thread. When a worker waits on an awaitable with `await_`,
+its greenlet switches back to the event loop, which runs the other workers until the awaitable is done.
+The resource models keep calling the clients synchronously while the number of workers is no longer bounded
+by threads.
+"""
+
+from __future__ import annotations
+import sys
+import asyncio
+import concurrent.futures
+from concurrent.futures import Executor, Future
+from threading import Lock
+from typing import Any, Awaitable, Callable, Iterator, Optional, Set
+
+try:
+    import greenlet
+except ImportError:
+    greenlet = None
+
+
+async def run_in_greenlet(fn: Callable, *args, **kwargs) -> Any:
+    """Runs `fn` as a coroutine of the running event loop, awaiting the awaitables it passes to `await_`."""
+    worker = greenlet.greenlet(fn)
+    worker.async_worker = True
+    result = worker.switch(*args, **kwargs)
+    while not worker.dead:
+        try:
+            value = await result
+        except BaseException:
+            result = worker.throw(*sys.exc_info())
+        else:
+            result = worker.switch(value)
+    return result
+
+
+def in_async_worker() -> bool:
+    return greenlet is not None and getattr(greenlet.getcurrent(), "async_worker", False)
+
+
+def await_(awaitable: Awaitable) -> Any:
+    """Waits for `awaitable` on the event loop running the current async worker and returns its result."""
+    if not in_async_worker():
+        raise RuntimeError("await_ can only be called from an async worker")
+    return greenlet.getcurrent().parent.switch(awaitable)
+
+
+def wait_future(future: Future) -> Any:
+    """Returns the result of `future`. Async workers wait for it without blocking the event loop."""
+    if in_async_worker():
+        return await_(asyncio.wrap_future(future))
+    return future.result()
+
+
+class AsyncWorkerExecutor(Executor):
+    """Executor running each submitted call as an async worker of `loop`, at most `max_workers` at once."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, max_workers: Optional[int] = None) -> None:
+        self.loop = loop
+        self.max_workers = max_workers
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._futures: Set[Future] = set()
+        self._lock = Lock()
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        future = asyncio.run_coroutine_threadsafe(self._run(fn, args, kwargs), self.loop)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._discard)
+        return future
+
+    def map(self, fn: Callable, *iterables, timeout: Optional[float] = None, chunksize: int = 1) -> Iterator:
+        futures = [self.submit(fn, *args) for args in zip(*iterables)]
+        return (wait_future(future) for future in futures)
+
+    def shutdown(self, wait: bool = True, *, cancel_futures: bool = False) -> None:
+        with self._lock:
+            futures = list(self._futures)
+        if cancel_futures:
+            for future in futures:
+                future.cancel()
+        if wait:
+            concurrent.futures.wait(futures)
+
+    async def _run(self, fn: Callable, args: tuple, kwargs: dict) -> Any:
+        if self.max_workers is None:
+            return await run_in_greenlet(fn, *args, **kwargs)
+
+        if self._semaphore is None:
+            # Created on the event loop, asyncio primitives are bound to the loop they are first used in
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+        async with self._semaphore:
+            return await run_in_greenlet(fn, *args, **kwargs)
+
+    def _discard(self, future: Future) -> None:
+        with self._lock:
+            self._futures.discard(future)
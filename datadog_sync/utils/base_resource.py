@@ -8,7 +8,7 @@ import abc
 from collections import defaultdict
 from dataclasses import dataclass, field
 from pprint import pformat
-from typing import TYPE_CHECKING, Optional, Dict, List
+from typing import TYPE_CHECKING, Optional, Dict, Iterable, List
 
 from datadog_sync.utils.custom_client import CustomClient
 from datadog_sync.utils.resource_utils import open_resources, find_attr, ResourceConnectionError
@@ -24,7 +24,9 @@ class ResourceConfig:
     non_nullable_attr: Optional[List[str]] = None
     excluded_attributes: Optional[List[str]] = None
     excluded_attributes_re: Optional[List[str]] = None
-    concurrent: bool = True
+    concurrency: Optional[int] = None  # max in-flight workers for the resource type. Unbounded if None
+    per_resource_import: bool = True  # False if resources are only complete once the whole type is imported
+    bulk_delete_size: Optional[int] = None  # max resources per bulk delete request. Deleted one by one if None
     source_resources: dict = field(default_factory=dict)
     destination_resources: dict = field(default_factory=dict)
 
@@ -48,7 +50,7 @@ class BaseResource(abc.ABC):
         )
 
     @abc.abstractmethod
-    def get_resources(self, client: CustomClient) -> List[Dict]:
+    def get_resources(self, client: CustomClient) -> Iterable[Dict]:
         pass
 
     @abc.abstractmethod
@@ -75,6 +77,12 @@ class BaseResource(abc.ABC):
     def delete_resource(self, _id: str) -> None:
         pass
 
+    def delete_resources(self, _ids: List[str]) -> List[str]:
+        """Deletes resources with a single request and returns the IDs of the resources it did not delete.
+
+        Only called for resource types with a `bulk_delete_size`."""
+        raise NotImplementedError
+
     @abc.abstractmethod
     def connect_id(self, key: str, r_obj: Dict, resource_to_connect: str) -> Optional[List[str]]:
         resources = self.config.resources[resource_to_connect].resource_config.destination_resources
@@ -0,0 +1,180 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import json
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, IO, Iterable, Optional
+
+from datadog_sync.constants import IMPORT_CHECKPOINTS_DIR, IMPORT_INDEX_DIR, LOGGER_NAME
+
+
+SESSION_FILE = "session.json"
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class ImportCheckpoint:
+    """Incremental record of the resources imported during an import session.
+
+    Every imported resource is appended to a per resource type checkpoint file as soon as it is
+    fetched. A resumed session reuses the checkpointed resources whose list-level modification
+    date did not change instead of fetching them again. The checkpoints are removed once the
+    import session finishes without errors, and kept for `import --resume` otherwise.
+    """
+
+    def __init__(self, resume: bool, directory: str = IMPORT_CHECKPOINTS_DIR) -> None:
+        self.resume = resume
+        self.directory = directory
+        self.session: Optional[str] = None
+        self.entries: Dict[str, Dict[str, Dict[str, Any]]] = {}  # checkpointed entries per type and list key
+        self._files: Dict[str, IO] = {}
+        self._lock = Lock()
+
+    def start(self, resource_types: Iterable[str]) -> None:
+        session_path = os.path.join(self.directory, SESSION_FILE)
+        if self.resume and os.path.exists(session_path):
+            with open(session_path, "r") as f:
+                self.session = json.load(f)["session"]
+            for resource_type in resource_types:
+                self.entries[resource_type] = self._load(resource_type)
+            resumed = sum(len(entries) for entries in self.entries.values())
+            log.info(f"resuming import session {self.session}: {resumed} resources already imported")
+            return
+
+        if self.resume:
+            log.warning("no import session to resume. Starting a new one")
+        shutil.rmtree(self.directory, ignore_errors=True)
+        os.makedirs(self.directory, exist_ok=True)
+        self.session = uuid.uuid4().hex
+        with open(session_path, "w") as f:
+            json.dump({"session": self.session, "started": datetime.now(timezone.utc).isoformat()}, f)
+
+    def lookup(self, resource_type: str, resource: Dict) -> Optional[Dict[str, Any]]:
+        """Returns the checkpointed resources imported from a listed resource if they are still valid."""
+        key = list_key(resource)
+        entry = self.entries.get(resource_type, {}).get(key) if key else None
+        if entry is None or entry["version"] != list_version(resource):
+            return None
+        return entry["resources"]
+
+    def record(self, resource_type: str, resource: Dict, imported: Dict[str, Any]) -> None:
+        key = list_key(resource)
+        if not key:
+            return
+
+        line = json.dumps({"key": key, "version": list_version(resource), "resources": imported}) + "\n"
+        with self._lock:
+            if resource_type not in self._files:
+                self._files[resource_type] = open(self._path(resource_type), "a")
+            self._files[resource_type].write(line)
+            self._files[resource_type].flush()
+
+    def close(self) -> None:
+        """Closes the checkpoint files, keeping the session so it can be resumed."""
+        with self._lock:
+            for f in self._files.values():
+                f.close()
+            self._files.clear()
+
+    def finish(self) -> None:
+        """Ends the import session once every resource type is written to its state file."""
+        self.close()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _load(self, resource_type: str) -> Dict[str, Dict[str, Any]]:
+        entries: Dict[str, Dict[str, Any]] = {}
+        if not os.path.exists(self._path(resource_type)):
+            return entries
+
+        with open(self._path(resource_type), "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    # The last entry may be truncated if the process was killed while writing it
+                    continue
+                entries[entry["key"]] = entry
+        return entries
+
+    def _path(self, resource_type: str) -> str:
+        return os.path.join(self.directory, f"{resource_type}.jsonl")
+
+
+class ImportIndex:
+    """List-level modification dates of the resources in the source state files.
+
+    Every import records the modification date each listed resource had in the list response, along
+    with the IDs of the resources imported from it. An incremental import reuses the resources of the
+    source state file whose modification date did not change instead of fetching them again.
+    """
+
+    def __init__(self, directory: str = IMPORT_INDEX_DIR) -> None:
+        self.directory = directory
+        self.previous: Dict[str, Dict[str, Dict[str, Any]]] = {}  # entries of the last import per type and list key
+        self.entries: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._lock = Lock()
+
+    def load(self, resource_type: str) -> None:
+        entries: Dict[str, Dict[str, Any]] = {}
+        if os.path.exists(self._path(resource_type)):
+            try:
+                with open(self._path(resource_type), "r") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError) as e:
+                log.warning(f"failed to load the import index of {resource_type}. Importing all of them: {e}")
+        self.previous[resource_type] = entries
+
+    def lookup(self, resource_type: str, resource: Dict, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Returns the resources of `state` imported from a listed resource if it was not modified since."""
+        key = list_key(resource)
+        version = list_version(resource)
+        entry = self.previous.get(resource_type, {}).get(key) if key else None
+        if entry is None or version is None or entry["version"] != version:
+            return None
+        if any(_id not in state for _id in entry["ids"]):
+            return None
+        return {_id: state[_id] for _id in entry["ids"]}
+
+    def record(self, resource_type: str, resource: Dict, ids: Iterable[str]) -> None:
+        key = list_key(resource)
+        if not key:
+            return
+
+        with self._lock:
+            self.entries.setdefault(resource_type, {})[key] = {"version": list_version(resource), "ids": list(ids)}
+
+    def write(self, resource_type: str) -> None:
+        """Writes the entries of a resource type once its state file is written."""
+        with self._lock:
+            entries = self.entries.pop(resource_type, {})
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(resource_type), "w") as f:
+            json.dump(entries, f)
+
+    def _path(self, resource_type: str) -> str:
+        return os.path.join(self.directory, f"{resource_type}.json")
+
+
+def list_key(resource: Dict) -> Optional[str]:
+    """Returns the identifier of a resource returned by a list endpoint."""
+    for attr in ("id", "public_id", "name"):
+        if resource.get(attr) is not None:
+            return f"{attr}:{resource[attr]}"
+    return None
+
+
+def list_version(resource: Dict) -> Optional[str]:
+    """Returns the modification date of a resource returned by a list endpoint, if it has one."""
+    for obj in (resource, resource.get("attributes") or {}):
+        for attr in ("modified_at", "modified"):
+            if obj.get(attr) is not None:
+                return str(obj[attr])
+    return None
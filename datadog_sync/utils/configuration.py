@@ -4,6 +4,8 @@
 # Copyright 2019 Datadog, Inc.
 
 from __future__ import annotations
+import os
+import hashlib
 import logging
 from sys import exit
 from dataclasses import dataclass, field
@@ -11,10 +13,28 @@ from typing import Any, Optional, Union, Dict, List
 
 from datadog_sync import models
 from datadog_sync.utils.custom_client import CustomClient
+from datadog_sync.utils.async_client import AsyncEngine, AsyncEngineClient, aiohttp
+from datadog_sync.utils.async_worker import greenlet
 from datadog_sync.utils.base_resource import BaseResource
 from datadog_sync.utils.log import Log
 from datadog_sync.utils.filter import Filter, process_filters
-from datadog_sync.constants import CMD_DIFFS, CMD_IMPORT, CMD_SYNC, FALSE, FORCE, LOGGER_NAME, TRUE, VALIDATE_ENDPOINT
+from datadog_sync.utils.http_cache import ResponseCache
+from datadog_sync.utils.journal import Journal
+from datadog_sync.constants import (
+    ASYNC_ENGINE,
+    CMD_DIFFS,
+    CMD_IMPORT,
+    CMD_MIGRATE,
+    CMD_PLAN,
+    CMD_SYNC,
+    CRITICAL_PATH_POLICY,
+    FALSE,
+    FORCE,
+    HTTP_CACHE_DIR,
+    LOGGER_NAME,
+    TRUE,
+    VALIDATE_ENDPOINT,
+)
 from datadog_sync.utils.resource_utils import CustomClientHTTPError
 
 
@@ -29,9 +49,21 @@ class Configuration(object):
     skip_failed_resource_connections: bool
     max_workers: int
     cleanup: int
+    scheduling_policy: str = CRITICAL_PATH_POLICY
+    diff_workers: int = 0
+    resume: bool = False
+    incremental: bool = False
+    full: bool = False
+    max_concurrency: Optional[int] = None  # ceiling of the in-flight requests and workers. max_workers if None
+    async_engine: Optional[AsyncEngine] = None  # event loop running the workers with `--engine async`
+    journal: Journal = field(default_factory=Journal)
     resources: Dict[str, BaseResource] = field(default_factory=dict)
     resources_arg: List[str] = field(default_factory=list)
 
+    def __post_init__(self) -> None:
+        if not self.max_concurrency:
+            self.max_concurrency = self.max_workers
+
 
 def build_config(cmd: str, **kwargs: Optional[Any]) -> Configuration:
     # configure logger
@@ -44,6 +76,11 @@ def build_config(cmd: str, **kwargs: Optional[Any]) -> Configuration:
     source_api_url = kwargs.get("source_api_url")
     destination_api_url = kwargs.get("destination_api_url")
 
+    # Match the ThreadPoolExecutor default so the dispatcher knows the pool size
+    max_workers = kwargs.get("max_workers") or min(32, (os.cpu_count() or 1) + 4)
+    # The in-flight request limit starts at max_workers and only grows above it up to an explicit max_concurrency
+    max_concurrency = max(kwargs.get("max_concurrency") or max_workers, max_workers)
+
     # Initialize the datadog API Clients based on cmd
     retry_timeout = kwargs.get("http_client_retry_timeout")
     timeout = kwargs.get("http_client_timeout")
@@ -51,28 +88,77 @@ def build_config(cmd: str, **kwargs: Optional[Any]) -> Configuration:
         "apiKeyAuth": kwargs.get("source_api_key", ""),
         "appKeyAuth": kwargs.get("source_app_key", ""),
     }
-    source_client = CustomClient(source_api_url, source_auth, retry_timeout, timeout)
-
     destination_auth = {
         "apiKeyAuth": kwargs.get("destination_api_key", ""),
         "appKeyAuth": kwargs.get("destination_app_key", ""),
     }
-    destination_client = CustomClient(destination_api_url, destination_auth, retry_timeout, timeout)
+    page_concurrency = kwargs.get("page_concurrency") or 1
+    engine = None
+    if kwargs.get("engine") == ASYNC_ENGINE:
+        if aiohttp is None or greenlet is None:
+            logger.error(
+                "the async engine requires the `aiohttp` and `greenlet` packages. "
+                "Install them with `pip install datadog-sync-cli[async]`"
+            )
+            exit(1)
+
+        engine = AsyncEngine()
+        source_client = AsyncEngineClient(
+            engine, source_api_url, source_auth, retry_timeout, timeout, max_concurrency, page_concurrency, max_workers
+        )
+        destination_client = AsyncEngineClient(
+            engine,
+            destination_api_url,
+            destination_auth,
+            retry_timeout,
+            timeout,
+            max_concurrency,
+            page_concurrency,
+            max_workers,
+        )
+    else:
+        source_client = CustomClient(
+            source_api_url, source_auth, retry_timeout, timeout, max_concurrency, page_concurrency, max_workers
+        )
+        destination_client = CustomClient(
+            destination_api_url,
+            destination_auth,
+            retry_timeout,
+            timeout,
+            max_concurrency,
+            page_concurrency,
+            max_workers,
+        )
+
+    if kwargs.get("http_cache"):
+        # Application keys may have different scopes, so responses are only shared by the same pair of keys
+        credentials = f"{source_api_url} {source_auth['apiKeyAuth']} {source_auth['appKeyAuth']}"
+        namespace = hashlib.sha256(credentials.encode("utf-8")).hexdigest()
+        source_client.cache = ResponseCache(
+            HTTP_CACHE_DIR,
+            namespace,
+            kwargs.get("http_cache_ttl") or 0,
+            (kwargs.get("http_cache_max_size") or 0) * 1024 * 1024,
+        )
 
     # Validate the clients. For import we only validate the source client
-    # For sync/diffs we validate the destination client.
+    # For sync/diffs/plan we validate the destination client. Migrate validates both.
     validate = kwargs.get("validate")
     if validate:
-        if cmd in [CMD_SYNC, CMD_DIFFS]:
+        if cmd in [CMD_SYNC, CMD_DIFFS, CMD_PLAN, CMD_MIGRATE]:
             _validate_client(destination_client)
-        if cmd == CMD_IMPORT:
+        if cmd in [CMD_IMPORT, CMD_MIGRATE]:
             _validate_client(source_client)
         logger.info("clients validated successfully")
 
     # Additional settings
     force_missing_dependencies = kwargs.get("force_missing_dependencies")
     skip_failed_resource_connections = kwargs.get("skip_failed_resource_connections")
-    max_workers = kwargs.get("max_workers", 10)
+    scheduling_policy = kwargs.get("scheduling_policy") or CRITICAL_PATH_POLICY
+    diff_workers = kwargs.get("diff_workers") or 0
+    resume = kwargs.get("resume") or False
+    incremental = kwargs.get("incremental") or False
+    full = kwargs.get("full") or False
 
     cleanup = kwargs.get("cleanup")
     if cleanup != None:
@@ -93,6 +179,13 @@ def build_config(cmd: str, **kwargs: Optional[Any]) -> Configuration:
         skip_failed_resource_connections=skip_failed_resource_connections,
         max_workers=max_workers,
         cleanup=cleanup,
+        scheduling_policy=scheduling_policy,
+        diff_workers=diff_workers,
+        resume=resume,
+        incremental=incremental,
+        full=full,
+        max_concurrency=max_concurrency,
+        async_engine=engine,
     )
 
     # Initialize resources
@@ -111,6 +204,17 @@ def build_config(cmd: str, **kwargs: Optional[Any]) -> Configuration:
     config.resources = resources
     config.resources_arg = resources_arg
 
+    # Recover the destination state of interrupted runs
+    if cmd != CMD_IMPORT:
+        config.journal.replay(config)
+
+    # Per resource type concurrency overrides
+    for resource_type, concurrency in process_type_concurrency(kwargs.get("type_concurrency")).items():
+        if resource_type not in resources:
+            logger.warning("invalid resource in type concurrency. Discarding: %s", resource_type)
+            continue
+        resources[resource_type].resource_config.concurrency = concurrency
+
     return config
 
 
@@ -126,6 +230,41 @@ def init_resources(cfg: Configuration) -> Dict[str, BaseResource]:
     return resources
 
 
+def process_type_concurrency(type_concurrency: Optional[str]) -> Dict[str, int]:
+    """Parses `type=limit` pairs separated by `,` into a dict of concurrency limits."""
+    logger = logging.getLogger(LOGGER_NAME)
+    limits: Dict[str, int] = {}
+    if not type_concurrency:
+        return limits
+
+    for pair in type_concurrency.split(","):
+        try:
+            resource_type, limit = pair.split("=", 1)
+            limit = int(limit)
+        except ValueError:
+            logger.warning("invalid type concurrency: %s", pair)
+            continue
+
+        if limit < 1:
+            logger.warning("type concurrency must be greater than 0: %s", pair)
+            continue
+        limits[resource_type.strip().lower()] = limit
+
+    return limits
+
+
+def log_client_stats(cfg: Configuration) -> None:
+    """Logs the request metrics of the clients which sent requests."""
+    for origin, client in (("source", cfg.source_client), ("destination", cfg.destination_client)):
+        stats = client.stats()
+        if not stats.get("requests") and not stats.get("cache_hits"):
+            continue
+        cfg.logger.info(f"{origin} client metrics: " + ", ".join(f"{k}={v}" for k, v in stats.items()))
+        # Connection reuse is only reported with --verbose
+        connections = client.connection_stats()
+        cfg.logger.debug(f"{origin} client connections: " + ", ".join(f"{k}={v}" for k, v in connections.items()))
+
+
 def _validate_client(client: CustomClient) -> None:
     logger = logging.getLogger(LOGGER_NAME)
     try:
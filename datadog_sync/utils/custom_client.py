@@ -2,69 +2,293 @@
 # under the 3-clause BSD style license (see LICENSE).
 # This product includes software developed at Datadog (https://www.datadoghq.com/).
 # Copyright 2019 Datadog, Inc.
+import json
+import math
 import time
+import random
+import asyncio
 import logging
 import platform
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Dict, Optional, Callable
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from threading import Lock
+from typing import Any, Dict, Iterator, List, Optional, Callable, Tuple
 
 import requests
+from requests.adapters import DEFAULT_POOLSIZE, HTTPAdapter
 
 from datadog_sync.constants import LOGGER_NAME
-from datadog_sync.utils.resource_utils import CustomClientHTTPError
+from datadog_sync.utils.http_cache import ResponseCache
+from datadog_sync.utils.json_stream import iter_json_items
+from datadog_sync.utils.limiter import AdaptiveLimiter, RateLimiter, endpoint_key
+from datadog_sync.utils.resource_utils import CustomClientHTTPError, thread_pool_executor
+from datadog_sync.utils.retry import CircuitBreaker, RetryBudget
+from datadog_sync.utils.single_flight import SingleFlight
 
 log = logging.getLogger(LOGGER_NAME)
 
+# Bounds of the jittered exponential backoff, in seconds
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 60
+# Size of the chunks streamed list responses are read in, in bytes
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def single_flight_request(func: Callable) -> Callable:
+    """Shares the response of a GET request between the workers sending it concurrently.
+
+    Only requests without other options than `params` are shared. Their response body is read before it
+    is shared and every worker parses it on its own, so workers never share the parsed resources."""
+
+    def wrapper(*args, **kwargs):
+        if set(kwargs) - {"params"}:
+            return func(*args, **kwargs)
+        key = (args[1], json.dumps(kwargs.get("params") or {}, sort_keys=True, default=str))
+        return args[0].single_flight.do(key, func, *args, **kwargs)
+
+    return wrapper
+
+
+def cached_request(func: Callable) -> Callable:
+    """Serves GET requests from the client's response cache, if it has one.
+
+    Streamed requests are not cached so their responses are never held in memory."""
+
+    def wrapper(*args, **kwargs):
+        cache = args[0].cache
+        if cache is None or kwargs.get("stream") or not cache.cacheable(args[1]):
+            return func(*args, **kwargs)
+
+        params = kwargs.get("params")
+        cached = cache.get(args[1], params)
+        if cached is not None and cache.fresh(cached):
+            cache.record(hit=True)
+            return cached.response()
+        if cached is not None:
+            kwargs["headers"] = {**(kwargs.get("headers") or {}), **cached.validators()}
+
+        resp = func(*args, **kwargs)
+        if cached is not None and resp.status_code == 304:
+            cache.record(hit=True)
+            return cached.response()
+        cache.record(hit=False)
+        cache.put(args[1], params, resp)
+        return resp
+
+    return wrapper
+
 
 def request_with_retry(func: Callable) -> Callable:
     def wrapper(*args, **kwargs):
         retry = True
-        default_backoff = 5
         retry_count = 0
+        sleep_duration = 0.0
         timeout = time.time() + args[0].retry_timeout
         resp = None
 
+        method, endpoint = func.__name__.upper(), endpoint_key(func.__name__.upper(), args[1])
+        args[0].retry_budget.deposit()
         while retry and timeout > time.time():
             try:
-                resp = func(*args, **kwargs)
+                args[0].circuit_breaker.check(endpoint)
+                time.sleep(pacing_delay(args[0].rate_limiter, method, args[1], timeout))
+                sent = time.monotonic()
+                resp = _limited_request(args[0].limiter, func, *args, **kwargs)
+                args[0].rate_limiter.update(method, args[1], resp, sent)
+                args[0].circuit_breaker.record(endpoint, resp)
                 resp.raise_for_status()
                 retry = False
             except requests.exceptions.HTTPError as e:
-                status_code = e.response.status_code
-                if status_code == 429 and "x-ratelimit-reset" in e.response.headers:
-                    try:
-                        sleep_duration = int(e.response.headers["x-ratelimit-reset"])
-                    except ValueError:
-                        sleep_duration = retry_count * default_backoff
-                        retry_count += 1
-                    if (sleep_duration + time.time()) > timeout:
-                        log.debug("retry timeout has or will exceed timeout duration")
-                        raise CustomClientHTTPError(e.response)
-                    time.sleep(sleep_duration)
-                    continue
-                elif status_code >= 500 or status_code == 429:
-                    sleep_duration = retry_count * default_backoff
-                    if (sleep_duration + time.time()) > timeout:
-                        log.debug("retry timeout has or will exceed timeout duration")
-                        raise CustomClientHTTPError(e.response)
-                    time.sleep(retry_count * default_backoff)
-                    retry_count += 1
-                    continue
-                raise CustomClientHTTPError(e.response)
+                # Read the error so a streamed response releases its connection
+                e.response.content
+                sleep_duration, retry_count = retry_sleep(args[0], e.response, retry_count, timeout, sleep_duration)
+                time.sleep(sleep_duration)
         return resp
 
     return wrapper
 
 
+def async_request_with_retry(func: Callable) -> Callable:
+    async def wrapper(*args, **kwargs):
+        retry = True
+        retry_count = 0
+        sleep_duration = 0.0
+        timeout = time.time() + args[0].retry_timeout
+        resp = None
+
+        method, endpoint = func.__name__.upper(), endpoint_key(func.__name__.upper(), args[1])
+        args[0].retry_budget.deposit()
+        while retry and timeout > time.time():
+            try:
+                args[0].circuit_breaker.check(endpoint)
+                await asyncio.sleep(pacing_delay(args[0].rate_limiter, method, args[1], timeout))
+                sent = time.monotonic()
+                resp = await _async_limited_request(args[0].limiter, func, *args, **kwargs)
+                args[0].rate_limiter.update(method, args[1], resp, sent)
+                args[0].circuit_breaker.record(endpoint, resp)
+                resp.raise_for_status()
+                retry = False
+            except requests.exceptions.HTTPError as e:
+                sleep_duration, retry_count = retry_sleep(args[0], e.response, retry_count, timeout, sleep_duration)
+                await asyncio.sleep(sleep_duration)
+        return resp
+
+    return wrapper
+
+
+def retry_sleep(
+    client: Any, response: Any, retry_count: int, timeout: float, previous_sleep: float
+) -> Tuple[float, int]:
+    """Returns the duration to sleep before retrying and the updated retry count, if the client's budget allows it.
+
+    Retries of 429s are not taken from the retry budget, they are paced by the rate limit reset instead."""
+    sleep_duration, retry_count = retry_backoff(response, retry_count, timeout, previous_sleep)
+    if response.status_code != 429 and not client.retry_budget.withdraw():
+        log.debug("retry budget exhausted")
+        raise CustomClientHTTPError(response)
+    return sleep_duration, retry_count
+
+
+def pacing_delay(rate_limiter: RateLimiter, method: str, path: str, timeout: float) -> float:
+    """Returns the duration to wait for the rate limit of an endpoint, bounded by the retry timeout.
+
+    A request which cannot be paced within the retry timeout is sent right away and its 429 handled by
+    `retry_backoff`."""
+    delay = rate_limiter.reserve(method, path)
+    return max(0.0, min(delay, timeout - time.time()))
+
+
+def _limited_request(limiter: Optional[AdaptiveLimiter], func: Callable, *args, **kwargs) -> Any:
+    if limiter is None:
+        return func(*args, **kwargs)
+
+    started = limiter.acquire()
+    try:
+        resp = func(*args, **kwargs)
+    finally:
+        limiter.release()
+    limiter.observe(started, resp.status_code, time.monotonic() - started)
+    return resp
+
+
+async def _async_limited_request(limiter: Optional[AdaptiveLimiter], func: Callable, *args, **kwargs) -> Any:
+    if limiter is None:
+        return await func(*args, **kwargs)
+
+    started = await limiter.acquire_async()
+    try:
+        resp = await func(*args, **kwargs)
+    finally:
+        limiter.release()
+    limiter.observe(started, resp.status_code, time.monotonic() - started)
+    return resp
+
+
+def retry_backoff(response: Any, retry_count: int, timeout: float, previous_sleep: float = 0.0) -> Tuple[float, int]:
+    """Returns the duration to sleep before retrying and the updated retry count.
+
+    429s wait for the rate limit reset and responses with a `Retry-After` header for the requested
+    duration. Other retries use decorrelated jittered exponential backoff, so the workers retrying a
+    failing endpoint do not retry in lockstep.
+
+    Raises CustomClientHTTPError if the response should not be retried."""
+    status_code = response.status_code
+    if status_code != 429 and status_code < 500:
+        raise CustomClientHTTPError(response)
+
+    sleep_duration = None
+    if status_code == 429 and "x-ratelimit-reset" in response.headers:
+        try:
+            sleep_duration = float(int(response.headers["x-ratelimit-reset"]))
+        except ValueError:
+            pass
+    if sleep_duration is None:
+        sleep_duration = retry_after(response.headers)
+    if sleep_duration is None:
+        sleep_duration = min(BACKOFF_CAP, random.uniform(BACKOFF_BASE, max(BACKOFF_BASE, previous_sleep) * 3))
+
+    if (sleep_duration + time.time()) > timeout:
+        log.debug("retry timeout has or will exceed timeout duration")
+        raise CustomClientHTTPError(response)
+    return sleep_duration, retry_count + 1
+
+
+def retry_after(headers: Any) -> Optional[float]:
+    """Returns the duration requested by a `Retry-After` header, in seconds or as an HTTP date."""
+    value = headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, (parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
 class CustomClient:
-    def __init__(self, host: Optional[str], auth: Dict[str, str], retry_timeout: int, timeout: int) -> None:
+    def __init__(
+        self,
+        host: Optional[str],
+        auth: Dict[str, str],
+        retry_timeout: int,
+        timeout: int,
+        max_concurrency: Optional[int] = None,
+        page_concurrency: int = 1,
+        initial_concurrency: Optional[int] = None,
+    ) -> None:
         self.host = host
         self.timeout = timeout
         self.session = requests.Session()
         self.retry_timeout = retry_timeout
         self.session.headers.update(build_default_headers(auth))
+        # Keep a connection per worker alive. Requests beyond the pool size wait for a connection
+        # instead of opening one which is discarded once done.
+        adapter = HTTPAdapter(pool_maxsize=max_concurrency or DEFAULT_POOLSIZE, pool_block=True)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.default_pagination = PaginationConfig()
+        self.limiter = (
+            AdaptiveLimiter(initial_concurrency or max_concurrency, max_concurrency) if max_concurrency else None
+        )
+        self.rate_limiter = RateLimiter()
+        self.retry_budget = RetryBudget()
+        self.circuit_breaker = CircuitBreaker()
+        self.page_concurrency = page_concurrency
+        self._page_executor_pool: Optional[ThreadPoolExecutor] = None
+        self._page_executor_lock = Lock()
+        self.cache: Optional[ResponseCache] = None
+        self.single_flight = SingleFlight()
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns the request metrics of the client."""
+        stats = self.limiter.stats() if self.limiter is not None else {}
+        stats.update(self.rate_limiter.stats())
+        stats.update(self.retry_budget.stats())
+        stats.update(self.circuit_breaker.stats())
+        stats.update(self.single_flight.stats())
+        if self.cache is not None:
+            stats.update(self.cache.stats())
+        return stats
 
+    def connection_stats(self) -> Dict[str, int]:
+        """Returns the number of connections opened and the number of requests sent on an open connection."""
+        opened = sent = 0
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+                    sent += pool.num_requests
+        return {"new_connections": opened, "reused_connections": max(0, sent - opened)}
+
+    @single_flight_request
+    @cached_request
     @request_with_retry
     def get(self, path, **kwargs):
         url = self.host + path
@@ -90,38 +314,54 @@ class CustomClient:
         url = self.host + path
         return self.session.delete(url, json=body, timeout=self.timeout, **kwargs)
 
+    def get_items(self, path: str, key: Optional[str] = None, **kwargs) -> Iterator[Any]:
+        """Yields the items of a list endpoint as the response is received, without holding the whole response.
+
+        The list is either the response itself or, if `key` is given, the value of `key` in the response."""
+        resp = self.get(path, stream=True, **kwargs)
+        try:
+            yield from iter_json_items(resp.iter_content(chunk_size=STREAM_CHUNK_SIZE), key)
+        finally:
+            resp.close()
+
     def paginated_request(self, func: Callable) -> Callable:
         def wrapper(*args, **kwargs):
             pagination_config = kwargs.pop("pagination_config", self.default_pagination)
-
             page_size = pagination_config.page_size
-            page_number = pagination_config.page_number
-            remaining = 1
-            resources = []
-            kwargs["params"] = kwargs.get("params", {}) or {}
-            idx = 0
-            while remaining > 0:
+            base_params = kwargs.pop("params", None) or {}
+
+            def fetch_page(page_number: int) -> Dict:
                 params = {
+                    **base_params,
                     pagination_config.page_size_param: page_size,
                     pagination_config.page_number_param: page_number,
                 }
-                kwargs["params"].update(params)
-
-                resp = func(*args, **kwargs)
+                resp = func(*args, params=params, **kwargs)
                 resp.raise_for_status()
+                return resp.json()
+
+            resources = []
+            pages = [(0, pagination_config.page_number)]
+            while pages:
+                if len(pages) == 1 or self.page_concurrency < 2:
+                    responses = [fetch_page(page_number) for _, page_number in pages]
+                else:
+                    responses = list(self._page_executor().map(fetch_page, [page_number for _, page_number in pages]))
+                for resp_json in responses:
+                    resources.extend(resp_json["data"])
 
-                resp_json = resp.json()
-                resources.extend(resp_json["data"])
-                if len(resp_json["data"]) < page_size:
-                    remaining = 0
-                    continue
-                remaining = pagination_config.remaining_func(idx, resp_json, page_size, page_number)
-                page_number = pagination_config.page_number_func(idx, page_size, page_number)
-                idx += 1
+                idx, page_number = pages[-1]
+                pages = next_pages(pagination_config, idx, page_number, responses[-1])
             return resources
 
         return wrapper
 
+    def _page_executor(self) -> ThreadPoolExecutor:
+        with self._page_executor_lock:
+            if self._page_executor_pool is None:
+                self._page_executor_pool = thread_pool_executor(self.page_concurrency)
+            return self._page_executor_pool
+
 
 def build_default_headers(auth_obj: Dict[str, str]) -> Dict[str, str]:
     headers = {
@@ -154,3 +394,27 @@ class PaginationConfig(object):
         resp["meta"]["page"]["total_count"]
     ) - (page_size * (page_number + 1))
     page_number_func: Optional[Callable] = lambda idx, page_size, page_number: page_number + 1
+
+
+def next_pages(pagination_config: PaginationConfig, idx: int, page_number: int, resp_json: Dict) -> List[Tuple]:
+    """Returns the (idx, page_number) of the pages to request after the page `idx` of a paginated request.
+
+    Once the response tells the total count, all the remaining pages are returned so they can be requested
+    concurrently. If resources were created in the meantime, the last of them is full and pagination resumes
+    from it.
+    """
+    if len(resp_json["data"]) < pagination_config.page_size:
+        return []
+    remaining = pagination_config.remaining_func(idx, resp_json, pagination_config.page_size, page_number)
+    if remaining <= 0:
+        return []
+
+    count = 1
+    if resp_json.get("meta", {}).get("page", {}).get("total_count") is not None:
+        count = math.ceil(remaining / pagination_config.page_size)
+    pages = []
+    for _ in range(count):
+        page_number = pagination_config.page_number_func(idx, pagination_config.page_size, page_number)
+        idx += 1
+        pages.append((idx, page_number))
+    return pages
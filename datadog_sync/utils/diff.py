@@ -0,0 +1,323 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import re
+from functools import lru_cache
+from numbers import Number
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Pattern, Tuple
+
+
+# Report types, named after the DeepDiff ones
+VALUES_CHANGED = "values_changed"
+TYPE_CHANGES = "type_changes"
+DICTIONARY_ITEM_ADDED = "dictionary_item_added"
+DICTIONARY_ITEM_REMOVED = "dictionary_item_removed"
+ITERABLE_ITEM_ADDED = "iterable_item_added"
+ITERABLE_ITEM_REMOVED = "iterable_item_removed"
+
+# Removed and added list items are diffed against each other rather than reported as removed and added
+# when they are closer than CUTOFF_DISTANCE, unless more than CUTOFF_INTERSECTION of the list changed.
+CUTOFF_DISTANCE = 0.3
+CUTOFF_INTERSECTION = 0.7
+
+_PATH_KEY_RE = re.compile(r"\['(.*?)'\]")
+_EXCLUDED = None  # leaf of the exclusion trie
+
+
+class DiffRules:
+    """Exclusion rules of a resource type, compiled once.
+
+    `excluded_paths` are `root['key']...` paths excluded from the diff, as built by
+    `ResourceConfig.build_excluded_attributes`. Paths matching any of the `excluded_re` regexes are
+    excluded too.
+    """
+
+    def __init__(self, excluded_paths: Iterable[str] = (), excluded_re: Iterable[str] = ()) -> None:
+        # Nested dict of the excluded keys. Excluded paths only go through dict keys, so the trie
+        # is only followed until the first list.
+        self.trie: Optional[Dict] = {}
+        for path in excluded_paths:
+            node = self.trie
+            keys = _PATH_KEY_RE.findall(path)
+            for key in keys[:-1]:
+                node = node.setdefault(key, {})
+                if node is _EXCLUDED:
+                    break
+            else:
+                if keys:
+                    node[keys[-1]] = _EXCLUDED
+        excluded_re = list(excluded_re)
+        self.regex: Optional[Pattern] = re.compile("|".join(f"(?:{r})" for r in excluded_re)) if excluded_re else None
+
+
+@lru_cache(maxsize=None)
+def compile_rules(excluded_paths: Tuple[str, ...], excluded_re: Tuple[str, ...]) -> DiffRules:
+    return DiffRules(excluded_paths, excluded_re)
+
+
+def diff(t1: Any, t2: Any, rules: Optional[DiffRules] = None) -> Dict[str, Any]:
+    """Returns the changes from t1 to t2, ignoring the order of lists.
+
+    The result is a plain dict in the format of DeepDiff's text view with `ignore_order=True`: changed
+    values are reported under `values_changed` and `type_changes` by path, added and removed dict keys
+    as lists of paths, and added and removed list items by path. Identical subtrees are skipped without
+    being diffed. Values which are equal but of different types, such as True, 1 and 1.0, are type changes.
+    """
+    differ = _Differ(rules or DiffRules())
+    differ.diff(t1, t2, "root", differ.rules.trie)
+    return differ.finish()
+
+
+class _Differ:
+    def __init__(self, rules: DiffRules) -> None:
+        self.rules = rules
+        self.result: Dict[str, Any] = {}
+        self.dict_items: Dict[str, Any] = {}  # values of the added and removed dict keys, by path
+
+    def diff(self, t1: Any, t2: Any, path: str, trie: Optional[Dict]) -> None:
+        if t1.__class__ is not t2.__class__:
+            self.result.setdefault(TYPE_CHANGES, {})[path] = {
+                "old_type": type(t1),
+                "new_type": type(t2),
+                "old_value": t1,
+                "new_value": t2,
+            }
+        elif isinstance(t1, dict):
+            self.diff_dict(t1, t2, path, trie)
+        elif isinstance(t1, list):
+            self.diff_list(t1, t2, path)
+        elif t1 != t2:
+            self.result.setdefault(VALUES_CHANGED, {})[path] = {"new_value": t2, "old_value": t1}
+
+    def diff_dict(self, t1: Dict, t2: Dict, path: str, trie: Optional[Dict]) -> None:
+        for key, v1 in t1.items():
+            if key in t2:
+                v2 = t2[key]
+                if v1 is v2 or _strict_equal(v1, v2):
+                    continue
+                child_path, child_trie = self.child(path, key, trie)
+                if child_path is not None:
+                    self.diff(v1, v2, child_path, child_trie)
+            else:
+                child_path, _ = self.child(path, key, trie)
+                if child_path is not None:
+                    self.result.setdefault(DICTIONARY_ITEM_REMOVED, []).append(child_path)
+                    self.dict_items[child_path] = v1
+        for key, v2 in t2.items():
+            if key not in t1:
+                child_path, _ = self.child(path, key, trie)
+                if child_path is not None:
+                    self.result.setdefault(DICTIONARY_ITEM_ADDED, []).append(child_path)
+                    self.dict_items[child_path] = v2
+
+    def diff_list(self, t1: List, t2: List, path: str) -> None:
+        if _strict_equal(t1, t2):
+            return
+
+        # First index of every distinct item. Repeated items are ignored, like DeepDiff does by default.
+        indexes1: Dict[Hashable, int] = {}
+        for i, item in enumerate(t1):
+            indexes1.setdefault(self.key(item, path, i), i)
+        indexes2: Dict[Hashable, int] = {}
+        for i, item in enumerate(t2):
+            indexes2.setdefault(self.key(item, path, i), i)
+        added = [key for key in indexes2 if key not in indexes1]
+        removed = [key for key in indexes1 if key not in indexes2]
+        if not added and not removed:
+            return
+
+        pairs: Dict[Hashable, Hashable] = {}
+        if (
+            added
+            and removed
+            and (len(added) + len(removed)) / (len(indexes1) + len(indexes2) + 1) <= CUTOFF_INTERSECTION
+        ):
+            pairs = self.pairs(t1, t2, path, indexes1, indexes2, added, removed)
+
+        paired = set(pairs.values())
+        for key in added:
+            if key in pairs:
+                i = indexes1[pairs[key]]
+                self.diff(t1[i], t2[indexes2[key]], f"{path}[{i}]", None)
+            else:
+                self.report_item(ITERABLE_ITEM_ADDED, f"{path}[{indexes2[key]}]", t2[indexes2[key]])
+        for key in removed:
+            if key not in paired:
+                self.report_item(ITERABLE_ITEM_REMOVED, f"{path}[{indexes1[key]}]", t1[indexes1[key]])
+
+    def pairs(
+        self,
+        t1: List,
+        t2: List,
+        path: str,
+        indexes1: Dict[Hashable, int],
+        indexes2: Dict[Hashable, int],
+        added: List[Hashable],
+        removed: List[Hashable],
+    ) -> Dict[Hashable, Hashable]:
+        """Pairs the closest added and removed items, closest pairs first."""
+        candidates = []
+        for added_order, added_key in enumerate(added):
+            item2 = t2[indexes2[added_key]]
+            for removed_order, removed_key in enumerate(removed):
+                i = indexes1[removed_key]
+                distance = self.distance(t1[i], item2, f"{path}[{i}]")
+                if distance < CUTOFF_DISTANCE:
+                    candidates.append((distance, added_order, removed_order))
+
+        pairs: Dict[Hashable, Hashable] = {}
+        used_removed = set()
+        for _, added_order, removed_order in sorted(candidates):
+            if added[added_order] in pairs or removed_order in used_removed:
+                continue
+            pairs[added[added_order]] = removed[removed_order]
+            used_removed.add(removed_order)
+        return pairs
+
+    def distance(self, t1: Any, t2: Any, path: str) -> float:
+        """Rough distance between 0 and 1 of two list items: the size of their diff over their sizes."""
+        if isinstance(t1, Number) and isinstance(t2, Number):
+            return _numbers_distance(t1, t2)
+
+        differ = _Differ(self.rules)
+        differ.diff(t1, t2, path, None)
+        length = 0
+        for report_type, changes in differ.finish().items():
+            if report_type in (DICTIONARY_ITEM_ADDED, DICTIONARY_ITEM_REMOVED):
+                # The added and removed values count, not their paths
+                length += sum(_item_length(differ.dict_items[change_path]) for change_path in changes)
+            elif report_type == VALUES_CHANGED:
+                length += sum(_item_length(change["new_value"]) for change in changes.values())
+            elif report_type == TYPE_CHANGES:
+                # Old and new types, and the new value unless it is the old one converted to the new type
+                length += sum(2 + _type_change_length(change) for change in changes.values())
+            else:
+                length += sum(_item_length(item) for item in changes.values())
+        if not length:
+            return 0
+        return length / (_rough_length(t1) + _rough_length(t2))
+
+    def child(self, path: str, key: Any, trie: Optional[Dict]) -> Tuple[Optional[str], Optional[Dict]]:
+        """Returns the path and the exclusion trie of a dict key, or a None path if the key is excluded."""
+        child_trie = None
+        if trie is not None and key in trie:
+            child_trie = trie[key]
+            if child_trie is _EXCLUDED:
+                return None, None
+        child_path = f"{path}['{key}']" if isinstance(key, str) else f"{path}[{key}]"
+        if self.rules.regex is not None and self.rules.regex.search(child_path):
+            return None, None
+        return child_path, child_trie
+
+    def key(self, item: Any, path: str, i: int) -> Hashable:
+        """Hashable key of a list item, equal for items without differences."""
+        if self.rules.regex is None:
+            return _key(item)
+        return self.excluded_key(item, f"{path}[{i}]")
+
+    def excluded_key(self, item: Any, path: str) -> Hashable:
+        regex = self.rules.regex
+        if isinstance(item, dict):
+            entries = []
+            for k, v in item.items():
+                child_path = f"{path}['{k}']" if isinstance(k, str) else f"{path}[{k}]"
+                if not regex.search(child_path):
+                    entries.append((k, self.excluded_key(v, child_path)))
+            return (dict, frozenset(entries))
+        if isinstance(item, list):
+            return (list, frozenset(self.excluded_key(v, f"{path}[{i}]") for i, v in enumerate(item)))
+        return _scalar_key(item)
+
+    def report_item(self, report_type: str, path: str, item: Any) -> None:
+        if self.rules.regex is not None and self.rules.regex.search(path):
+            return
+        self.result.setdefault(report_type, {})[path] = item
+
+    def finish(self) -> Dict[str, Any]:
+        # A list item removed and another one added at the same index is a changed value
+        added = self.result.get(ITERABLE_ITEM_ADDED, {})
+        removed = self.result.get(ITERABLE_ITEM_REMOVED, {})
+        for path in [path for path in added if path in removed]:
+            self.result.setdefault(VALUES_CHANGED, {})[path] = {
+                "new_value": added.pop(path),
+                "old_value": removed.pop(path),
+            }
+        for report_type in (ITERABLE_ITEM_ADDED, ITERABLE_ITEM_REMOVED):
+            if report_type in self.result and not self.result[report_type]:
+                del self.result[report_type]
+        return self.result
+
+
+def _strict_equal(t1: Any, t2: Any) -> bool:
+    """`==` telling apart equal values of different types, such as 0 and False, at any depth."""
+    if t1 != t2:
+        return False
+    return _same_types(t1, t2)
+
+
+def _same_types(t1: Any, t2: Any) -> bool:
+    # Only called on equal values, so dicts have the same keys and lists the same length
+    if t1.__class__ is not t2.__class__:
+        return False
+    if isinstance(t1, dict):
+        return all(_same_types(v, t2[k]) for k, v in t1.items())
+    if isinstance(t1, list):
+        return all(_same_types(v1, v2) for v1, v2 in zip(t1, t2))
+    return True
+
+
+def _key(item: Any) -> Hashable:
+    if isinstance(item, dict):
+        return (dict, frozenset((k, _key(v)) for k, v in item.items()))
+    if isinstance(item, list):
+        return (list, frozenset(_key(v) for v in item))
+    return _scalar_key(item)
+
+
+def _scalar_key(item: Any) -> Hashable:
+    # True and 1 are equal and hash the same, but they are different values. Like DeepDiff, list items
+    # which are equal ints and floats are the same item.
+    if item.__class__ is bool:
+        return (bool, item)
+    return item
+
+
+def _numbers_distance(n1: Number, n2: Number) -> float:
+    if n1 == n2:
+        return 0
+    divisor = (n1 + n2) / CUTOFF_DISTANCE
+    if divisor == 0:
+        return CUTOFF_DISTANCE
+    return min(CUTOFF_DISTANCE, abs((n1 - n2) / divisor))
+
+
+def _item_length(item: Any) -> int:
+    """Number of values making up a reported value."""
+    if isinstance(item, dict):
+        return sum(_item_length(v) for v in item.values())
+    if isinstance(item, list):
+        return sum(_item_length(v) for v in item)
+    if item is None:
+        return 0
+    return 1
+
+
+def _type_change_length(change: Dict[str, Any]) -> int:
+    try:
+        if change["new_type"](change["old_value"]) == change["new_value"]:
+            return 0
+    except Exception:
+        pass
+    return _item_length(change["new_value"])
+
+
+def _rough_length(item: Any) -> int:
+    """Number of nodes making up a value, keys included."""
+    if isinstance(item, dict):
+        return 1 + sum(1 + _rough_length(v) for v in item.values())
+    if isinstance(item, list):
+        return 1 + sum(_rough_length(v) for v in item)
+    return 1
@@ -0,0 +1,141 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+from concurrent.futures import Executor
+from threading import Lock
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+from datadog_sync._version import __version__
+from datadog_sync.constants import FINGERPRINTS_FILE_PATH, LOGGER_NAME
+
+if TYPE_CHECKING:
+    from datadog_sync.utils.configuration import Configuration
+
+
+FINGERPRINTS_VERSION = 1
+# Resources hashed per process pool task
+FINGERPRINT_CHUNK_SIZE = 500
+# Starting a process pool takes longer than hashing fewer resources in the main process
+FINGERPRINT_POOL_MIN_RESOURCES = 10000
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+def fingerprint(obj: Any) -> Optional[str]:
+    """Returns the hash of the canonical JSON encoding of obj."""
+    if obj is None:
+        return None
+    encoded = json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def fingerprint_task(items: List[Tuple[str, Any, Any]]) -> List[Tuple[str, Optional[str], Optional[str]]]:
+    """Process pool task hashing (id, source, destination) triples."""
+    return [(_id, fingerprint(source), fingerprint(destination)) for _id, source, destination in items]
+
+
+class FingerprintStore:
+    """Hashes of the source resources and their destination objects at the time of their last successful sync.
+
+    A resource whose source and destination objects both hash to the fingerprints stored by the last
+    sync is unchanged since then, and syncing it again would not change anything. The store is only
+    reused with the options and version of datadog-sync it was written with.
+    """
+
+    def __init__(self, config: Configuration, path: str = FINGERPRINTS_FILE_PATH) -> None:
+        self.path = path
+        self.inputs = fingerprint(
+            {
+                "version": __version__,
+                "destination": config.destination_client.host,
+                "skip_failed_resource_connections": config.skip_failed_resource_connections,
+            }
+        )
+        self.stored: Dict[str, Dict[str, List[Optional[str]]]] = {}  # [source, destination] per type and ID
+        self.current: Dict[str, Dict[str, Tuple[Optional[str], Optional[str]]]] = {}
+        self._lock = Lock()
+
+    def load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            log.warning(f"invalid fingerprints file {self.path}. Discarding: {e}")
+            return
+
+        if data.get("version") != FINGERPRINTS_VERSION or data.get("inputs") != self.inputs:
+            log.info("fingerprints were stored by a different version or with different options. Discarding them")
+            return
+        self.stored = data["resources"]
+
+    def compute(self, config: Configuration, resources: Dict[str, str], executor: Optional[Executor] = None) -> None:
+        """Hashes the current source and destination objects of the resources to sync.
+
+        The resources are hashed in chunks in the process pool, if one is given and there is more than one chunk.
+        """
+        chunks: List[Tuple[str, List[Tuple[str, Any, Any]]]] = []
+        items_by_type: Dict[str, List[Tuple[str, Any, Any]]] = {}
+        for _id, resource_type in resources.items():
+            resource_config = config.resources[resource_type].resource_config
+            items = items_by_type.setdefault(resource_type, [])
+            items.append((_id, resource_config.source_resources[_id], resource_config.destination_resources.get(_id)))
+            if len(items) == FINGERPRINT_CHUNK_SIZE:
+                chunks.append((resource_type, items))
+                items_by_type[resource_type] = []
+        chunks.extend((resource_type, items) for resource_type, items in items_by_type.items() if items)
+
+        if executor is not None and len(chunks) > 1:
+            results = executor.map(fingerprint_task, [items for _, items in chunks])
+        else:
+            results = map(fingerprint_task, [items for _, items in chunks])
+        for (resource_type, _), hashes in zip(chunks, results):
+            current = self.current.setdefault(resource_type, {})
+            for _id, source, destination in hashes:
+                current[_id] = (source, destination)
+
+    def unchanged(self, resource_type: str, _id: str) -> bool:
+        current = self.current.get(resource_type, {}).get(_id)
+        if current is None or current[1] is None:
+            return False
+        return self.stored.get(resource_type, {}).get(_id) == list(current)
+
+    def record(self, resource_type: str, _id: str, destination: Optional[Dict]) -> None:
+        """Stores the fingerprints of a successfully synced resource and its resulting destination object."""
+        source = self.current.get(resource_type, {}).get(_id, (None, None))[0]
+        destination_fingerprint = fingerprint(destination)
+        with self._lock:
+            if source is None or destination_fingerprint is None:
+                self.stored.get(resource_type, {}).pop(_id, None)
+            else:
+                self.stored.setdefault(resource_type, {})[_id] = [source, destination_fingerprint]
+
+    def discard(self, resource_type: str, _id: str) -> None:
+        with self._lock:
+            self.stored.get(resource_type, {}).pop(_id, None)
+
+    def write(self, config: Configuration, resource_types: Iterable[str]) -> None:
+        """Writes the store, dropping the resources of the given types which are not in the destination anymore."""
+        with self._lock:
+            for resource_type in resource_types:
+                destination_resources = config.resources[resource_type].resource_config.destination_resources
+                stored = self.stored.get(resource_type, {})
+                for _id in [_id for _id in stored if _id not in destination_resources]:
+                    del stored[_id]
+            data = {"version": FINGERPRINTS_VERSION, "inputs": self.inputs, "resources": self.stored}
+
+            tmp_path = f"{self.path}.tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                log.warning(f"failed to write fingerprints file {self.path}: {e}")
@@ -0,0 +1,175 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from urllib.parse import urlencode
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from datadog_sync.constants import LOGGER_NAME, VALIDATE_ENDPOINT
+
+
+# Response headers kept with the cached body
+CACHED_HEADERS = ("content-type", "etag", "last-modified")
+# GET requests which do not import resources, such as the validation of the credentials, are always sent
+UNCACHED_PATHS = (VALIDATE_ENDPOINT,)
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class CachedResponse:
+    """Response body and validators of a cached GET request."""
+
+    def __init__(self, url: str, headers: Dict[str, str], content: bytes, stored_at: float) -> None:
+        self.url = url
+        self.headers = headers
+        self.content = content
+        self.stored_at = stored_at
+
+    def validators(self) -> Dict[str, str]:
+        """Returns the headers making a request conditional on the cached response being outdated."""
+        headers = {}
+        if self.headers.get("etag"):
+            headers["If-None-Match"] = self.headers["etag"]
+        if self.headers.get("last-modified"):
+            headers["If-Modified-Since"] = self.headers["last-modified"]
+        return headers
+
+    def response(self) -> requests.Response:
+        resp = requests.Response()
+        resp.status_code = 200
+        resp.reason = "OK"
+        resp.url = self.url
+        resp.headers = CaseInsensitiveDict(self.headers)
+        resp._content = self.content
+        return resp
+
+
+class ResponseCache:
+    """Persistent cache of GET responses, with one file per request.
+
+    Responses carrying an `ETag` or `Last-Modified` header are revalidated with a conditional request
+    and reused when the API answers 304. Other responses are reused for `ttl` seconds. The least
+    recently used responses are evicted once the cache holds more than `max_size` bytes.
+    """
+
+    def __init__(self, directory: str, namespace: str, ttl: float, max_size: int) -> None:
+        self.directory = directory
+        self.namespace = namespace
+        self.ttl = ttl
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: OrderedDict[str, int] = OrderedDict()  # size of the cached files, least recently used first
+        self._size = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if name.endswith(".tmp"):
+                os.remove(path)
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._size += size
+
+    def get(self, path: str, params: Optional[Dict[str, Any]]) -> Optional[CachedResponse]:
+        name = self._name(path, params)
+        with self._lock:
+            if name not in self._entries:
+                return None
+            self._entries.move_to_end(name)
+
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                meta = json.loads(f.readline())
+                content = f.read()
+            os.utime(os.path.join(self.directory, name))
+        except (OSError, ValueError):
+            self._discard(name)
+            return None
+        return CachedResponse(meta["url"], meta["headers"], content, meta["stored_at"])
+
+    def cacheable(self, path: str) -> bool:
+        return path.split("?", 1)[0] not in UNCACHED_PATHS
+
+    def fresh(self, cached: CachedResponse) -> bool:
+        """Returns True if the response can be reused without revalidating it."""
+        return not cached.validators() and time.time() - cached.stored_at < self.ttl
+
+    def put(self, path: str, params: Optional[Dict[str, Any]], resp: Any) -> None:
+        if resp.status_code != 200:
+            return
+
+        name = self._name(path, params)
+        headers = {h: resp.headers[h] for h in CACHED_HEADERS if resp.headers.get(h)}
+        if not headers.get("etag") and not headers.get("last-modified") and self.ttl <= 0:
+            return
+        meta = {"url": str(resp.url), "headers": headers, "stored_at": time.time()}
+        data = json.dumps(meta).encode("utf-8") + b"\n" + resp.content
+        if len(data) > self.max_size:
+            return
+
+        path = os.path.join(self.directory, name)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            log.warning(f"failed to cache response of {meta['url']}: {e}")
+            return
+
+        with self._lock:
+            self._size += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            evicted = []
+            while self._size > self.max_size:
+                evicted_name, size = self._entries.popitem(last=False)
+                self._size -= size
+                evicted.append(evicted_name)
+            self.evictions += len(evicted)
+        for evicted_name in evicted:
+            try:
+                os.remove(os.path.join(self.directory, evicted_name))
+            except OSError:
+                pass
+
+    def record(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"cache_hits": self.hits, "cache_misses": self.misses, "cache_evictions": self.evictions}
+
+    def _discard(self, name: str) -> None:
+        with self._lock:
+            self._size -= self._entries.pop(name, 0)
+        try:
+            os.remove(os.path.join(self.directory, name))
+        except OSError:
+            pass
+
+    def _name(self, path: str, params: Optional[Dict[str, Any]]) -> str:
+        query = urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{self.namespace} GET {path}?{query}".encode("utf-8")).hexdigest()
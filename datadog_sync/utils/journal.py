@@ -0,0 +1,97 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import json
+import logging
+import os
+from threading import Lock
+from typing import TYPE_CHECKING, Dict, IO, Optional, Set
+
+from datadog_sync.constants import JOURNAL_FILE_PATH, LOGGER_NAME
+
+if TYPE_CHECKING:
+    from datadog_sync.utils.configuration import Configuration
+
+
+# Journal operations
+JOURNAL_CREATE = "create"
+JOURNAL_UPDATE = "update"
+JOURNAL_DELETE = "delete"
+JOURNAL_UNCHANGED = "unchanged"
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class Journal:
+    """Append-only record of the operations applied to the destination org.
+
+    Destination state files are only written once a sync finishes. Every completed create, update and
+    delete is appended to the journal as it happens, so the destination state of an interrupted sync
+    can be recovered on the next start. The journal is removed once the destination state is written.
+    """
+
+    def __init__(self, path: str = JOURNAL_FILE_PATH) -> None:
+        self.path = path
+        self.completed: Set[str] = set()  # resources completed by previous, interrupted runs
+        self.resource_types: Set[str] = set()  # resource types with replayed entries
+        self._lock = Lock()
+        self._file: Optional[IO] = None
+
+    def replay(self, config: Configuration) -> None:
+        """Applies the journal of interrupted runs to the destination state."""
+        if not os.path.exists(self.path):
+            return
+
+        replayed = 0
+        with open(self.path, "r") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.decoder.JSONDecodeError:
+                    # The last entry may be truncated if the process was killed while writing it
+                    log.warning(f"invalid journal entry in {self.path}. Discarding: {line.strip()}")
+                    continue
+                if entry["type"] not in config.resources:
+                    continue
+
+                destination_resources = config.resources[entry["type"]].resource_config.destination_resources
+                if entry["op"] in (JOURNAL_CREATE, JOURNAL_UPDATE):
+                    destination_resources[entry["id"]] = entry["resource"]
+                elif entry["op"] == JOURNAL_DELETE:
+                    destination_resources.pop(entry["id"], None)
+                self.completed.add(entry["id"])
+                self.resource_types.add(entry["type"])
+                replayed += 1
+
+        if replayed:
+            log.info(f"replayed {replayed} entries from the journal of an interrupted run")
+
+    def open(self) -> None:
+        self._file = open(self.path, "a")
+
+    def record(self, op: str, resource_type: str, _id: str, resource: Optional[Dict] = None) -> None:
+        entry = {"op": op, "type": resource_type, "id": _id}
+        if resource is not None:
+            entry["resource"] = resource
+
+        line = json.dumps(entry) + "\n"
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(line)
+            # Flush every entry so it survives the process being killed
+            self._file.flush()
+
+    def remove(self) -> None:
+        """Closes and removes the journal once the destination state it records is written."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        self.completed.clear()
+        self.resource_types.clear()
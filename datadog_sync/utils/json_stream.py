@@ -0,0 +1,104 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import codecs
+import json
+import re
+from typing import Any, Iterable, Iterator, Optional
+
+
+WHITESPACE = re.compile(r"\s*")
+NUMBER_CHARS = "0123456789.eE+-"
+
+
+def iter_json_items(chunks: Iterable[bytes], key: Optional[str] = None) -> Iterator[Any]:
+    """Yields the items of a JSON array as the chunks of the document it is in are received.
+
+    The array is either the document itself or, if `key` is given, the value of `key` in the top level object.
+    Only the item being decoded is held in memory, not the whole document.
+    """
+    reader = _Reader(chunks)
+    if key is not None:
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                raise KeyError(key)
+            name = reader.value()
+            reader.expect(":")
+            if name == key:
+                break
+            reader.value()
+            if reader.peek() == ",":
+                reader.expect(",")
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.value()
+        if reader.peek() == ",":
+            reader.expect(",")
+        else:
+            reader.expect("]")
+            return
+
+
+class _Reader:
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self.chunks = iter(chunks)
+        self.decoder = codecs.getincrementaldecoder("utf-8")()
+        self.json_decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.pos = 0
+        self.exhausted = False
+
+    def peek(self) -> str:
+        """Returns the next non whitespace character, or an empty string at the end of the document."""
+        while True:
+            self.pos = WHITESPACE.match(self.buffer, self.pos).end()
+            if self.pos < len(self.buffer) or not self._fill():
+                return self.buffer[self.pos : self.pos + 1]
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise json.JSONDecodeError(f"Expecting '{char}'", self.buffer, self.pos)
+        self.pos += 1
+
+    def value(self) -> Any:
+        self.peek()
+        while True:
+            try:
+                obj, end = self.json_decoder.raw_decode(self.buffer, self.pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if self.exhausted or (end < len(self.buffer) and self.buffer[end] not in NUMBER_CHARS):
+                    self.pos = end
+                    return obj
+            except json.JSONDecodeError:
+                if self.exhausted:
+                    raise
+
+            # Read at least as much again as is buffered so large values are not decoded over and over
+            target = 2 * (len(self.buffer) - self.pos)
+            while self._fill() and len(self.buffer) - self.pos < target:
+                pass
+
+    def _fill(self) -> bool:
+        """Appends the next chunk to the buffer. Returns False once the document is fully read."""
+        if self.exhausted:
+            return False
+
+        self.buffer = self.buffer[self.pos :]
+        self.pos = 0
+        for chunk in self.chunks:
+            text = self.decoder.decode(chunk)
+            if text:
+                self.buffer += text
+                return True
+
+        self.buffer += self.decoder.decode(b"", final=True)
+        self.exhausted = True
+        return True
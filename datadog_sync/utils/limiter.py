@@ -0,0 +1,284 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import asyncio
+import logging
+import math
+import re
+import time
+from threading import Condition, Lock
+from typing import Any, Dict, List, Optional
+
+from datadog_sync.constants import LOGGER_NAME
+
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class AdaptiveLimiter:
+    """Limit on the number of in-flight requests of a client, adjusted with AIMD.
+
+    The limit starts at `limit` and grows by one request per window of healthy responses, up to `max_limit`,
+    so it can rise above a configured concurrency which leaves throughput unused. It is halved on
+    429s, 5xx responses and latency spikes, at most once per window: responses to requests sent before
+    the last decrease do not decrease it again. A latency spike is a response slower than
+    `latency_tolerance` times the moving average latency.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        max_limit: Optional[int] = None,
+        min_limit: int = 1,
+        backoff_ratio: float = 0.5,
+        latency_tolerance: float = 3.0,
+        latency_samples: int = 20,
+    ) -> None:
+        self.max_limit = max(max_limit or limit, limit, min_limit)
+        self.min_limit = min_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.latency_samples = latency_samples
+        self.limit = float(max(limit, min_limit))
+        self.in_flight = 0
+        self.latency: Optional[float] = None  # exponential moving average of response latencies
+        self.requests = 0
+        self.throttled = 0
+        self.server_errors = 0
+        self.latency_spikes = 0
+        self.decreases = 0
+        self.lowest_limit = int(self.limit)
+        self.highest_limit = int(self.limit)
+        self._last_decrease = 0.0
+        self._condition = Condition()
+        self._async_waiters: List[asyncio.Future] = []
+
+    def acquire(self) -> float:
+        """Waits for an in-flight request slot and returns the time the request is sent at."""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+        return time.monotonic()
+
+    async def acquire_async(self) -> float:
+        """Coroutine version of `acquire` which waits for the slot without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return time.monotonic()
+                waiter = loop.create_future()
+                self._async_waiters.append(waiter)
+            await waiter
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._notify_all()
+
+    def observe(self, started: float, status_code: int, latency: float) -> None:
+        """Adjusts the limit from the response to a request sent at `started`."""
+        with self._condition:
+            self.requests += 1
+            if status_code == 429:
+                self.throttled += 1
+                congested = True
+            elif status_code >= 500:
+                self.server_errors += 1
+                congested = True
+            else:
+                congested = self._latency_spike(latency)
+
+            if not congested:
+                previous = int(self.limit)
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                if int(self.limit) > previous:
+                    self.highest_limit = max(self.highest_limit, int(self.limit))
+                    self._notify_all()
+            elif started >= self._last_decrease:
+                self.limit = max(self.min_limit, self.limit * self.backoff_ratio)
+                self.lowest_limit = min(self.lowest_limit, int(self.limit))
+                self.decreases += 1
+                self._last_decrease = time.monotonic()
+                log.debug(f"decreased concurrency limit to {int(self.limit)} after a {status_code} response")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            return {
+                "concurrency_limit": int(self.limit),
+                "max_concurrency_limit": self.max_limit,
+                "lowest_concurrency_limit": self.lowest_limit,
+                "highest_concurrency_limit": self.highest_limit,
+                "limit_decreases": self.decreases,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "server_errors": self.server_errors,
+                "latency_spikes": self.latency_spikes,
+            }
+
+    def _notify_all(self) -> None:
+        self._condition.notify_all()
+        for waiter in self._async_waiters:
+            waiter.get_loop().call_soon_threadsafe(_wake, waiter)
+        self._async_waiters.clear()
+
+    def _latency_spike(self, latency: float) -> bool:
+        spike = (
+            self.latency is not None
+            and self.requests > self.latency_samples
+            and latency > self.latency * self.latency_tolerance
+        )
+        if spike:
+            self.latency_spikes += 1
+        alpha = 2 / (self.latency_samples + 1)
+        self.latency = latency if self.latency is None else alpha * latency + (1 - alpha) * self.latency
+        return spike
+
+
+class TokenBucket:
+    """Token bucket holding the `limit` requests allowed per `period` seconds.
+
+    Datadog rate limits are fixed windows, so once the reset of the current window is known the whole
+    limit is restored when each window resets. Until then tokens are refilled at `limit / period` per second.
+    """
+
+    def __init__(self, limit: int, period: float, remaining: int) -> None:
+        self.capacity = limit
+        self.period = period
+        self.tokens = float(min(remaining, limit))
+        self.reset_at: Optional[float] = None  # time the current window resets at
+        self.window_start = 0.0
+        self.updated = time.monotonic()
+
+    def reserve(self, now: float) -> float:
+        """Takes a token and returns the number of seconds to wait before using it."""
+        self._refill(now)
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        if self.reset_at is None:
+            return -self.tokens * self.period / self.capacity
+        windows = math.ceil(-self.tokens / self.capacity)
+        return self.reset_at - now + (windows - 1) * self.period
+
+    def update(
+        self,
+        now: float,
+        sent: float,
+        limit: int,
+        period: float,
+        remaining: int,
+        reset: Optional[float],
+        throttled: bool = False,
+    ) -> None:
+        """Learns the limit from the response to a request sent at `sent`."""
+        self._refill(now)
+        if sent < self.window_start:
+            # Responses to requests sent in the previous window describe that window
+            return
+
+        self.capacity = limit
+        self.period = period
+        # Requests reserved by other workers may not have reached the API yet, so only ever lower the tokens
+        self.tokens = min(self.tokens, remaining)
+        if reset is not None:
+            # `reset` is a whole number of seconds, so the earliest reset reported for a window is the most
+            # accurate. A throttled request means the window was estimated to reset too early.
+            if self.reset_at is None or throttled:
+                self.reset_at = now + reset
+            else:
+                self.reset_at = min(self.reset_at, now + reset)
+
+    def _refill(self, now: float) -> None:
+        if self.reset_at is None:
+            # `now` may be read by another worker before this bucket was last updated
+            elapsed = max(0.0, now - self.updated)
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / self.period)
+        elif now >= self.reset_at:
+            windows = math.floor((now - self.reset_at) / self.period) + 1
+            self.tokens = min(self.capacity, self.tokens + windows * self.capacity)
+            self.reset_at += windows * self.period
+            self.window_start = now
+        self.updated = max(self.updated, now)
+
+
+class RateLimiter:
+    """Paces requests with token buckets learned from the `x-ratelimit-*` response headers.
+
+    Endpoints sharing a rate limit share the bucket named by `x-ratelimit-name`. Requests to an endpoint
+    are paced once a response from it carried rate limit headers.
+    """
+
+    def __init__(self) -> None:
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.endpoints: Dict[str, str] = {}  # mapping of endpoints to the name of their rate limit
+        self.paced = 0
+        self.paced_seconds = 0.0
+        self._lock = Lock()
+
+    def reserve(self, method: str, path: str) -> float:
+        """Takes a token of the endpoint's bucket and returns the number of seconds to wait before sending."""
+        with self._lock:
+            name = self.endpoints.get(endpoint_key(method, path))
+            if name is None:
+                return 0.0
+
+            delay = self.buckets[name].reserve(time.monotonic())
+            if delay > 0:
+                self.paced += 1
+                self.paced_seconds += delay
+            return delay
+
+    def update(self, method: str, path: str, response: Any, sent: float) -> None:
+        """Learns the rate limit of an endpoint from the response to a request sent at `sent`."""
+        headers = response.headers
+        try:
+            limit = int(headers["x-ratelimit-limit"])
+            period = float(headers["x-ratelimit-period"])
+            remaining = int(headers["x-ratelimit-remaining"])
+        except (KeyError, TypeError, ValueError):
+            return
+        if limit <= 0 or period <= 0:
+            return
+
+        try:
+            reset: Optional[float] = float(headers["x-ratelimit-reset"])
+        except (KeyError, TypeError, ValueError):
+            reset = None
+
+        key = endpoint_key(method, path)
+        name = headers.get("x-ratelimit-name") or key
+        now = time.monotonic()
+        with self._lock:
+            self.endpoints[key] = name
+            if name not in self.buckets:
+                self.buckets[name] = TokenBucket(limit, period, remaining)
+            self.buckets[name].update(now, sent, limit, period, remaining, reset, response.status_code == 429)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "rate_limits": len(self.buckets),
+                "paced_requests": self.paced,
+                "paced_seconds": round(self.paced_seconds, 3),
+            }
+
+
+def endpoint_key(method: str, path: str) -> str:
+    """Returns the endpoint of a request with the resource ids of its path replaced by `{id}`."""
+    segments = []
+    for segment in path.split("?", 1)[0].strip("/").split("/"):
+        if re.search(r"\d", segment) and not re.fullmatch(r"v\d+", segment):
+            segment = "{id}"
+        segments.append(segment)
+    return f"{method} /{'/'.join(segments)}"
+
+
+def _wake(waiter: asyncio.Future) -> None:
+    if not waiter.done():
+        waiter.set_result(None)
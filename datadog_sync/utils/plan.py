@@ -0,0 +1,76 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import hashlib
+import json
+from collections.abc import Iterable
+from typing import TYPE_CHECKING, Any, Dict, List
+
+if TYPE_CHECKING:
+    from datadog_sync.utils.configuration import Configuration
+
+
+PLAN_VERSION = 1
+
+
+def plan_inputs(config: Configuration) -> Dict[str, Any]:
+    """Returns the hashes of the options and state files a plan is computed from."""
+    options = {
+        "resources": sorted(config.resources_arg),
+        "cleanup": config.cleanup,
+        "skip_failed_resource_connections": config.skip_failed_resource_connections,
+    }
+    inputs: Dict[str, Any] = {"options": _hash(options), "resources": {}}
+    for resource_type in sorted(config.resources_arg):
+        resource_config = config.resources[resource_type].resource_config
+        inputs["resources"][resource_type] = {
+            "source": _hash(resource_config.source_resources),
+            "destination": _hash(resource_config.destination_resources),
+        }
+
+    return inputs
+
+
+def stale_plan_inputs(config: Configuration, plan: Dict[str, Any]) -> List[str]:
+    """Returns the inputs which changed since the plan was computed."""
+    if plan.get("version") != PLAN_VERSION:
+        return ["version"]
+
+    current, planned = plan_inputs(config), plan["inputs"]
+    stale = []
+    if current["options"] != planned["options"]:
+        stale.append("options")
+    for resource_type in sorted(set(current["resources"]).union(planned["resources"])):
+        current_hashes = current["resources"].get(resource_type, {})
+        planned_hashes = planned["resources"].get(resource_type, {})
+        for origin in ("source", "destination"):
+            if current_hashes.get(origin) != planned_hashes.get(origin):
+                stale.append(f"{resource_type} {origin}")
+
+    return stale
+
+
+def write_plan(path: str, plan: Dict[str, Any]) -> None:
+    with open(path, "w") as f:
+        json.dump(plan, f, indent=2, default=_json_default)
+
+
+def read_plan(path: str) -> Dict[str, Any]:
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _hash(obj: Any) -> str:
+    return hashlib.sha256(json.dumps(obj, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _json_default(obj: Any) -> Any:
+    # Diffs contain sets of paths and the types of changed values
+    if isinstance(obj, type):
+        return obj.__name__
+    if isinstance(obj, Iterable) and not isinstance(obj, (str, bytes)):
+        return list(obj)
+    return str(obj)
@@ -8,13 +8,15 @@ import os
 import re
 import json
 import logging
-from concurrent.futures import ThreadPoolExecutor
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from graphlib import TopologicalSorter
+from multiprocessing import get_context
 
-from deepdiff import DeepDiff
 
 from datadog_sync.constants import RESOURCE_FILE_PATH, LOGGER_NAME
 from datadog_sync.constants import SOURCE_ORIGIN, DESTINATION_ORIGIN
+from datadog_sync.utils.diff import compile_rules, diff
 from typing import Callable, List, Optional, Set, TYPE_CHECKING, Any, Dict, Tuple
 
 if TYPE_CHECKING:
@@ -97,13 +99,16 @@ def del_null_attr(k_list, resource):
 
 
 def check_diff(resource_config, resource, state):
-    return DeepDiff(
-        resource,
-        state,
-        ignore_order=True,
-        exclude_paths=resource_config.excluded_attributes,
-        exclude_regex_paths=resource_config.excluded_attributes_re,
-    )
+    return check_diff_task(resource_config.excluded_attributes, resource_config.excluded_attributes_re, resource, state)
+
+
+def check_diff_task(excluded_attributes, excluded_attributes_re, resource, state) -> Dict:
+    """Process pool variant of check_diff.
+
+    Only the exclusion rules are sent to the worker instead of the whole ResourceConfig. They are
+    compiled once per process."""
+    rules = compile_rules(tuple(excluded_attributes or ()), tuple(excluded_attributes_re or ()))
+    return diff(resource, state, rules)
 
 
 def open_resources(resource_type: str) -> Tuple[Dict[Any, Any], Dict[Any, Any]]:
@@ -151,7 +156,32 @@ def thread_pool_executor(max_workers: Optional[int] = None) -> ThreadPoolExecuto
     return ThreadPoolExecutor(max_workers=max_workers)
 
 
+def process_pool_executor(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    # Workers are started from threads which may hold locks, so avoid forking.
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=get_context("spawn"))
+
+
 def init_topological_sorter(graph: Dict[str, Set[str]]) -> TopologicalSorter:
     sorter = TopologicalSorter(graph)
     sorter.prepare()
     return sorter
+
+
+def critical_path_priorities(graph: Dict[str, Set[str]]) -> Dict[str, Tuple[int, int]]:
+    """Returns the (downstream depth, fan-out) of every node in the dependency graph.
+
+    Depth is the length of the longest chain of resources depending on the node, fan-out
+    is the number of resources directly depending on it.
+    """
+    dependents: Dict[str, Set[str]] = defaultdict(set)
+    for node, deps in graph.items():
+        for dep in deps:
+            dependents[dep].add(node)
+
+    priorities: Dict[str, Tuple[int, int]] = {}
+    # static_order yields dependencies first, so walk it backwards to visit dependents first
+    for node in reversed(list(TopologicalSorter(graph).static_order())):
+        depth = max((priorities[d][0] + 1 for d in dependents[node]), default=0)
+        priorities[node] = (depth, len(dependents[node]))
+
+    return priorities
@@ -4,47 +4,78 @@
 # Copyright 2019 Datadog, Inc.
 
 from __future__ import annotations
-from collections import deque
-from concurrent.futures import wait
+import os
+from collections import defaultdict
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from copy import deepcopy
+from itertools import count
+from queue import Queue
 
 from click import confirm
+from graphlib import TopologicalSorter
 from pprint import pformat
 
 from datadog_sync.constants import DESTINATION_ORIGIN, SOURCE_ORIGIN
+from datadog_sync.utils.async_worker import wait_future
+from datadog_sync.utils.checkpoint import ImportCheckpoint, ImportIndex
+from datadog_sync.utils.fingerprint import FINGERPRINT_POOL_MIN_RESOURCES, FingerprintStore
+from datadog_sync.utils.journal import JOURNAL_CREATE, JOURNAL_DELETE, JOURNAL_UNCHANGED, JOURNAL_UPDATE
+from datadog_sync.utils.plan import PLAN_VERSION, plan_inputs
 from datadog_sync.utils.resources_manager import ResourcesManager
-from datadog_sync.constants import TRUE, FALSE, FORCE
+from datadog_sync.utils.scheduler import (
+    PRE_APPLY_HOOK_DONE,
+    RESOURCE_DONE,
+    RESOURCE_FOUND,
+    RESOURCE_IMPORTED,
+    RESOURCES_LISTED,
+    PipelineGraph,
+    RecordingDict,
+    CleanupBatch,
+    CleanupNode,
+    PreApplyHookNode,
+    ResourceDispatcher,
+    notify,
+)
+from datadog_sync.constants import TRUE, FALSE, FORCE, FIFO_POLICY, PLAN_CREATE, PLAN_UPDATE
 from datadog_sync.utils.resource_utils import (
     CustomClientHTTPError,
     LoggedException,
     ResourceConnectionError,
     check_diff,
+    check_diff_task,
+    critical_path_priorities,
     dump_resources,
     prep_resource,
+    process_pool_executor,
     thread_pool_executor,
     init_topological_sorter,
     write_resources_file,
 )
-from typing import Dict, TYPE_CHECKING, Optional, Tuple
+from typing import Any, Callable, Dict, Iterator, List, Set, TYPE_CHECKING, Optional, Tuple, Union
 
 if TYPE_CHECKING:
+    from datadog_sync.utils.base_resource import ResourceConfig
     from datadog_sync.utils.configuration import Configuration
-    from graphlib import TopologicalSorter
 
 
 class ResourcesHandler:
-    def __init__(self, config: Configuration, init_manager: bool = True) -> None:
+    def __init__(self, config: Configuration, init_manager: bool = True, plan: Optional[Dict] = None) -> None:
         self.config = config
+        self.plan = plan
 
         # Additional config for resource manager
         if init_manager:
-            self.resources_manager: ResourcesManager = ResourcesManager(config)
-            self.resource_done_queue: deque = deque()
+            self.resources_manager: ResourcesManager = ResourcesManager(config, plan)
+            self.resource_done_queue: Queue = Queue()
             self.sorter: Optional[TopologicalSorter] = None
 
+        self.diff_executor: Optional[ProcessPoolExecutor] = None
+
     def apply_resources(self) -> Tuple[int, int]:
         # Init executors
-        parralel_executor = thread_pool_executor(self.config.max_workers)
-        serial_executor = thread_pool_executor(1)
+        parralel_executor = self._worker_executor()
+        self._init_diff_executor()
+        self.config.journal.open()
         futures = []
 
         # Import resources that are missing but needed for resource connections
@@ -75,92 +106,473 @@ class ResourcesHandler:
 
             self.config.logger.info("finished importing missing dependencies")
 
-        # handle resource cleanups
+        # Resources unchanged since their last successful sync are skipped. Plans already decided what to sync.
+        fingerprints: Optional[FingerprintStore] = None
+        if self.plan is None:
+            fingerprints = FingerprintStore(self.config)
+            if not self.config.full:
+                fingerprints.load()
+            self._compute_fingerprints(fingerprints)
+
+        # handle resource cleanups. Deletes run alongside the sync, in reverse dependency order.
+        cleanup_graph: Dict[CleanupNode, Set] = {}
         if self.config.cleanup != FALSE and self.resources_manager.all_cleanup_resources:
-            cleanup = _cleanup_prompt(self.config, self.resources_manager.all_cleanup_resources)
+            # Deletes of a plan were already reviewed
+            cleanup = _cleanup_prompt(
+                self.config, self.resources_manager.all_cleanup_resources, prompt=self.plan is None
+            )
             if cleanup:
-                for _id, resource_type in self.resources_manager.all_cleanup_resources.items():
-                    futures.append(parralel_executor.submit(self._cleanup_worker, _id, resource_type))
-                wait(futures)
-                futures.clear()
-
-        # Run pre-apply hooks
-        for resource_type in set(self.resources_manager.all_resources.values()):
-            futures.append(parralel_executor.submit(self.config.resources[resource_type].pre_apply_hook))
-        wait(futures)
-        for future in futures:
-            try:
-                future.result()
-            except Exception as e:
-                self.config.logger.warning(f"Error while running pre-apply hook: {str(e)}")
-        futures.clear()
+                cleanup_graph = self._cleanup_graph()
 
         # initalize topological sorters
-        self.sorter = init_topological_sorter(self.resources_manager.dependencies_graph)
+        graph = {**self.resources_manager.dependencies_graph, **cleanup_graph}
+        self._add_pre_apply_hooks(graph)
+        self.sorter = init_topological_sorter(graph)
         # initialize queue for finished resources
-        self.resource_done_queue = deque()
+        self.resource_done_queue = Queue()
+        dispatcher = ResourceDispatcher(
+            parralel_executor,
+            self.config.max_concurrency,
+            self._type_concurrency,
+            self._dispatch_priority_func(graph),
+            self.resource_done_queue,
+        )
+
+        apply_worker = self._apply_resource_worker if self.plan is None else self._apply_planned_resource_worker
 
+        def worker(node: Union[str, CleanupNode, CleanupBatch, PreApplyHookNode], resource_type: str) -> Any:
+            if isinstance(node, PreApplyHookNode):
+                return self._pre_apply_hook_worker(resource_type)
+            if isinstance(node, CleanupBatch):
+                return self._cleanup_batch_worker(node, resource_type)
+            if isinstance(node, CleanupNode):
+                return self._cleanup_worker(node.resource_id, resource_type)
+            if fingerprints is None:
+                return apply_worker(node, resource_type)
+
+            try:
+                apply_worker(node, resource_type)
+            except BaseException:
+                fingerprints.discard(resource_type, node)
+                raise
+            destination_resources = self.config.resources[resource_type].resource_config.destination_resources
+            fingerprints.record(resource_type, node, destination_resources.get(node))
+
+        uncounted_futures = set()
+        failed = set()  # failed nodes and the nodes skipped because they depend on one
+        unchanged = set()  # resources skipped because they and their dependencies did not change
         while self.sorter.is_active():
+            deletes: Dict[str, List[CleanupNode]] = defaultdict(list)
+            completed = 0  # nodes completed without dispatching them
             for _id in self.sorter.get_ready():
-                if _id not in self.resources_manager.all_resources:
+                if isinstance(_id, CleanupNode):
+                    resource_type = self.resources_manager.all_cleanup_resources[_id.resource_id]
+                elif isinstance(_id, PreApplyHookNode):
+                    resource_type = _id.resource_type
+                elif _id not in self.resources_manager.all_resources:
                     # at this point, we already attempted to import missing resources
                     # so mark the node as complete and continue
                     self.sorter.done(_id)
+                    completed += 1
+                    continue
+                elif self.config.resume and _id in self.config.journal.completed:
+                    # completed by the interrupted run
+                    self.sorter.done(_id)
+                    completed += 1
                     continue
+                else:
+                    resource_type = self.resources_manager.all_resources[_id]
 
-                if self.config.resources[self.resources_manager.all_resources[_id]].resource_config.concurrent:
-                    futures.append(
-                        parralel_executor.submit(
-                            self._apply_resource_worker, _id, self.resources_manager.all_resources[_id]
-                        )
-                    )
+                failed_dependencies = failed.intersection(graph[_id])
+                if failed_dependencies:
+                    # the resource would fail to connect, skip it without any request
+                    self._skip_dependent(_id, resource_type, failed_dependencies)
+                    failed.add(_id)
+                    self.sorter.done(_id)
+                    completed += 1
+                    continue
+
+                if (
+                    fingerprints is not None
+                    and isinstance(_id, str)
+                    and fingerprints.unchanged(resource_type, _id)
+                    and unchanged.issuperset(graph[_id])
+                ):
+                    # synced by a previous run and neither the resource nor its dependencies changed since
+                    self.config.journal.record(JOURNAL_UNCHANGED, resource_type, _id)
+                    unchanged.add(_id)
+                    self.sorter.done(_id)
+                    completed += 1
+                    continue
+
+                if isinstance(_id, CleanupNode):
+                    deletes[resource_type].append(_id)
                 else:
-                    futures.append(
-                        serial_executor.submit(
-                            self._apply_resource_worker, _id, self.resources_manager.all_resources[_id]
-                        )
-                    )
-            try:
-                node = self.resource_done_queue.popleft()
-                self.sorter.done(node)
-            except IndexError:
-                pass
+                    dispatcher.push(_id, resource_type)
+            for resource_type, nodes in deletes.items():
+                for node in self._cleanup_batches(nodes, resource_type):
+                    dispatcher.push(node, resource_type)
 
-        wait(futures)
-        successes = errors = 0
-        for future in futures:
+            futures.extend(dispatcher.dispatch(worker))
+
+            if not dispatcher.total_running:
+                if completed or not self.sorter.is_active():
+                    continue
+                # Nothing can finish, so the remaining nodes would never become ready
+                raise RuntimeError("sync stalled: resources are left to sync but none of them can be started")
+
+            # Block until a worker finishes. Events are placed in the queue by the future's done
+            # callback so the dispatcher sleeps instead of polling.
+            _, node, resource_type, future = self.resource_done_queue.get()
+            dispatcher.task_done(resource_type)
+            nodes = node.nodes if isinstance(node, CleanupBatch) else (node,)
+            failed.update(_failed_nodes(node, future))
+            self.sorter.done(*nodes)
+            if isinstance(node, (CleanupNode, CleanupBatch, PreApplyHookNode)):
+                uncounted_futures.add(future)
+
+        # deletes and pre-apply hooks are not part of the sync results
+        futures = [future for future in futures if future not in uncounted_futures]
+        successes, errors = self._apply_results(futures)
+
+        # shutdown executors
+        parralel_executor.shutdown()
+        self._shutdown_diff_executor()
+
+        # dump synced resources
+        synced_resource_types = set(self.resources_manager.all_resources.values())
+        cleanedup_resource_types = set(self.resources_manager.all_cleanup_resources.values())
+        self._dump_destination_resources(synced_resource_types.union(cleanedup_resource_types))
+        if fingerprints is not None:
+            fingerprints.write(self.config, synced_resource_types.union(cleanedup_resource_types))
+            if unchanged:
+                self.config.logger.info(f"skipped {len(unchanged)} resources unchanged since their last sync")
+
+        return successes, errors
+
+    def plan_resources(self) -> Dict[str, Any]:
+        """Computes the creates, updates and deletes a sync would run, along with the hashes of its inputs."""
+        plan: Dict[str, Any] = {
+            "version": PLAN_VERSION,
+            "inputs": plan_inputs(self.config),
+            "creates": defaultdict(list),
+            "updates": defaultdict(dict),
+            "deletes": defaultdict(list),
+            "order": [],
+            "dependencies": {},
+        }
+
+        executor = thread_pool_executor(self.config.max_concurrency)
+        self._init_diff_executor()
+        futures = {}
+        for _id, resource_type in self.resources_manager.all_resources.items():
+            futures[_id] = executor.submit(self._plan_worker, _id, resource_type)
+        wait(futures.values())
+        executor.shutdown()
+        self._shutdown_diff_executor()
+
+        for _id, future in futures.items():
+            resource_type = self.resources_manager.all_resources[_id]
             try:
-                future.result()
-            except ResourceConnectionError:
-                # This should already be handled in connect_resource method
-                continue
-            except LoggedException:
-                errors += 1
+                action, diff = future.result()
             except Exception as e:
-                self.config.logger.error(str(e))
-                errors += 1
+                self.config.logger.error(f"Error while planning resource {resource_type}. source ID: {_id} - {str(e)}")
+                continue
+
+            if action == PLAN_CREATE:
+                plan["creates"][resource_type].append(_id)
+            elif action == PLAN_UPDATE:
+                plan["updates"][resource_type][_id] = diff
+
+        for _id, resource_type in self.resources_manager.all_cleanup_resources.items():
+            plan["deletes"][resource_type].append(_id)
+
+        # Resources depend only on planned creates, as everything else already exists in the destination
+        planned = set()
+        for ids in list(plan["creates"].values()) + list(plan["updates"].values()):
+            planned.update(ids)
+        for _id in planned:
+            plan["dependencies"][_id] = sorted(planned.intersection(self.resources_manager.dependencies_graph[_id]))
+        for _id in TopologicalSorter(plan["dependencies"]).static_order():
+            plan["order"].append([self.resources_manager.all_resources[_id], _id])
+
+        return plan
+
+    def migrate_resources(self) -> Tuple[int, int]:
+        """Imports resources from the source org and syncs them to the destination org in a single pass.
+
+        A resource is synced as soon as it and its dependencies are imported and synced, rather than
+        waiting for every resource type to finish importing. Source state files are written in the
+        background as each resource type finishes importing.
+        """
+        resource_types = self.config.resources_arg
+        for resource_type in resource_types:
+            self.config.resources[resource_type].resource_config.source_resources = RecordingDict()
+        self.resources_manager = ResourcesManager(self.config)
+
+        # Init executors. Imports hit the source org and syncs the destination org, so each gets its own workers.
+        import_executor = thread_pool_executor(self.config.max_concurrency)
+        parralel_executor = thread_pool_executor(self.config.max_concurrency)
+        persist_executor = thread_pool_executor(1)
+        self._init_diff_executor()
+        self.config.journal.open()
+
+        events: Queue = Queue()
+        graph = PipelineGraph(resource_types)
+        # The dependency graph is only known once everything is imported, so resources are dispatched FIFO
+        counter = count()
+        dispatcher = ResourceDispatcher(
+            parralel_executor,
+            self.config.max_concurrency,
+            self._type_concurrency,
+            lambda _id: (next(counter),),
+            events,
+        )
+        futures: List[Future] = []
+        persist_futures: List[Future] = []
+        outstanding = 0  # listings, imports and pre-apply hooks still running
+        pending_imports: Dict[str, int] = defaultdict(int)
+        import_results: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        # Pre-apply hooks only prepare resource creation. They are started once the first resource
+        # to create becomes ready, and from then on gate the resources of their own type.
+        hooks_started = set()
+        hooks_running = set()
+        held: Dict[str, List[str]] = defaultdict(list)  # ready resources waiting for their pre-apply hook
+
+        for resource_type in resource_types:
+            r_class = self.config.resources[resource_type]
+            self.config.logger.info("Importing %s", resource_type)
+
+            listing = import_executor.submit(self._list_resources, resource_type, events)
+            listing.add_done_callback(notify(events, RESOURCES_LISTED, resource_type))
+            pending_imports[resource_type] += 1
+            outstanding += 1
+
+        while True:
+            futures.extend(dispatcher.dispatch(self._migrate_resource_worker))
+            if not outstanding and not dispatcher.total_running:
+                break
+
+            event, *args, future = events.get()
+            resource_type = args[-1]
+            r_class = self.config.resources[resource_type]
+            ready: List[str] = []
+
+            if event == RESOURCE_DONE:
+                dispatcher.task_done(resource_type)
+                if future.exception() is not None:
+                    graph.mark_failed(args[0])
+                else:
+                    ready = graph.mark_done(args[0])
+            elif event == PRE_APPLY_HOOK_DONE:
+                outstanding -= 1
+                self._pre_apply_hook_result(future)
+                hooks_running.discard(resource_type)
+                ready = held.pop(resource_type, [])
+            elif event == RESOURCE_FOUND:
+                import_future = import_executor.submit(r_class.import_resource, resource=args[0])
+                import_future.add_done_callback(notify(events, RESOURCE_IMPORTED, resource_type))
+                pending_imports[resource_type] += 1
+                outstanding += 1
             else:
-                successes += 1
+                outstanding -= 1
+                pending_imports[resource_type] -= 1
+                if event == RESOURCES_LISTED:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.config.logger.error(f"Error while importing resources {resource_type}: {str(e)}")
+                elif event == RESOURCE_IMPORTED:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        self.config.logger.error(f"Error while importing resource {resource_type}: {str(e)}")
+                        import_results[resource_type][1] += 1
+                    else:
+                        import_results[resource_type][0] += 1
+
+                source_resources = r_class.resource_config.source_resources
+                if r_class.resource_config.per_resource_import:
+                    ready = self._register_imported(graph, resource_type, source_resources.pop_new_keys())
+
+                if pending_imports[resource_type] == 0:
+                    # Resource type is fully imported
+                    ready.extend(self._register_imported(graph, resource_type, source_resources.pop_new_keys()))
+                    ready.extend(graph.mark_imported(resource_type))
+                    persist_futures.append(
+                        persist_executor.submit(write_resources_file, resource_type, SOURCE_ORIGIN, source_resources)
+                    )
+                    successes, errors = import_results[resource_type]
+                    self.config.logger.info(
+                        f"Finished importing {resource_type}: {successes} successes, {errors} errors"
+                    )
+
+            for _id, failed_dependencies in graph.pop_skipped():
+                self._skip_dependent(_id, graph.nodes[_id], failed_dependencies)
+
+            for _id in ready:
+                ready_type = graph.nodes[_id]
+                if ready_type not in hooks_started and self._resource_types_to_create({_id: ready_type}):
+                    self._start_pre_apply_hook(parralel_executor, events, ready_type)
+                    hooks_started.add(ready_type)
+                    hooks_running.add(ready_type)
+                    outstanding += 1
+
+                if ready_type in hooks_running:
+                    held[ready_type].append(_id)
+                else:
+                    dispatcher.push(_id, ready_type)
+
+        successes, errors = self._apply_results(futures)
+        for _id, unresolved in graph.waiting.items():
+            self.config.logger.error(
+                f"Error while syncing resource {graph.nodes[_id]}. source ID: {_id} - "
+                f"Error: unresolved dependencies {sorted(unresolved)}"
+            )
+            errors += 1
+
+        # handle resource cleanups once the source org is fully imported
+        self.resources_manager.populate_cleanup_resources()
+        if self.config.cleanup != FALSE and self.resources_manager.all_cleanup_resources:
+            cleanup = _cleanup_prompt(self.config, self.resources_manager.all_cleanup_resources)
+            if cleanup:
+                self._run_cleanup(parralel_executor)
 
         # shutdown executors
+        import_executor.shutdown()
         parralel_executor.shutdown()
-        serial_executor.shutdown()
+        persist_executor.shutdown()
+        self._shutdown_diff_executor()
+        for future in persist_futures:
+            future.result()
 
         # dump synced resources
         synced_resource_types = set(self.resources_manager.all_resources.values())
         cleanedup_resource_types = set(self.resources_manager.all_cleanup_resources.values())
-        dump_resources(self.config, synced_resource_types.union(cleanedup_resource_types), DESTINATION_ORIGIN)
+        self._dump_destination_resources(synced_resource_types.union(cleanedup_resource_types))
 
         return successes, errors
 
     def import_resources(self) -> None:
+        # All resource types are listed and imported concurrently under a shared worker budget
+        executor = self._worker_executor()
+        events: Queue = Queue()
+        counter = count()
+        dispatcher = ResourceDispatcher(
+            executor,
+            self.config.max_concurrency,
+            self._type_concurrency,
+            lambda _id: (next(counter),),
+            events,
+        )
+        pending: Dict[str, Dict] = {}  # resources waiting to be imported, keyed by a unique task id
+        remaining: Dict[str, int] = defaultdict(int)  # resources of a type which are not imported yet
+        results: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        listing = 0
+        listed: Set[str] = set()
+        listing_failed: Set[str] = set()
+        checkpoint = ImportCheckpoint(self.config.resume)
+        checkpoint.start(self.config.resources_arg)
+        index = ImportIndex()
+        previous_state: Dict[str, Dict] = {}  # source state files written by the last import
+        unchanged: Dict[str, int] = defaultdict(int)
+
         for resource_type in self.config.resources_arg:
             self.config.logger.info("Importing %s", resource_type)
-            successes, errors = self._import_resources_helper(resource_type)
-            self.config.logger.info(f"Finished importing {resource_type}: {successes} successes, {errors} errors")
+            if self.config.incremental:
+                index.load(resource_type)
+                previous_state[resource_type] = self.config.resources[resource_type].resource_config.source_resources
+            self.config.resources[resource_type].resource_config.source_resources = RecordingDict()
+            future = executor.submit(self._list_resources, resource_type, events)
+            future.add_done_callback(notify(events, RESOURCES_LISTED, resource_type))
+            listing += 1
+
+        def import_worker(key: str, resource_type: str) -> None:
+            r_class = self.config.resources[resource_type]
+            resource = pending.pop(key)
+            if not r_class.resource_config.per_resource_import:
+                r_class.import_resource(resource=resource)
+                return
+
+            source_resources = r_class.resource_config.source_resources
+            with source_resources.capture() as imported:
+                r_class.import_resource(resource=resource)
+            checkpoint.record(resource_type, resource, {_id: source_resources[_id] for _id in imported})
+            index.record(resource_type, resource, imported)
+
+        while True:
+            dispatcher.dispatch(import_worker)
+            if not listing and not dispatcher.total_running:
+                break
+
+            event, *args, future = events.get()
+            resource_type = args[-1]
+            r_class = self.config.resources[resource_type]
+
+            if event == RESOURCE_FOUND:
+                r = args[0]
+                imported = None
+                if r_class.resource_config.per_resource_import:
+                    # Already imported by the resumed session
+                    imported = checkpoint.lookup(resource_type, r)
+                    if imported is None and self.config.incremental:
+                        # Not modified since the last import
+                        imported = index.lookup(resource_type, r, previous_state[resource_type])
+                        unchanged[resource_type] += imported is not None
+                if imported is not None:
+                    r_class.resource_config.source_resources.update(imported)
+                    index.record(resource_type, r, imported.keys())
+                    results[resource_type][0] += 1
+                    continue
+
+                key = str(next(counter))
+                pending[key] = r
+                dispatcher.push(key, resource_type)
+                remaining[resource_type] += 1
+                continue
+            elif event == RESOURCES_LISTED:
+                listing -= 1
+                listed.add(resource_type)
+                try:
+                    future.result()
+                except Exception as e:
+                    self.config.logger.error(f"Error while importing resources {resource_type}: {str(e)}")
+                    listing_failed.add(resource_type)
+            else:
+                dispatcher.task_done(resource_type)
+                remaining[resource_type] -= 1
+                try:
+                    future.result()
+                except Exception as e:
+                    self.config.logger.error(f"Error while importing resource {resource_type}: {str(e)}")
+                    results[resource_type][1] += 1
+                else:
+                    results[resource_type][0] += 1
+
+            if resource_type in listed and remaining[resource_type] == 0:
+                # The state file of a partially listed resource type is kept as is
+                if resource_type not in listing_failed:
+                    write_resources_file(resource_type, SOURCE_ORIGIN, r_class.resource_config.source_resources)
+                    if r_class.resource_config.per_resource_import:
+                        index.write(resource_type)
+                successes, errors = results[resource_type]
+                message = f"Finished importing {resource_type}: {successes} successes, {errors} errors"
+                if self.config.incremental:
+                    message += f", {unchanged[resource_type]} unchanged"
+                self.config.logger.info(message)
+
+        executor.shutdown()
+        if listing_failed or any(errors for _, errors in results.values()):
+            checkpoint.close()
+            self.config.logger.warning(
+                "import finished with errors. Run `import --resume` to only import the resources left to import"
+            )
+        else:
+            checkpoint.finish()
 
     def diffs(self) -> None:
-        executor = thread_pool_executor(self.config.max_workers)
+        executor = self._worker_executor()
+        self._init_diff_executor()
         futures = []
         for _id, resource_type in self.resources_manager.all_resources.items():
             futures.append(executor.submit(self._diffs_worker, _id, resource_type))
@@ -168,6 +580,8 @@ class ResourcesHandler:
         for _id, resource_type in self.resources_manager.all_cleanup_resources.items():
             futures.append(executor.submit(self._diffs_worker, _id, resource_type, delete=True))
         wait(futures)
+        executor.shutdown()
+        self._shutdown_diff_executor()
 
     def _diffs_worker(self, _id, resource_type, delete=False) -> None:
         r_class = self.config.resources[resource_type]
@@ -193,83 +607,324 @@ class ResourcesHandler:
                 return
 
             if _id in r_class.resource_config.destination_resources:
-                diff = check_diff(r_class.resource_config, r_class.resource_config.destination_resources[_id], resource)
+                diff = self._check_diff(
+                    r_class.resource_config, r_class.resource_config.destination_resources[_id], resource
+                )
                 if diff:
                     print("{} resource source ID {} diff: \n {}".format(resource_type, _id, pformat(diff)))
             else:
                 print("Resource to be added {} source ID {}: \n {}".format(resource_type, _id, pformat(resource)))
 
-    def _import_resources_helper(self, resource_type: str) -> Tuple[int, int]:
+    def _apply_resource_worker(
+        self, _id: str, resource_type: str, resource: Optional[Dict] = None, skip_diff: bool = False
+    ) -> None:
         r_class = self.config.resources[resource_type]
-        r_class.resource_config.source_resources.clear()
+        if resource is None:
+            resource = self.config.resources[resource_type].resource_config.source_resources[_id]
 
-        try:
-            get_resp = r_class.get_resources(self.config.source_client)
-        except Exception as e:
-            self.config.logger.error(f"Error while importing resources {resource_type}: {str(e)}")
-            return 0, 0
+        # Run hooks
+        r_class.pre_resource_action_hook(_id, resource)
+        r_class.connect_resources(_id, resource)
 
-        futures = []
-        with thread_pool_executor(self.config.max_workers) as executor:
-            for r in get_resp:
-                if not r_class.filter(r):
-                    continue
-                futures.append(executor.submit(r_class.import_resource, resource=r))
+        if _id in r_class.resource_config.destination_resources:
+            diff = skip_diff or self._check_diff(
+                r_class.resource_config, resource, r_class.resource_config.destination_resources[_id]
+            )
+            if diff:
+                self.config.logger.info(f"Running update for {resource_type} with {_id}")
 
-        successes = errors = 0
-        for future in futures:
+                prep_resource(r_class.resource_config, resource)
+                try:
+                    r_class.update_resource(_id, resource)
+                except Exception as e:
+                    self.config.logger.error(
+                        f"Error while updating resource {resource_type}. source ID: {_id} -  Error: {str(e)}"
+                    )
+                    raise LoggedException(e)
+
+                self.config.journal.record(
+                    JOURNAL_UPDATE, resource_type, _id, r_class.resource_config.destination_resources.get(_id)
+                )
+                self.config.logger.info(f"Finished update for {resource_type} with {_id}")
+            else:
+                self.config.journal.record(JOURNAL_UNCHANGED, resource_type, _id)
+        else:
+            self.config.logger.info(f"Running create for {resource_type} with {_id}")
+
+            prep_resource(r_class.resource_config, resource)
             try:
-                future.result()
+                r_class.create_resource(_id, resource)
             except Exception as e:
-                self.config.logger.error(f"Error while importing resource {resource_type}: {str(e)}")
-                errors += 1
-            else:
-                successes += 1
+                self.config.logger.error(
+                    f"Error while creating resource {resource_type}. source ID: {_id} - Error: {str(e)}"
+                )
+                raise LoggedException(e)
 
-        write_resources_file(resource_type, SOURCE_ORIGIN, r_class.resource_config.source_resources)
-        return successes, errors
+            self.config.journal.record(
+                JOURNAL_CREATE, resource_type, _id, r_class.resource_config.destination_resources.get(_id)
+            )
+            self.config.logger.info(f"finished create for {resource_type} with {_id}")
 
-    def _apply_resource_worker(self, _id: str, resource_type: str) -> None:
+    def _plan_worker(self, _id: str, resource_type: str) -> Tuple[Optional[str], Optional[Dict]]:
+        r_class = self.config.resources[resource_type]
+        if _id not in r_class.resource_config.destination_resources:
+            return PLAN_CREATE, None
+        if self.resources_manager._resource_connections_by_type(_id, resource_type, queue_missing=False):
+            # Connected resources missing from the destination are created by this plan or fail to connect,
+            # so the diff can only be computed when applying
+            return PLAN_UPDATE, None
+
+        resource = deepcopy(r_class.resource_config.source_resources[_id])
+        r_class.pre_resource_action_hook(_id, resource)
         try:
-            r_class = self.config.resources[resource_type]
-            resource = self.config.resources[resource_type].resource_config.source_resources[_id]
-
-            # Run hooks
-            r_class.pre_resource_action_hook(_id, resource)
             r_class.connect_resources(_id, resource)
+        except ResourceConnectionError:
+            return PLAN_UPDATE, None
+
+        diff = self._check_diff(r_class.resource_config, resource, r_class.resource_config.destination_resources[_id])
+        if diff:
+            return PLAN_UPDATE, diff
+        return None, None
+
+    def _apply_planned_resource_worker(self, _id: str, resource_type: str) -> None:
+        # Skip the diff of updates the plan already computed one for
+        skip_diff = self.plan["updates"].get(resource_type, {}).get(_id) is not None
+        self._apply_resource_worker(_id, resource_type, skip_diff=skip_diff)
+
+    def _migrate_resource_worker(self, _id: str, resource_type: str) -> None:
+        # Sync a copy so the source state written in the background is not modified by the sync hooks
+        resource = deepcopy(self.config.resources[resource_type].resource_config.source_resources[_id])
+        self._apply_resource_worker(_id, resource_type, resource)
+
+    def _list_resources(self, resource_type: str, events: Queue) -> None:
+        """Hands the resources of a type which pass the filters to the scheduler as they are listed."""
+        r_class = self.config.resources[resource_type]
+        for r in r_class.get_resources(self.config.source_client):
+            if r_class.filter(r):
+                events.put((RESOURCE_FOUND, r, resource_type, None))
+
+    def _register_imported(self, graph: PipelineGraph, resource_type: str, ids: List[str]) -> List[str]:
+        ready = []
+        for _id in ids:
+            if _id in graph.nodes:
+                continue
 
-            if _id in r_class.resource_config.destination_resources:
-                diff = check_diff(r_class.resource_config, resource, r_class.resource_config.destination_resources[_id])
-                if diff:
-                    self.config.logger.info(f"Running update for {resource_type} with {_id}")
+            self.resources_manager.all_resources[_id] = resource_type
+            dependencies = self.resources_manager._resource_connections_by_type(_id, resource_type, queue_missing=False)
+            self.resources_manager.dependencies_graph[_id] = set().union(*dependencies.values())
+            if graph.add(_id, resource_type, dependencies):
+                ready.append(_id)
 
-                    prep_resource(r_class.resource_config, resource)
-                    try:
-                        r_class.update_resource(_id, resource)
-                    except Exception as e:
-                        self.config.logger.error(
-                            f"Error while updating resource {resource_type}. source ID: {_id} -  Error: {str(e)}"
-                        )
-                        raise LoggedException(e)
+        return ready
 
-                    self.config.logger.info(f"Finished update for {resource_type} with {_id}")
-            else:
-                self.config.logger.info(f"Running create for {resource_type} with {_id}")
+    def _skip_dependent(self, node: Union[str, CleanupNode], resource_type: str, failed_dependencies: Set) -> None:
+        failed_ids = sorted(
+            dependency.resource_id if isinstance(dependency, CleanupNode) else dependency
+            for dependency in failed_dependencies
+        )
+        if isinstance(node, CleanupNode):
+            self.config.logger.warning(
+                f"Skipping deletion of resource: {resource_type} with ID: {node.resource_id}. "
+                f"Failed dependencies: {failed_ids}"
+            )
+        else:
+            self.config.logger.warning(
+                f"Skipping resource: {resource_type} with ID: {node}. Failed dependencies: {failed_ids}"
+            )
 
-                prep_resource(r_class.resource_config, resource)
-                try:
-                    r_class.create_resource(_id, resource)
-                except Exception as e:
-                    self.config.logger.error(
-                        f"Error while creating resource {resource_type}. source ID: {_id} - Error: {str(e)}"
-                    )
-                    raise LoggedException(e)
+    def _cleanup_graph(self) -> Dict[CleanupNode, Set]:
+        graph: Dict[CleanupNode, Set] = {}
+        for _id, dependencies in self.resources_manager.cleanup_dependencies().items():
+            graph[CleanupNode(_id)] = set(
+                CleanupNode(dependency) if dependency in self.resources_manager.all_cleanup_resources else dependency
+                for dependency in dependencies
+            )
+        return graph
+
+    def _run_cleanup(self, executor: Executor) -> None:
+        # Synced resources are done, so deletes only wait for the deletes of resources referencing them
+        graph = {
+            node: set(dependency for dependency in dependencies if isinstance(dependency, CleanupNode))
+            for node, dependencies in self._cleanup_graph().items()
+        }
+        sorter = init_topological_sorter(graph)
+        events: Queue = Queue()
+        counter = count()
+        dispatcher = ResourceDispatcher(
+            executor, self.config.max_concurrency, self._type_concurrency, lambda _id: (next(counter),), events
+        )
+
+        def worker(node: Union[CleanupNode, CleanupBatch], resource_type: str) -> Any:
+            if isinstance(node, CleanupBatch):
+                return self._cleanup_batch_worker(node, resource_type)
+            return self._cleanup_worker(node.resource_id, resource_type)
+
+        while sorter.is_active():
+            deletes: Dict[str, List[CleanupNode]] = defaultdict(list)
+            for node in sorter.get_ready():
+                deletes[self.resources_manager.all_cleanup_resources[node.resource_id]].append(node)
+            for resource_type, nodes in deletes.items():
+                for batch in self._cleanup_batches(nodes, resource_type):
+                    dispatcher.push(batch, resource_type)
+            dispatcher.dispatch(worker)
+            _, node, resource_type, _ = events.get()
+            dispatcher.task_done(resource_type)
+            sorter.done(*(node.nodes if isinstance(node, CleanupBatch) else (node,)))
+
+    def _dump_destination_resources(self, resource_types: Set[str]) -> None:
+        # The journal is only needed until the destination state it records is written
+        dump_resources(self.config, resource_types.union(self.config.journal.resource_types), DESTINATION_ORIGIN)
+        self.config.journal.remove()
+
+    def _resource_types_to_create(self, resources: Dict[str, str]) -> Set[str]:
+        return set(
+            resource_type
+            for _id, resource_type in resources.items()
+            if _id not in self.config.resources[resource_type].resource_config.destination_resources
+        )
+
+    def _add_pre_apply_hooks(self, graph: Dict[Any, Set]) -> None:
+        """Adds the pre-apply hooks of the resource types with resources to create to the dependency graph.
+
+        Hooks only prepare resource creation, so only the creates of their own type wait for them. Hooks
+        look up existing destination resources, so they wait for the deletes of their type, except for
+        the deletes which wait for one of these creates themselves. For example, a stale monitor is only
+        deleted once the composite monitor referencing it is updated, which may need a new monitor.
+        """
+        creates: Dict[str, List[str]] = defaultdict(list)
+        for _id, resource_type in self.resources_manager.all_resources.items():
+            if _id in graph and _id not in self.config.resources[resource_type].resource_config.destination_resources:
+                creates[resource_type].append(_id)
+        if not creates:
+            return
+
+        for resource_type, ids in creates.items():
+            hook = PreApplyHookNode(resource_type)
+            graph[hook] = set()
+            for _id in ids:
+                # the dependency sets are shared with the resources manager
+                graph[_id] = graph[_id] | {hook}
+
+        dependents: Dict[Any, Set] = defaultdict(set)
+        for node, dependencies in graph.items():
+            for dependency in dependencies:
+                dependents[dependency].add(node)
+        deletes: Dict[str, List[CleanupNode]] = defaultdict(list)
+        for node in graph:
+            if isinstance(node, CleanupNode):
+                deletes[self.resources_manager.all_cleanup_resources[node.resource_id]].append(node)
+
+        for resource_type in creates:
+            hook = PreApplyHookNode(resource_type)
+            # nodes waiting for the hook, which the hook cannot wait for
+            waiting = set()
+            stack = [hook]
+            while stack:
+                for dependent in dependents[stack.pop()]:
+                    if dependent not in waiting:
+                        waiting.add(dependent)
+                        stack.append(dependent)
+
+            graph[hook] = set(node for node in deletes[resource_type] if node not in waiting)
+            for node in graph[hook]:
+                dependents[node].add(hook)
+
+    def _pre_apply_hook_worker(self, resource_type: str) -> None:
+        try:
+            self.config.resources[resource_type].pre_apply_hook()
+        except Exception as e:
+            self.config.logger.warning(f"Error while running pre-apply hook: {str(e)}")
+
+    def _start_pre_apply_hook(self, executor: ThreadPoolExecutor, events: Queue, resource_type: str) -> None:
+        future = executor.submit(self.config.resources[resource_type].pre_apply_hook)
+        future.add_done_callback(notify(events, PRE_APPLY_HOOK_DONE, resource_type))
+
+    def _pre_apply_hook_result(self, future: Future) -> None:
+        try:
+            future.result()
+        except Exception as e:
+            self.config.logger.warning(f"Error while running pre-apply hook: {str(e)}")
+
+    def _init_diff_executor(self) -> None:
+        if self.config.diff_workers:
+            self.diff_executor = process_pool_executor(self.config.diff_workers)
 
-                self.config.logger.info(f"finished create for {resource_type} with {_id}")
+    def _shutdown_diff_executor(self) -> None:
+        if self.diff_executor:
+            self.diff_executor.shutdown()
+            self.diff_executor = None
+
+    def _compute_fingerprints(self, fingerprints: FingerprintStore) -> None:
+        resources = self.resources_manager.all_resources
+        if self.diff_executor or len(resources) < FINGERPRINT_POOL_MIN_RESOURCES or (os.cpu_count() or 1) < 2:
+            fingerprints.compute(self.config, resources, self.diff_executor)
+            return
 
+        # Hashing is CPU bound, so large syncs hash the resources in a process pool
+        executor = process_pool_executor()
+        try:
+            fingerprints.compute(self.config, resources, executor)
         finally:
-            # always place in done queue regardless of exception thrown
-            self.resource_done_queue.append(_id)
+            executor.shutdown()
+
+    def _check_diff(self, resource_config: ResourceConfig, resource: Dict, state: Dict) -> Dict:
+        if not self.diff_executor:
+            return check_diff(resource_config, resource, state)
+
+        # Diffs are CPU bound and hold the GIL. Run it in the process pool and only block this I/O worker.
+        return wait_future(
+            self.diff_executor.submit(
+                check_diff_task,
+                resource_config.excluded_attributes,
+                resource_config.excluded_attributes_re,
+                resource,
+                state,
+            )
+        )
+
+    def _worker_executor(self) -> Executor:
+        # With the async engine the workers are coroutines of its event loop instead of threads
+        if self.config.async_engine is not None:
+            return self.config.async_engine.executor(self.config.max_concurrency)
+        return thread_pool_executor(self.config.max_concurrency)
+
+    def _type_concurrency(self, resource_type: str) -> int:
+        concurrency = self.config.resources[resource_type].resource_config.concurrency
+        return min(concurrency, self.config.max_concurrency) if concurrency else self.config.max_concurrency
+
+    def _dispatch_priority_func(self, graph: Dict[Any, Set]) -> Callable[[str], Tuple]:
+        counter = count()
+        if self.config.scheduling_policy == FIFO_POLICY:
+            return lambda _id: (next(counter),)
+
+        # Dispatch nodes with the longest chain of dependents first, then those unblocking the most nodes.
+        # Bulk deletes run with the priority of their most urgent delete.
+        priorities = critical_path_priorities(graph)
+
+        def priority(node: Any) -> Tuple:
+            nodes = node.nodes if isinstance(node, CleanupBatch) else (node,)
+            return min((-priorities[n][0], -priorities[n][1]) for n in nodes) + (next(counter),)
+
+        return priority
+
+    def _apply_results(self, futures: List[Future]) -> Tuple[int, int]:
+        wait(futures)
+        successes = errors = 0
+        for future in futures:
+            try:
+                future.result()
+            except ResourceConnectionError:
+                # This should already be handled in connect_resource method
+                continue
+            except LoggedException:
+                errors += 1
+            except Exception as e:
+                self.config.logger.error(str(e))
+                errors += 1
+            else:
+                successes += 1
+
+        return successes, errors
 
     def _force_missing_dep_import_worker(self, _id: str, resource_type: str):
         try:
@@ -283,15 +938,53 @@ class ResourcesHandler:
             _id, resource_type
         )
 
+    def _cleanup_batches(
+        self, nodes: List[CleanupNode], resource_type: str
+    ) -> Iterator[Union[CleanupNode, CleanupBatch]]:
+        """Groups ready deletes of a resource type into bulk deletes if the type supports them."""
+        size = self.config.resources[resource_type].resource_config.bulk_delete_size
+        if not size or len(nodes) == 1:
+            yield from nodes
+            return
+
+        for i in range(0, len(nodes), size):
+            batch = nodes[i : i + size]
+            yield CleanupBatch(tuple(batch)) if len(batch) > 1 else batch[0]
+
+    def _cleanup_batch_worker(self, batch: CleanupBatch, resource_type: str) -> Set[str]:
+        """Deletes a batch of resources with a bulk request and returns the IDs which failed to be deleted.
+
+        Resources which the bulk request did not delete are deleted one by one, so their errors are
+        reported for each resource."""
+        _ids = [node.resource_id for node in batch.nodes]
+        self.config.logger.info(f"deleting {len(_ids)} resources of type {resource_type}")
+        try:
+            remaining = self.config.resources[resource_type].delete_resources(_ids)
+        except CustomClientHTTPError as e:
+            self.config.logger.warning(f"bulk delete of {resource_type} failed, deleting one by one: {str(e)}")
+            remaining = _ids
+
+        for _id in set(_ids).difference(remaining):
+            self._record_delete(_id, resource_type)
+            self.config.logger.info(f"succesffully deleted resource type {resource_type} with id: {_id}")
+
+        failed = set()
+        for _id in remaining:
+            try:
+                self._cleanup_worker(_id, resource_type)
+            except LoggedException:
+                failed.add(_id)
+        return failed
+
     def _cleanup_worker(self, _id: str, resource_type: str) -> None:
         self.config.logger.info(f"deleting resource type {resource_type} with id: {_id}")
         try:
             self.config.resources[resource_type].delete_resource(_id)
-            self.config.resources[resource_type].resource_config.destination_resources.pop(_id, None)
+            self._record_delete(_id, resource_type)
             self.config.logger.info(f"succesffully deleted resource type {resource_type} with id: {_id}")
         except CustomClientHTTPError as e:
             if e.status_code == 404:
-                self.config.resources[resource_type].resource_config.destination_resources.pop(_id, None)
+                self._record_delete(_id, resource_type)
                 return None
 
             self.config.logger.error(
@@ -299,6 +992,20 @@ class ResourcesHandler:
             )
             raise LoggedException(e)
 
+    def _record_delete(self, _id: str, resource_type: str) -> None:
+        self.config.resources[resource_type].resource_config.destination_resources.pop(_id, None)
+        self.config.journal.record(JOURNAL_DELETE, resource_type, _id)
+
+
+def _failed_nodes(node: Union[str, CleanupNode, CleanupBatch], future: Future) -> Set:
+    """Returns the nodes of a finished worker which failed."""
+    if future.exception() is not None:
+        return set(node.nodes) if isinstance(node, CleanupBatch) else {node}
+    if isinstance(node, CleanupBatch):
+        failed_ids = future.result()
+        return set(batch_node for batch_node in node.nodes if batch_node.resource_id in failed_ids)
+    return set()
+
 
 def _cleanup_prompt(config: Configuration, resources_to_cleanup: Dict[str, str], prompt: bool = True) -> bool:
     if config.cleanup == FORCE or not prompt:
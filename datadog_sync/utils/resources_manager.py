@@ -4,9 +4,10 @@
 # Copyright 2019 Datadog, Inc.
 
 from __future__ import annotations
+import re
 from copy import deepcopy
-from collections import deque
-from typing import TYPE_CHECKING, Dict, List, Set
+from collections import defaultdict, deque
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Set
 
 from datadog_sync.constants import FALSE
 from datadog_sync.utils.resource_utils import find_attr
@@ -16,53 +17,140 @@ if TYPE_CHECKING:
 
 
 class ResourcesManager:
-    def __init__(self, config: Configuration) -> None:
+    def __init__(self, config: Configuration, plan: Optional[Dict[str, Any]] = None) -> None:
         self.config: Configuration = config
         self.all_resources: Dict[str, str] = {}  # mapping of all resources to its resource_type
         self.all_cleanup_resources: Dict[str, str] = {}  # mapping of all resources to cleanup
         self.dependencies_graph: Dict[str, Set[str]] = {}  # dependency graph
         self.missing_resources_queue: deque = deque()  # queue for missing resources
 
+        if plan is not None:
+            self._populate_from_plan(plan)
+            return
+
         for resource_type in config.resources_arg:
             for _id, _ in config.resources[resource_type].resource_config.source_resources.items():
                 self.all_resources[_id] = resource_type
                 # individual resource dependency graph
                 self.dependencies_graph[_id] = self._resource_connections(_id, resource_type)
 
-            if self.config.cleanup != FALSE:
-                # populate resources to cleanup
-                source_resources = set(config.resources[resource_type].resource_config.source_resources.keys())
-                destination_resources = set(
-                    config.resources[resource_type].resource_config.destination_resources.keys()
-                )
+        self.populate_cleanup_resources()
+
+    def populate_cleanup_resources(self) -> None:
+        self.all_cleanup_resources.clear()
+        if self.config.cleanup == FALSE:
+            return
+
+        for resource_type in self.config.resources_arg:
+            # populate resources to cleanup
+            source_resources = set(self.config.resources[resource_type].resource_config.source_resources.keys())
+            destination_resources = set(
+                self.config.resources[resource_type].resource_config.destination_resources.keys()
+            )
+
+            for cleanup_id in destination_resources.difference(source_resources):
+                self.all_cleanup_resources[cleanup_id] = resource_type
+
+    def cleanup_dependencies(self) -> Dict[str, Set[str]]:
+        """Returns the resources which have to be deleted or synced before each resource to cleanup.
 
-                for cleanup_id in destination_resources.difference(source_resources):
-                    self.all_cleanup_resources[cleanup_id] = resource_type
+        A resource still referenced by another destination resource cannot be deleted. It is deleted once
+        the resources to cleanup referencing it are deleted, and the synced resources referencing it are updated.
+        """
+        dependencies: Dict[str, Set[str]] = {_id: set() for _id in self.all_cleanup_resources}
+        if not dependencies:
+            return dependencies
+
+        # mapping of the destination ids of resources to cleanup to their source ids, per resource_type
+        cleanup_ids: Dict[str, Dict[str, str]] = defaultdict(dict)
+        for _id, resource_type in self.all_cleanup_resources.items():
+            resource = self.config.resources[resource_type].resource_config.destination_resources[_id]
+            for destination_id in _destination_ids(resource):
+                cleanup_ids[resource_type][destination_id] = _id
+
+        referencing = list(self.all_cleanup_resources.items()) + [
+            (_id, resource_type)
+            for _id, resource_type in self.all_resources.items()
+            if _id in self.config.resources[resource_type].resource_config.destination_resources
+        ]
+        for _id, resource_type in referencing:
+            resource_config = self.config.resources[resource_type].resource_config
+            for resource_to_connect, attr_connections in (resource_config.resource_connections or {}).items():
+                if resource_to_connect not in cleanup_ids:
+                    continue
+
+                for reference in _references(resource_config.destination_resources[_id], attr_connections):
+                    referenced = cleanup_ids[resource_to_connect].get(reference)
+                    if referenced is not None and referenced != _id:
+                        dependencies[referenced].add(_id)
+
+        return dependencies
+
+    def _populate_from_plan(self, plan: Dict[str, Any]) -> None:
+        # Only resources the plan creates or updates are applied
+        for resource_type, ids in plan["creates"].items():
+            for _id in ids:
+                self.all_resources[_id] = resource_type
+        for resource_type, diffs in plan["updates"].items():
+            for _id in diffs:
+                self.all_resources[_id] = resource_type
+        for _id in self.all_resources:
+            self.dependencies_graph[_id] = set(plan["dependencies"].get(_id, []))
+        for resource_type, ids in plan["deletes"].items():
+            for _id in ids:
+                self.all_cleanup_resources[_id] = resource_type
 
     def _resource_connections(self, _id: str, resource_type: str) -> Set[str]:
-        failed_connections: List[str] = []
+        failed_connections: Set[str] = set()
+        for failed in self._resource_connections_by_type(_id, resource_type).values():
+            failed_connections.update(failed)
+        return failed_connections
+
+    def _resource_connections_by_type(
+        self, _id: str, resource_type: str, queue_missing: bool = True
+    ) -> Dict[str, Set[str]]:
+        failed_connections: Dict[str, Set[str]] = {}
 
         if not self.config.resources[resource_type].resource_config.resource_connections:
-            return set(failed_connections)
+            return failed_connections
 
         resource = deepcopy(self.config.resources[resource_type].resource_config.source_resources[_id])
-        if self.config.resources[resource_type].resource_config.resource_connections:
-            for resource_to_connect, v in self.config.resources[
-                resource_type
-            ].resource_config.resource_connections.items():
-                for attr_connection in v:
-                    failed = find_attr(
-                        attr_connection,
-                        resource_to_connect,
-                        resource,
-                        self.config.resources[resource_type].connect_id,
-                    )
-                    if failed:
-                        # After retrieving all of the failed connections, we check if
-                        # the resources are imported. Otherwise append to missing with its type.
+        for resource_to_connect, v in self.config.resources[resource_type].resource_config.resource_connections.items():
+            for attr_connection in v:
+                failed = find_attr(
+                    attr_connection,
+                    resource_to_connect,
+                    resource,
+                    self.config.resources[resource_type].connect_id,
+                )
+                if failed:
+                    # After retrieving all of the failed connections, we check if
+                    # the resources are imported. Otherwise append to missing with its type.
+                    if queue_missing:
                         for f_id in failed:
                             if f_id not in self.config.resources[resource_to_connect].resource_config.source_resources:
                                 self.missing_resources_queue.append((f_id, resource_to_connect))
 
-                        failed_connections.extend(failed)
-        return set(failed_connections)
+                    failed_connections.setdefault(resource_to_connect, set()).update(failed)
+        return failed_connections
+
+
+def _destination_ids(resource: Any) -> List[str]:
+    if not isinstance(resource, dict):
+        return []
+    return [str(resource[attr]) for attr in ("id", "public_id") if resource.get(attr) is not None]
+
+
+def _references(resource: Dict, attr_connections: List[str]) -> Set[str]:
+    """Returns the tokens of the connected attributes of a destination resource which could be resource ids."""
+    references: Set[str] = set()
+
+    def collect(key: str, r_obj: Dict, resource_to_connect: str) -> None:
+        values = r_obj[key] if isinstance(r_obj[key], list) else [r_obj[key]]
+        for value in values:
+            # ids may be embedded in other values, e.g. composite monitor queries
+            references.update(re.findall(r"[\w-]+", str(value)))
+
+    for attr_connection in attr_connections:
+        find_attr(attr_connection, "", resource, collect)
+    return references
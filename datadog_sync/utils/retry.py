@@ -0,0 +1,109 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+import logging
+import time
+from dataclasses import dataclass
+from threading import Lock
+from typing import Any, Dict, Optional
+
+from datadog_sync.constants import LOGGER_NAME
+from datadog_sync.utils.resource_utils import CustomClientHTTPError
+
+
+log = logging.getLogger(LOGGER_NAME)
+
+
+class RetryBudget:
+    """Caps the retries of server errors to a share of the requests sent.
+
+    Every request adds `ratio` retries to the budget, which holds at most `reserve` retries. Once it is
+    spent, failing requests fail right away instead of piling more load on a struggling API.
+    """
+
+    def __init__(self, ratio: float = 0.1, reserve: int = 20) -> None:
+        self.ratio = ratio
+        self.reserve = reserve
+        self.balance = float(reserve)
+        self.retries = 0
+        self.denied = 0
+        self._lock = Lock()
+
+    def deposit(self) -> None:
+        with self._lock:
+            self.balance = min(self.reserve, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """Returns True if a retry fits in the budget."""
+        with self._lock:
+            if self.balance < 1:
+                self.denied += 1
+                return False
+            self.balance -= 1
+            self.retries += 1
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"retries": self.retries, "retries_denied": self.denied}
+
+
+@dataclass
+class _Circuit:
+    failures: int = 0
+    opened_at: Optional[float] = None
+    probe_started: Optional[float] = None
+    last_response: Any = None
+
+
+class CircuitBreaker:
+    """Fails requests to an endpoint right away while the endpoint is broken.
+
+    The circuit of an endpoint opens after `failure_threshold` consecutive server errors. Requests to it
+    fail with the last server error until `cooldown` seconds passed. A single request is then let through,
+    which closes the circuit if it succeeds and opens it again otherwise.
+    """
+
+    def __init__(self, failure_threshold: int = 5, cooldown: float = 30) -> None:
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.circuits: Dict[str, _Circuit] = {}
+        self.opened = 0
+        self.fast_failures = 0
+        self._lock = Lock()
+
+    def check(self, endpoint: str) -> None:
+        """Raises CustomClientHTTPError if the circuit of the endpoint is open."""
+        now = time.monotonic()
+        with self._lock:
+            circuit = self.circuits.get(endpoint)
+            if circuit is None or circuit.opened_at is None:
+                return
+
+            probing = circuit.probe_started is not None and now - circuit.probe_started < self.cooldown
+            if now - circuit.opened_at < self.cooldown or probing:
+                self.fast_failures += 1
+                raise CustomClientHTTPError(circuit.last_response)
+            circuit.probe_started = now
+
+    def record(self, endpoint: str, response: Any) -> None:
+        with self._lock:
+            if response.status_code < 500:
+                self.circuits.pop(endpoint, None)
+                return
+
+            circuit = self.circuits.setdefault(endpoint, _Circuit())
+            circuit.failures += 1
+            circuit.last_response = response
+            if circuit.probe_started is not None or circuit.failures == self.failure_threshold:
+                circuit.opened_at = time.monotonic()
+                circuit.probe_started = None
+                self.opened += 1
+                log.warning(f"{endpoint} is failing. Failing its requests for {self.cooldown}s")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"circuits_opened": self.opened, "fast_failures": self.fast_failures}
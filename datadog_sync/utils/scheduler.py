@@ -0,0 +1,252 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from queue import Queue
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
+
+# Events placed in the scheduler queue by the done callbacks of submitted futures
+RESOURCE_DONE = "resource_done"
+RESOURCES_LISTED = "resources_listed"
+RESOURCE_IMPORTED = "resource_imported"
+PRE_APPLY_HOOK_DONE = "pre_apply_hook_done"
+# Event placed in the scheduler queue by listing workers for each listed resource, as `(RESOURCE_FOUND, resource,
+# resource_type, None)`. They precede the RESOURCES_LISTED event of the listing.
+RESOURCE_FOUND = "resource_found"
+
+
+class CleanupNode(NamedTuple):
+    """Node of the dependency graph deleting a resource from the destination org."""
+
+    resource_id: str
+
+
+class CleanupBatch(NamedTuple):
+    """Cleanup nodes of a resource type deleted together with a bulk delete request."""
+
+    nodes: Tuple[CleanupNode, ...]
+
+
+@dataclass(frozen=True)
+class PreApplyHookNode:
+    """Node of the dependency graph running the pre-apply hook of a resource type.
+
+    Not a tuple, so it never equals the cleanup node of a resource whose ID is a resource type."""
+
+    resource_type: str
+
+
+class ResourceDispatcher:
+    """Hands ready resources to the executor.
+
+    Ready resources wait in a priority queue per resource type. Only as many resources as there are
+    workers are submitted at once, and the highest priority ready resource of a type that is under
+    its concurrency limit always runs next. Finished resources are reported to `events` as
+    `(RESOURCE_DONE, _id, resource_type, future)`.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_workers: int,
+        type_concurrency: Callable[[str], int],
+        priority: Callable[[str], Tuple],
+        events: Queue,
+    ) -> None:
+        self.executor = executor
+        self.max_workers = max_workers
+        self.type_concurrency = type_concurrency
+        self.priority = priority
+        self.events = events
+        self.ready: Dict[str, List] = defaultdict(list)
+        self.running: Dict[str, int] = defaultdict(int)
+        self.total_running = 0
+
+    def push(self, _id: str, resource_type: str) -> None:
+        heappush(self.ready[resource_type], (self.priority(_id), _id))
+
+    def has_ready(self) -> bool:
+        return any(self.ready.values())
+
+    def dispatch(self, func: Callable[[str, str], Any]) -> List[Future]:
+        futures = []
+        while self.total_running < self.max_workers:
+            candidates = [
+                (queue[0], resource_type)
+                for resource_type, queue in self.ready.items()
+                if queue and self.running[resource_type] < self.type_concurrency(resource_type)
+            ]
+            if not candidates:
+                break
+
+            _, resource_type = min(candidates)
+            _, _id = heappop(self.ready[resource_type])
+            future = self.executor.submit(func, _id, resource_type)
+            future.add_done_callback(notify(self.events, RESOURCE_DONE, _id, resource_type))
+            futures.append(future)
+            self.running[resource_type] += 1
+            self.total_running += 1
+
+        return futures
+
+    def task_done(self, resource_type: str) -> None:
+        self.running[resource_type] -= 1
+        self.total_running -= 1
+
+
+class PipelineGraph:
+    """Dependency graph which grows while resources are being imported.
+
+    A node is ready once each of its dependencies finished syncing, or will never be synced because its
+    resource type finished importing without it or is not part of the run.
+    """
+
+    def __init__(self, resource_types: Iterable[str]) -> None:
+        self.importing_types: Set[str] = set(resource_types)
+        self.nodes: Dict[str, str] = {}  # mapping of registered nodes to their resource_type
+        self.done: Set[str] = set()
+        self.failed: Set[str] = set()  # failed nodes and the nodes skipped because they depend on one
+        self.skipped: List[Tuple[str, Set[str]]] = []  # skipped nodes and their failed dependencies
+        self.waiting: Dict[str, Dict[str, str]] = {}  # mapping of nodes to their unresolved dependencies
+        self.dependents: Dict[str, Set[str]] = defaultdict(set)
+        self.dependency_types: Dict[str, str] = {}
+
+    def add(self, _id: str, resource_type: str, dependencies: Dict[str, Set[str]]) -> bool:
+        """Registers a node and returns True if it is ready to be synced."""
+        self.nodes[_id] = resource_type
+        unresolved = {}
+        failed = set()
+        for dependency_type, ids in dependencies.items():
+            for dependency in ids:
+                if dependency in self.failed:
+                    failed.add(dependency)
+                elif not self._is_resolved(dependency, dependency_type):
+                    unresolved[dependency] = dependency_type
+
+        if failed:
+            self._skip(_id, failed)
+            return False
+
+        if not unresolved:
+            return True
+
+        self.waiting[_id] = unresolved
+        for dependency, dependency_type in unresolved.items():
+            self.dependents[dependency].add(_id)
+            self.dependency_types[dependency] = dependency_type
+        return False
+
+    def mark_done(self, _id: str) -> List[str]:
+        """Marks a node as synced and returns the nodes it unblocked."""
+        self.done.add(_id)
+        return self._resolve(_id)
+
+    def mark_failed(self, _id: str) -> None:
+        """Marks a node as failed and skips the nodes depending on it."""
+        self.failed.add(_id)
+        self._skip_dependents(_id)
+
+    def pop_skipped(self) -> List[Tuple[str, Set[str]]]:
+        """Returns the nodes skipped since the last call along with their failed dependencies."""
+        skipped, self.skipped = self.skipped, []
+        return skipped
+
+    def mark_imported(self, resource_type: str) -> List[str]:
+        """Marks a resource type as imported and returns the nodes unblocked by resources it did not import."""
+        self.importing_types.discard(resource_type)
+        ready = []
+        for dependency, dependency_type in list(self.dependency_types.items()):
+            if dependency_type == resource_type and dependency not in self.nodes:
+                ready.extend(self._resolve(dependency))
+        return ready
+
+    def _skip(self, _id: str, failed_dependencies: Set[str]) -> None:
+        self.failed.add(_id)
+        self.skipped.append((_id, failed_dependencies))
+        self._skip_dependents(_id)
+
+    def _skip_dependents(self, _id: str) -> None:
+        failed_nodes = [_id]
+        while failed_nodes:
+            failed = failed_nodes.pop()
+            self.dependency_types.pop(failed, None)
+            for node in self.dependents.pop(failed, set()):
+                if node in self.failed:
+                    continue
+                for dependency in self.waiting.pop(node):
+                    if dependency != failed:
+                        self.dependents[dependency].discard(node)
+                self.failed.add(node)
+                self.skipped.append((node, {failed}))
+                failed_nodes.append(node)
+
+    def _is_resolved(self, dependency: str, dependency_type: str) -> bool:
+        if dependency in self.done:
+            return True
+        return dependency_type not in self.importing_types and dependency not in self.nodes
+
+    def _resolve(self, dependency: str) -> List[str]:
+        self.dependency_types.pop(dependency, None)
+        ready = []
+        for node in self.dependents.pop(dependency, set()):
+            self.waiting[node].pop(dependency, None)
+            if not self.waiting[node]:
+                self.waiting.pop(node)
+                ready.append(node)
+        return ready
+
+
+# Keys captured by the current worker and the RecordingDict they are captured from. Worker threads and the
+# async workers sharing the event loop thread each run in their own context.
+_captured: ContextVar[Optional[Tuple[RecordingDict, List[Any]]]] = ContextVar("captured", default=None)
+
+
+class RecordingDict(dict):
+    """Dict recording the keys assigned to it so imported resources can be picked up as soon as they land."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.new_keys: deque = deque()
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.new_keys.append(key)
+        captured = _captured.get()
+        if captured is not None and captured[0] is self:
+            captured[1].append(key)
+
+    @contextmanager
+    def capture(self) -> Iterator[List[Any]]:
+        """Collects the keys assigned by the current worker."""
+        keys: List[Any] = []
+        token = _captured.set((self, keys))
+        try:
+            yield keys
+        finally:
+            _captured.reset(token)
+
+    def pop_new_keys(self) -> List[Any]:
+        keys = []
+        while self.new_keys:
+            keys.append(self.new_keys.popleft())
+        return keys
+
+
+def notify(events: Queue, event: str, *args: Any) -> Callable[[Future], None]:
+    """Returns a future done callback placing `(event, *args, future)` in the events queue."""
+
+    def callback(future: Future) -> None:
+        events.put((event, *args, future))
+
+    return callback
@@ -0,0 +1,48 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from __future__ import annotations
+from concurrent.futures import Future
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable
+
+from datadog_sync.utils.async_worker import wait_future
+
+
+class SingleFlight:
+    """Runs a single call at a time per key and shares its result with the callers waiting on it.
+
+    Callers making a call while the same call is in flight wait for it to finish and get its result,
+    or its exception, instead of making the call again. Async workers wait without blocking the event loop.
+    """
+
+    def __init__(self) -> None:
+        self.calls: Dict[Hashable, Future] = {}
+        self.coalesced = 0
+        self._lock = Lock()
+
+    def do(self, key: Hashable, func: Callable, *args, **kwargs) -> Any:
+        with self._lock:
+            future = self.calls.get(key)
+            leader = future is None
+            if leader:
+                future = self.calls[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            return wait_future(future)
+
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self.calls[key]
+        return future.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"coalesced_requests": self.coalesced}
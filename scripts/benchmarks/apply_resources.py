@@ -0,0 +1,142 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+"""Benchmark `ResourcesHandler.apply_resources` against a local fake API.
+
+Generates a synthetic graph of monitors where a share of them are composite monitors
+depending on previously generated monitors, and syncs it to a fake destination API
+served from a separate process. Reports wall-clock time, process CPU time and the CPU
+time spent by the dispatching (main) thread.
+
+Usage: python scripts/benchmarks/apply_resources.py --nodes 10000 --latency 0.005
+"""
+
+import os
+import json
+import time
+import random
+import logging
+import argparse
+import tempfile
+import itertools
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from datadog_sync.constants import ASYNC_ENGINE, DESTINATION_RESOURCES_DIR, FALSE, SOURCE_RESOURCES_DIR, THREADS_ENGINE
+from datadog_sync.utils.async_client import AsyncEngine, AsyncEngineClient
+from datadog_sync.utils.configuration import Configuration, init_resources
+from datadog_sync.utils.custom_client import CustomClient
+from datadog_sync.utils.resources_handler import ResourcesHandler
+
+
+def run_fake_api(port, latency):
+    ids = itertools.count(1)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _respond(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            body = json.loads(self.rfile.read(length) or b"{}")
+            if isinstance(body, dict) and self.command == "POST":
+                body["id"] = next(ids)
+            time.sleep(latency)
+
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        do_GET = do_POST = do_PUT = do_PATCH = do_DELETE = _respond
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+def generate_monitors(nodes, composite_ratio, seed):
+    rand = random.Random(seed)
+    monitors = {}
+    for i in range(1, nodes + 1):
+        _id = str(i)
+        if i > 2 and rand.random() < composite_ratio:
+            a, b = rand.sample(range(1, i), 2)
+            monitors[_id] = {"id": i, "type": "composite", "name": f"composite {i}", "query": f"{a} && {b}"}
+        else:
+            monitors[_id] = {"id": i, "type": "metric alert", "name": f"monitor {i}", "query": "avg(last_5m):1 > 2"}
+    return monitors
+
+
+def build_benchmark_config(host, max_workers, engine):
+    logger = logging.getLogger("datadog_sync_benchmark")
+    logger.setLevel(logging.WARNING)
+    auth = {"apiKeyAuth": "fake", "appKeyAuth": "fake"}
+    async_engine = None
+    if engine == ASYNC_ENGINE:
+        async_engine = AsyncEngine()
+        client = AsyncEngineClient(async_engine, host, auth, 60, 30, max_workers)
+    else:
+        client = CustomClient(host, auth, 60, 30)
+    cfg = Configuration(
+        logger=logger,
+        source_client=client,
+        destination_client=client,
+        filters={},
+        filter_operator="OR",
+        force_missing_dependencies=False,
+        skip_failed_resource_connections=True,
+        max_workers=max_workers,
+        cleanup=FALSE,
+        async_engine=async_engine,
+    )
+    cfg.resources = init_resources(cfg)
+    cfg.resources_arg = ["monitors"]
+    return cfg
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark apply_resources against a local fake API.")
+    parser.add_argument("--nodes", type=int, default=10000, help="Number of monitors in the graph.")
+    parser.add_argument("--composite-ratio", type=float, default=0.3, help="Share of composite monitors.")
+    parser.add_argument("--latency", type=float, default=0.005, help="Fake API latency in seconds.")
+    parser.add_argument("--max-workers", type=int, default=10, help="Workers.")
+    parser.add_argument("--port", type=int, default=8765, help="Fake API port.")
+    parser.add_argument("--engine", choices=[THREADS_ENGINE, ASYNC_ENGINE], default=THREADS_ENGINE, help="Engine.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated graph.")
+    args = parser.parse_args()
+
+    server = multiprocessing.Process(target=run_fake_api, args=(args.port, args.latency), daemon=True)
+    server.start()
+    time.sleep(0.5)
+
+    os.chdir(tempfile.mkdtemp())
+    os.makedirs(SOURCE_RESOURCES_DIR, exist_ok=True)
+    os.makedirs(DESTINATION_RESOURCES_DIR, exist_ok=True)
+    with open(os.path.join(SOURCE_RESOURCES_DIR, "monitors.json"), "w") as f:
+        json.dump(generate_monitors(args.nodes, args.composite_ratio, args.seed), f)
+
+    try:
+        cfg = build_benchmark_config(f"http://127.0.0.1:{args.port}", args.max_workers, args.engine)
+        handler = ResourcesHandler(cfg)
+
+        wall_start, cpu_start, thread_start = time.perf_counter(), time.process_time(), time.thread_time()
+        successes, errors = handler.apply_resources()
+        wall = time.perf_counter() - wall_start
+        cpu = time.process_time() - cpu_start
+        thread_cpu = time.thread_time() - thread_start
+    finally:
+        server.terminate()
+
+    print(f"nodes={args.nodes} successes={successes} errors={errors}")
+    print(f"wall={wall:.2f}s process_cpu={cpu:.2f}s main_thread_cpu={thread_cpu:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
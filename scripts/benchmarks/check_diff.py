@@ -0,0 +1,138 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+"""Benchmark `check_diff` against DeepDiff on dashboards with large widget trees.
+
+Generates dashboards with nested group widgets and diffs them against modified copies:
+an identical copy, a copy with a single changed query, a copy with its widgets reordered
+and a copy with a share of its widgets changed. Reports the time taken by DeepDiff and by
+`check_diff` for each case, and checks that both report the same changes.
+
+Usage: python scripts/benchmarks/check_diff.py --dashboards 20 --widgets 200
+"""
+
+import copy
+import time
+import random
+import argparse
+
+from deepdiff import DeepDiff
+
+from datadog_sync.models import Dashboards
+from datadog_sync.utils.resource_utils import check_diff
+
+
+def generate_widget(rand, i, depth=0):
+    if depth == 0 and rand.random() < 0.2:
+        return {
+            "id": i,
+            "definition": {
+                "type": "group",
+                "title": f"group {i}",
+                "widgets": [generate_widget(rand, i * 100 + j, depth + 1) for j in range(rand.randint(2, 8))],
+            },
+        }
+    return {
+        "id": i,
+        "definition": {
+            "type": "timeseries",
+            "title": f"widget {i}",
+            "requests": [
+                {
+                    "q": f"avg:system.cpu.user{{host:host-{rand.randint(0, 50)}}} by {{service}}",
+                    "display_type": "line",
+                    "style": {"palette": "dog_classic", "line_type": "solid", "line_width": "normal"},
+                }
+                for _ in range(rand.randint(1, 3))
+            ],
+            "markers": [{"value": f"y = {rand.randint(0, 100)}", "display_type": "error dashed"}],
+            "yaxis": {"scale": "linear", "min": "auto", "max": "auto", "include_zero": True},
+        },
+        "layout": {"x": rand.randint(0, 11), "y": rand.randint(0, 100), "width": 4, "height": 2},
+    }
+
+
+def generate_dashboard(rand, i, widgets):
+    return {
+        "id": f"abc-{i}",
+        "title": f"dashboard {i}",
+        "layout_type": "ordered",
+        "author_handle": "user@example.com",
+        "created_at": "2023-01-01T00:00:00.000000+00:00",
+        "modified_at": "2023-01-02T00:00:00.000000+00:00",
+        "template_variables": [{"name": "env", "prefix": "env", "default": "prod"}],
+        "widgets": [generate_widget(rand, j) for j in range(widgets)],
+    }
+
+
+def modified_copies(rand, dashboard, changed_ratio):
+    identical = copy.deepcopy(dashboard)
+    identical["modified_at"] = "2023-02-01T00:00:00.000000+00:00"
+
+    single_change = copy.deepcopy(identical)
+    single_change["widgets"][-1]["definition"]["title"] = "changed"
+
+    reordered = copy.deepcopy(identical)
+    rand.shuffle(reordered["widgets"])
+
+    many_changes = copy.deepcopy(identical)
+    for widget in many_changes["widgets"]:
+        if rand.random() < changed_ratio:
+            widget["definition"]["title"] += " changed"
+
+    return {
+        "identical": identical,
+        "single change": single_change,
+        "reordered": reordered,
+        "many changes": many_changes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark check_diff against DeepDiff.")
+    parser.add_argument("--dashboards", type=int, default=20, help="Number of dashboards.")
+    parser.add_argument("--widgets", type=int, default=200, help="Top level widgets per dashboard.")
+    parser.add_argument("--changed-ratio", type=float, default=0.05, help="Share of widgets changed.")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the generated dashboards.")
+    args = parser.parse_args()
+
+    rand = random.Random(args.seed)
+    resource_config = Dashboards.resource_config
+    dashboards = [generate_dashboard(rand, i, args.widgets) for i in range(args.dashboards)]
+    cases = [modified_copies(rand, dashboard, args.changed_ratio) for dashboard in dashboards]
+
+    print(f"dashboards={args.dashboards} widgets={args.widgets}")
+    for case in cases[0]:
+        deepdiff_time = check_diff_time = 0.0
+        mismatches = 0
+        for dashboard, copies in zip(dashboards, cases):
+            start = time.perf_counter()
+            expected = DeepDiff(
+                dashboard,
+                copies[case],
+                ignore_order=True,
+                exclude_paths=resource_config.excluded_attributes,
+                exclude_regex_paths=resource_config.excluded_attributes_re,
+            ).to_dict()
+            deepdiff_time += time.perf_counter() - start
+
+            start = time.perf_counter()
+            result = check_diff(resource_config, dashboard, copies[case])
+            check_diff_time += time.perf_counter() - start
+
+            for report_type in ("dictionary_item_added", "dictionary_item_removed"):
+                if report_type in expected:
+                    expected[report_type] = sorted(expected[report_type])
+                    result[report_type] = sorted(result[report_type])
+            mismatches += expected != result
+
+        print(
+            f"{case:<14} deepdiff={deepdiff_time:.3f}s check_diff={check_diff_time:.3f}s "
+            f"speedup={deepdiff_time / check_diff_time:.1f}x mismatches={mismatches}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from datadog_sync.utils import custom_client
+from datadog_sync.utils.async_client import AsyncEngine, AsyncEngineClient
+from datadog_sync.utils.resource_utils import CustomClientHTTPError
+
+
+@pytest.fixture
+def fake_api():
+    calls = []
+    in_flight = [0, 0]  # current and highest number of requests being served
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            calls.append(self.path)
+            status = 500 if self.path.startswith("/flaky") and len(calls) == 1 else 200
+            status = 404 if self.path.startswith("/missing") else status
+            body = {"path": self.path}
+            if self.path.startswith("/slow"):
+                with lock:
+                    in_flight[0] += 1
+                    in_flight[1] = max(in_flight)
+                time.sleep(0.2)
+                with lock:
+                    in_flight[0] -= 1
+            if self.path.startswith("/pages"):
+                page = int(parse_qs(urlparse(self.path).query)["page[number]"][0])
+                body = {"data": list(range(page * 2, min(page * 2 + 2, 5))), "meta": {"page": {"total_count": 5}}}
+            payload = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", calls, in_flight
+    server.shutdown()
+
+
+@pytest.fixture
+def engine():
+    engine = AsyncEngine()
+    yield engine
+    engine.shutdown()
+
+
+def test_async_engine_client_get(fake_api, engine):
+    host, calls, _ = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10)
+
+    resp = client.get("/api/v1/monitor", params={"force": True})
+
+    assert resp.status_code == 200
+    assert resp.json() == {"path": "/api/v1/monitor?force=True"}
+
+
+def test_async_engine_client_retries(fake_api, engine):
+    host, calls, _ = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10)
+
+    resp = client.get("/flaky")
+
+    assert resp.status_code == 200
+    assert len(calls) == 2
+
+
+def test_async_engine_client_releases_slot_between_retries(fake_api, engine, monkeypatch):
+    host, calls, _ = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10, 1)
+    in_flight = []
+
+    async def sleep(delay):
+        in_flight.append(client.limiter.in_flight)
+
+    monkeypatch.setattr(custom_client, "asyncio", SimpleNamespace(sleep=sleep))
+    resp = client.get("/flaky")
+
+    assert resp.status_code == 200
+    assert len(calls) == 2
+    # Like the threads engine, the in-flight slot is only held while a request is sent
+    assert in_flight == [0, 0, 0]
+    assert client.limiter.in_flight == 0
+
+
+def test_async_engine_client_error(fake_api, engine):
+    host, _, _ = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10)
+
+    with pytest.raises(CustomClientHTTPError) as e:
+        client.get("/missing")
+    assert e.value.status_code == 404
+
+
+def test_async_engine_client_reuses_connections(fake_api, engine):
+    host, _, _ = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10)
+
+    for _ in range(3):
+        client.get("/api/v1/monitor")
+
+    assert client.connection_stats() == {"new_connections": 1, "reused_connections": 2}
+
+
+def test_async_workers(fake_api, engine):
+    host, _, in_flight = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10, 4)
+    executor = engine.executor()
+    threads = set()
+
+    def worker(i):
+        threads.add(threading.get_ident())
+        return client.get(f"/slow/{i}").json()["path"]
+
+    start = time.monotonic()
+    paths = list(executor.map(worker, range(8)))
+    executor.shutdown()
+
+    assert paths == [f"/slow/{i}" for i in range(8)]
+    # The workers share the event loop thread and their requests are only bounded by the limiter
+    assert threads == {engine._thread.ident}
+    assert in_flight[1] == 4
+    assert time.monotonic() - start < 8 * 0.2
+
+
+def test_async_workers_single_flight(fake_api, engine):
+    host, calls, _ = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10, 4)
+    executor = engine.executor()
+
+    responses = [executor.submit(client.get, "/slow") for _ in range(3)]
+    executor.shutdown()
+
+    assert [future.result().status_code for future in responses] == [200] * 3
+    assert calls == ["/slow"]
+    assert client.single_flight.stats() == {"coalesced_requests": 2}
+
+
+def test_async_workers_paginated_request(fake_api, engine):
+    host, _, _ = fake_api
+    client = AsyncEngineClient(engine, host, {"apiKeyAuth": "123", "appKeyAuth": "123"}, 10, 10, 4, 2)
+    client.default_pagination.page_size = 2
+    executor = engine.executor()
+
+    future = executor.submit(client.paginated_request(client.get), "/pages")
+
+    assert future.result(timeout=10) == [0, 1, 2, 3, 4]
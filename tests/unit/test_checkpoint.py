@@ -0,0 +1,62 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import os
+
+from datadog_sync.utils.checkpoint import ImportCheckpoint, ImportIndex, list_key, list_version
+
+
+def test_import_checkpoint_resume(tmp_path):
+    directory = str(tmp_path / "checkpoints")
+    checkpoint = ImportCheckpoint(False, directory)
+    checkpoint.start(["dashboards"])
+    checkpoint.record("dashboards", {"id": "a", "modified_at": "1"}, {"a": {"title": "a"}})
+    checkpoint.record("dashboards", {"id": "b", "modified_at": "1"}, {"b": {"title": "b"}})
+
+    resumed = ImportCheckpoint(True, directory)
+    resumed.start(["dashboards"])
+    assert resumed.session == checkpoint.session
+    assert resumed.lookup("dashboards", {"id": "a", "modified_at": "1"}) == {"a": {"title": "a"}}
+    # Modified since it was imported
+    assert resumed.lookup("dashboards", {"id": "b", "modified_at": "2"}) is None
+    assert resumed.lookup("dashboards", {"id": "c"}) is None
+
+    # A new session discards the previous checkpoints
+    restarted = ImportCheckpoint(False, directory)
+    restarted.start(["dashboards"])
+    assert restarted.session != checkpoint.session
+    assert restarted.lookup("dashboards", {"id": "a", "modified_at": "1"}) is None
+
+    restarted.finish()
+    assert not os.path.exists(directory)
+
+
+def test_import_index(tmp_path):
+    directory = str(tmp_path / "index")
+    index = ImportIndex(directory)
+    index.record("synthetics_tests", {"public_id": "abc", "modified_at": "1"}, ["abc#1"])
+    index.record("synthetics_tests", {"public_id": "def", "modified_at": "1"}, ["def#2"])
+    index.record("synthetics_tests", {"public_id": "ghi"}, ["ghi#3"])
+    index.write("synthetics_tests")
+
+    state = {"abc#1": {"name": "a"}, "ghi#3": {"name": "c"}}
+    incremental = ImportIndex(directory)
+    incremental.load("synthetics_tests")
+    assert incremental.lookup("synthetics_tests", {"public_id": "abc", "modified_at": "1"}, state) == {
+        "abc#1": {"name": "a"}
+    }
+    assert incremental.lookup("synthetics_tests", {"public_id": "abc", "modified_at": "2"}, state) is None
+    # Missing from the state file
+    assert incremental.lookup("synthetics_tests", {"public_id": "def", "modified_at": "1"}, state) is None
+    # Without a modification date, resources are always imported
+    assert incremental.lookup("synthetics_tests", {"public_id": "ghi"}, state) is None
+
+
+def test_list_key_and_version():
+    assert list_key({"public_id": "abc-def", "name": "test"}) == "public_id:abc-def"
+    assert list_key({"tags": []}) is None
+    assert list_version({"id": 1, "modified": "2023"}) == "2023"
+    assert list_version({"id": 1, "attributes": {"modified_at": 1700000000}}) == "1700000000"
+    assert list_version({"id": 1}) is None
@@ -0,0 +1,91 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import logging
+
+import pytest
+
+from datadog_sync.constants import CMD_IMPORT
+from datadog_sync.utils.configuration import build_config, log_client_stats, process_type_concurrency
+
+
+@pytest.mark.parametrize(
+    "type_concurrency, expected",
+    [
+        (None, {}),
+        ("dashboards=4", {"dashboards": 4}),
+        ("dashboards=4,Monitors=16", {"dashboards": 4, "monitors": 16}),
+        ("dashboards=4,monitors", {"dashboards": 4}),
+        ("dashboards=four,monitors=16", {"monitors": 16}),
+        ("dashboards=0", {}),
+    ],
+)
+def test_process_type_concurrency(type_concurrency, expected):
+    assert process_type_concurrency(type_concurrency) == expected
+
+
+def test_invalid_type_concurrency(caplog):
+    process_type_concurrency("dashboards:4")
+    assert "invalid type concurrency" in caplog.text
+
+
+@pytest.mark.parametrize("max_concurrency, expected", [(None, 1), (4, 4), (0, 1)])
+def test_build_config_max_concurrency(tmp_path, monkeypatch, max_concurrency, expected):
+    monkeypatch.chdir(tmp_path)
+    config = build_config(
+        CMD_IMPORT,
+        max_workers=1,
+        max_concurrency=max_concurrency,
+        source_api_url="https://api.datadoghq.com",
+        destination_api_url="https://api.datadoghq.eu",
+        resources="monitors",
+    )
+
+    # The in-flight limit only grows above --max-workers if --max-concurrency is set
+    assert config.max_concurrency == expected
+    assert config.source_client.limiter.stats()["concurrency_limit"] == 1
+    assert config.source_client.limiter.max_limit == expected
+
+
+def test_build_config_http_cache_namespace(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+
+    def namespace(app_key):
+        config = build_config(
+            CMD_IMPORT,
+            source_api_url="https://api.datadoghq.com",
+            source_api_key="api-key",
+            source_app_key=app_key,
+            destination_api_url="https://api.datadoghq.eu",
+            resources="monitors",
+            http_cache=True,
+        )
+        return config.source_client.cache.namespace
+
+    # Application keys with different scopes never share cached responses
+    assert namespace("app-key") == namespace("app-key")
+    assert namespace("app-key") != namespace("other-app-key")
+
+
+def test_log_client_stats_connections(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    config = build_config(
+        CMD_IMPORT,
+        max_workers=1,
+        source_api_url="https://api.datadoghq.com",
+        destination_api_url="https://api.datadoghq.eu",
+        resources="monitors",
+    )
+    config.source_client.limiter.observe(config.source_client.limiter.acquire(), 200, 0.1)
+
+    with caplog.at_level(logging.INFO):
+        log_client_stats(config)
+    assert "source client metrics: " in caplog.text
+    assert "connections" not in caplog.text
+
+    # Connection reuse is only reported in verbose output
+    with caplog.at_level(logging.DEBUG):
+        log_client_stats(config)
+    assert "source client connections: new_connections=0, reused_connections=0" in caplog.text
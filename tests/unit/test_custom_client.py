@@ -0,0 +1,109 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from datadog_sync.utils.custom_client import CustomClient, PaginationConfig
+
+
+AUTH = {"apiKeyAuth": "", "appKeyAuth": ""}
+
+
+class FakeList:
+    """Serves `total` resources paginated with `page[size]`/`page[number]` or `count`/`start`."""
+
+    def __init__(self, total, total_count=True, delay=0.0):
+        self.total = total
+        self.total_count = total_count
+        self.delay = delay
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def get(self, path, params=None):
+        with self._lock:
+            self.requests.append(dict(params))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+
+        if "start" in params:
+            start, size = params["start"], params["count"]
+        else:
+            size = params["page[size]"]
+            start = params["page[number]"] * size
+        body = {"data": list(range(start, min(start + size, self.total)))}
+        if self.total_count:
+            body["meta"] = {"page": {"total_count": self.total}}
+        return SimpleNamespace(raise_for_status=lambda: None, json=lambda: body)
+
+
+@pytest.mark.parametrize("total", [0, 10, 250, 300])
+def test_paginated_request_fetches_pages_concurrently(total):
+    client = CustomClient(None, AUTH, 60, 60, page_concurrency=4)
+    fake = FakeList(total, delay=0.05)
+
+    resources = client.paginated_request(fake.get)("/api/v2/users", params={"filter": "x"})
+
+    assert resources == list(range(total))
+    assert all(params["filter"] == "x" for params in fake.requests)
+    if total > 200:
+        assert fake.max_in_flight > 1
+
+
+def test_paginated_request_start_count_pagination():
+    client = CustomClient(None, AUTH, 60, 60, page_concurrency=4)
+    fake = FakeList(1030)
+    pagination_config = PaginationConfig(
+        page_size=100,
+        page_size_param="count",
+        page_number=0,
+        page_number_param="start",
+        remaining_func=lambda idx, resp, page_size, page_number: (resp["meta"]["page"]["total_count"])
+        - (page_size * (idx + 1)),
+        page_number_func=lambda idx, page_size, page_number: page_size * (idx + 1),
+    )
+
+    resources = client.paginated_request(fake.get)("/api/v1/notebooks", pagination_config=pagination_config)
+
+    assert resources == list(range(1030))
+    assert sorted(params["start"] for params in fake.requests) == list(range(0, 1100, 100))
+
+
+def test_paginated_request_without_total_count_is_serial():
+    client = CustomClient(None, AUTH, 60, 60, page_concurrency=4)
+    fake = FakeList(250, total_count=False)
+    pagination_config = PaginationConfig(remaining_func=lambda *args: 1)
+
+    resources = client.paginated_request(fake.get)(
+        "/api/v2/logs/config/restriction_queries", pagination_config=pagination_config
+    )
+
+    assert resources == list(range(250))
+    assert [params["page[number]"] for params in fake.requests] == [0, 1, 2]
+    assert fake.max_in_flight == 1
+
+
+def test_paginated_request_resumes_after_total_grows():
+    client = CustomClient(None, AUTH, 60, 60, page_concurrency=4)
+    fake = FakeList(200)
+    get = fake.get
+
+    def growing_get(path, params=None):
+        resp = get(path, params)
+        # Resources created after the first page was listed
+        fake.total = 350
+        return resp
+
+    resources = client.paginated_request(growing_get)("/api/v2/roles")
+
+    assert resources == list(range(350))
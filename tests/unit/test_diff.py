@@ -0,0 +1,74 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import pytest
+from deepdiff import DeepDiff
+
+from datadog_sync.utils.diff import DiffRules, compile_rules, diff
+
+
+def _deepdiff(t1, t2, excluded_paths=(), excluded_re=()):
+    result = DeepDiff(
+        t1, t2, ignore_order=True, exclude_paths=list(excluded_paths), exclude_regex_paths=list(excluded_re)
+    ).to_dict()
+    for report_type in ("dictionary_item_added", "dictionary_item_removed"):
+        if report_type in result:
+            result[report_type] = list(result[report_type])
+    return result
+
+
+@pytest.mark.parametrize(
+    "t1, t2",
+    [
+        ({"a": 1, "b": {"c": [1, 2]}}, {"a": 1, "b": {"c": [2, 1]}}),
+        ({"a": 1, "b": "x", "d": None}, {"a": 2, "b": 1, "c": 3}),
+        ({"x": [1, 1, 2]}, {"x": [2, 1]}),
+        ({"x": ["a", "c"]}, {"x": ["b", "d"]}),
+        ({"x": [1, 100]}, {"x": [2, 300]}),
+        ({"x": [{"q": "x"}]}, {"x": [{"q": "y", "w": "z"}]}),
+        ({"x": [{"a": 1}, {"b": [1, 2, 3]}]}, {"x": [{"b": [3, 2, 1, 4]}, {"a": 1}, "new"]}),
+        ({"x": 1}, {"x": 1.0}),
+        ({"o": {"x": 0}}, {"o": {"x": False}}),
+        ({"x": [True]}, {"x": [1.0]}),
+        ({"x": [{"a": 1, "b": True}]}, {"x": [{"a": 1, "b": 1}]}),
+        ({"o": {"x": [1, 2]}}, {"o": {"x": [1, 2.0]}}),
+        ({"x": []}, {"x": {}}),
+    ],
+)
+def test_diff_matches_deepdiff(t1, t2):
+    assert diff(t1, t2) == _deepdiff(t1, t2)
+
+
+def test_diff_exclusions():
+    t1 = {"id": 1, "attributes": {"created_at": "x", "name": "a"}, "steps": [{"updatedAt": 1, "name": "s"}]}
+    t2 = {"id": 2, "attributes": {"created_at": "y", "name": "a"}, "steps": [{"updatedAt": 2, "name": "s"}]}
+    excluded_paths = ("root['id']", "root['attributes']['created_at']")
+    rules = compile_rules(excluded_paths, ("updatedAt",))
+    assert rules is compile_rules(excluded_paths, ("updatedAt",))
+    assert diff(t1, t2, rules) == {}
+
+    t2["attributes"]["name"] = "b"
+    t2["steps"].append({"updatedAt": 3, "name": "t"})
+    assert diff(t1, t2, rules) == _deepdiff(t1, t2, excluded_paths, ("updatedAt",))
+
+
+def test_diff_user_roles():
+    # Users.update_user_roles adds the user to the new roles found in the diff
+    t1 = {"relationships": {"roles": {"data": [{"id": "a", "type": "roles"}]}}}
+    t2 = {"relationships": {"roles": {"data": [{"id": "b", "type": "roles"}]}}}
+    assert diff(t1, t2) == {
+        "values_changed": {"root['relationships']['roles']['data'][0]['id']": {"new_value": "b", "old_value": "a"}}
+    }
+
+    t2["relationships"]["roles"]["data"].insert(0, {"id": "a", "type": "roles"})
+    assert diff(t1, t2) == {
+        "iterable_item_added": {"root['relationships']['roles']['data'][1]": {"id": "b", "type": "roles"}}
+    }
+
+
+def test_diff_identical_subtrees():
+    widgets = [{"definition": {"type": "note", "content": str(i)}} for i in range(100)]
+    assert diff({"widgets": widgets}, {"widgets": list(reversed(widgets))}, DiffRules()) == {}
+    assert not diff(widgets, [dict(widget) for widget in widgets])
@@ -0,0 +1,77 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+from datadog_sync.utils.fingerprint import FINGERPRINT_CHUNK_SIZE, FingerprintStore, fingerprint
+
+
+def _config(source, destination):
+    config = MagicMock()
+    config.destination_client.host = "https://api.datadoghq.eu"
+    config.skip_failed_resource_connections = True
+    config.resources["monitors"].resource_config.source_resources = source
+    config.resources["monitors"].resource_config.destination_resources = destination
+    return config
+
+
+def test_fingerprint_is_canonical():
+    assert fingerprint({"a": 1, "b": [1, {"c": "é"}]}) == fingerprint({"b": [1, {"c": "é"}], "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": "1"})
+    assert fingerprint(None) is None
+
+
+def test_fingerprint_store(tmp_path):
+    path = str(tmp_path / "fingerprints.json")
+    source = {"1": {"name": "a"}, "2": {"name": "b"}, "3": {"name": "c"}}
+    destination = {"1": {"id": 10, "name": "a"}, "2": {"id": 20, "name": "b"}}
+    resources = {_id: "monitors" for _id in source}
+    config = _config(source, destination)
+
+    store = FingerprintStore(config, path)
+    store.load()
+    store.compute(config, resources)
+    assert not any(store.unchanged("monitors", _id) for _id in resources)
+    store.record("monitors", "1", destination["1"])
+    # Updated by the sync
+    destination["2"] = {"id": 20, "name": "b", "modified": True}
+    store.record("monitors", "2", destination["2"])
+    store.record("monitors", "3", None)
+    store.write(config, ["monitors"])
+
+    source["1"] = {"name": "a2"}
+    store = FingerprintStore(config, path)
+    store.load()
+    store.compute(config, resources)
+    assert not store.unchanged("monitors", "1")
+    assert store.unchanged("monitors", "2")
+    assert not store.unchanged("monitors", "3")
+
+    # Resources deleted from the destination are dropped
+    del destination["2"]
+    store.write(config, ["monitors"])
+    store = FingerprintStore(config, path)
+    store.load()
+    assert store.stored == {"monitors": {"1": [fingerprint({"name": "a"}), fingerprint(destination["1"])]}}
+
+    # Fingerprints stored with other options are discarded
+    config.skip_failed_resource_connections = False
+    store = FingerprintStore(config, path)
+    store.load()
+    assert store.stored == {}
+
+
+def test_fingerprint_store_compute_chunks():
+    source = {str(i): {"name": str(i)} for i in range(2 * FINGERPRINT_CHUNK_SIZE + 1)}
+    destination = {_id: {"id": _id} for _id in source}
+    config = _config(source, destination)
+
+    store = FingerprintStore(config)
+    with ThreadPoolExecutor(2) as executor:
+        store.compute(config, {_id: "monitors" for _id in source}, executor)
+    assert store.current["monitors"] == {
+        _id: (fingerprint(source[_id]), fingerprint(destination[_id])) for _id in source
+    }
@@ -0,0 +1,127 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from datadog_sync.utils.custom_client import CustomClient
+from datadog_sync.utils.http_cache import ResponseCache
+
+
+AUTH = {"apiKeyAuth": "123", "appKeyAuth": "123"}
+
+
+@pytest.fixture
+def fake_api():
+    calls = []
+    versions = {"/api/v1/dashboard/abc": "1"}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            calls.append((self.path, self.headers.get("If-None-Match")))
+            etag = f'"{versions[path]}"' if path in versions else None
+            if etag is not None and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            payload = json.dumps({"path": self.path, "version": versions.get(path)}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            if etag is not None:
+                self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", calls, versions
+    server.shutdown()
+
+
+def cached_client(host, directory, ttl=3600, max_size=1024 * 1024):
+    client = CustomClient(host, AUTH, 10, 10)
+    client.cache = ResponseCache(str(directory), "test", ttl, max_size)
+    return client
+
+
+def test_cache_revalidates_etags(fake_api, tmp_path):
+    host, calls, versions = fake_api
+    client = cached_client(host, tmp_path)
+    assert client.get("/api/v1/dashboard/abc").json()["version"] == "1"
+
+    # A later run revalidates the response cached by the previous one
+    client = cached_client(host, tmp_path)
+    resp = client.get("/api/v1/dashboard/abc")
+    assert resp.json()["version"] == "1"
+    assert calls[-1] == ("/api/v1/dashboard/abc", '"1"')
+
+    versions["/api/v1/dashboard/abc"] = "2"
+    assert client.get("/api/v1/dashboard/abc").json()["version"] == "2"
+    assert client.stats()["cache_hits"] == 1
+    assert client.stats()["cache_misses"] == 1
+
+
+def test_cache_reuses_responses_without_validators_until_ttl(fake_api, tmp_path):
+    host, calls, _ = fake_api
+    client = cached_client(host, tmp_path)
+    client.get("/api/v1/monitor/1", params={"with_downtimes": True})
+    client.get("/api/v1/monitor/1", params={"with_downtimes": True})
+    client.get("/api/v1/monitor/1")
+    assert len(calls) == 2
+    assert client.stats()["cache_hits"] == 1
+
+    client = cached_client(host, tmp_path, ttl=0)
+    client.get("/api/v1/monitor/1")
+    assert len(calls) == 3
+
+
+def test_cache_evicts_least_recently_used(fake_api, tmp_path):
+    host, calls, _ = fake_api
+    client = cached_client(host, tmp_path)
+    client.get("/api/v1/monitor/1")
+    entry_size = sum(client.cache._entries.values())
+
+    client = cached_client(host, tmp_path, max_size=2 * entry_size + 10)
+    client.get("/api/v1/monitor/2")
+    client.get("/api/v1/monitor/1")
+    client.get("/api/v1/monitor/3")
+    assert client.stats()["cache_evictions"] == 1
+
+    calls.clear()
+    client.get("/api/v1/monitor/1")
+    client.get("/api/v1/monitor/2")
+    assert [path for path, _ in calls] == ["/api/v1/monitor/2"]
+
+
+def test_cache_skips_streamed_requests(fake_api, tmp_path):
+    host, calls, _ = fake_api
+    client = cached_client(host, tmp_path)
+    client.get("/api/v1/monitor", stream=True).close()
+    client.get("/api/v1/monitor", stream=True).close()
+    assert len(calls) == 2
+    assert client.stats()["cache_misses"] == 0
+
+
+def test_cache_skips_validation(fake_api, tmp_path):
+    host, calls, _ = fake_api
+    client = cached_client(host, tmp_path)
+    client.get("/api/v1/validate")
+    client.get("/api/v1/validate")
+    assert len(calls) == 2
+    assert client.stats()["cache_misses"] == 0
@@ -0,0 +1,37 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import os
+from unittest.mock import MagicMock
+
+from datadog_sync.utils.journal import JOURNAL_CREATE, JOURNAL_DELETE, JOURNAL_UNCHANGED, JOURNAL_UPDATE, Journal
+
+
+def test_journal_replay(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.open()
+    journal.record(JOURNAL_CREATE, "monitors", "1", {"id": 10})
+    journal.record(JOURNAL_UPDATE, "monitors", "2", {"id": 20, "name": "updated"})
+    journal.record(JOURNAL_DELETE, "monitors", "3")
+    journal.record(JOURNAL_UNCHANGED, "dashboards", "a")
+    journal.record(JOURNAL_CREATE, "unknown", "x", {})
+    # Simulate the process being killed while writing an entry
+    with open(path, "a") as f:
+        f.write('{"op": "create", "type": "moni')
+
+    config = MagicMock()
+    destination_resources = {"2": {"id": 20}, "3": {"id": 30}}
+    config.resources = {"monitors": MagicMock(), "dashboards": MagicMock()}
+    config.resources["monitors"].resource_config.destination_resources = destination_resources
+
+    replayed = Journal(path)
+    replayed.replay(config)
+    assert destination_resources == {"1": {"id": 10}, "2": {"id": 20, "name": "updated"}}
+    assert replayed.completed == {"1", "2", "3", "a"}
+    assert replayed.resource_types == {"monitors", "dashboards"}
+
+    journal.remove()
+    assert not os.path.exists(path)
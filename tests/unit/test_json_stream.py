@@ -0,0 +1,46 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import json
+
+import pytest
+
+from datadog_sync.utils.json_stream import iter_json_items
+
+
+ITEMS = [
+    {"id": 1, "name": 'é"]}', "tags": ["a", "b"], "options": {"thresholds": {"critical": 2.5e-3}}},
+    -12.75,
+    "monitor",
+    None,
+    True,
+    [],
+]
+
+
+def chunked(document, size):
+    return [document[i : i + size] for i in range(0, len(document), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 4096])
+def test_iter_json_items(size):
+    document = json.dumps(ITEMS, ensure_ascii=False, indent=2).encode("utf-8")
+    assert list(iter_json_items(chunked(document, size))) == ITEMS
+    assert list(iter_json_items(chunked(b" [ ] ", size))) == []
+
+
+@pytest.mark.parametrize("size", [1, 5, 4096])
+def test_iter_json_items_key(size):
+    document = json.dumps({"meta": {"page": [1, 2]}, "count": 10, "tests": ITEMS, "after": {}}).encode("utf-8")
+    assert list(iter_json_items(chunked(document, size), key="tests")) == ITEMS
+
+    with pytest.raises(KeyError):
+        list(iter_json_items(chunked(document, size), key="dashboards"))
+
+
+@pytest.mark.parametrize("document", [b"", b"[1,", b"[1 2]", b"[1,]", b"{}"])
+def test_iter_json_items_invalid(document):
+    with pytest.raises(json.JSONDecodeError):
+        list(iter_json_items(chunked(document, 1)))
@@ -0,0 +1,151 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import threading
+from types import SimpleNamespace
+
+from datadog_sync.utils.limiter import AdaptiveLimiter, RateLimiter, TokenBucket, endpoint_key
+
+
+def test_limiter_decreases_once_per_window():
+    limiter = AdaptiveLimiter(16)
+    started = limiter.acquire()
+    concurrent = limiter.acquire()
+
+    limiter.observe(started, 429, 0.1)
+    # Requests sent before the decrease do not decrease the limit again
+    limiter.observe(concurrent, 503, 0.1)
+
+    assert limiter.stats()["concurrency_limit"] == 8
+    assert limiter.stats()["limit_decreases"] == 1
+    assert limiter.stats()["throttled"] == 1
+    assert limiter.stats()["server_errors"] == 1
+
+    limiter.observe(limiter.acquire(), 429, 0.1)
+    assert limiter.stats()["concurrency_limit"] == 4
+    assert limiter.stats()["lowest_concurrency_limit"] == 4
+
+
+def test_limiter_increases_additively():
+    limiter = AdaptiveLimiter(8)
+    limiter.observe(limiter.acquire(), 429, 0.1)
+    assert limiter.stats()["concurrency_limit"] == 4
+
+    for _ in range(5):
+        limiter.observe(0, 200, 0.1)
+    assert limiter.stats()["concurrency_limit"] == 5
+
+    for _ in range(100):
+        limiter.observe(0, 200, 0.1)
+    assert limiter.stats()["concurrency_limit"] == 8
+
+
+def test_limiter_grows_above_initial_limit():
+    limiter = AdaptiveLimiter(4, 8)
+    for _ in range(5):
+        limiter.observe(0, 200, 0.1)
+    assert limiter.stats()["concurrency_limit"] == 5
+    # The fifth request is admitted without waiting for a release
+    for _ in range(5):
+        limiter.acquire()
+
+    for _ in range(100):
+        limiter.observe(0, 200, 0.1)
+    assert limiter.stats()["concurrency_limit"] == 8
+    assert limiter.stats()["highest_concurrency_limit"] == 8
+
+
+def test_limiter_decreases_on_latency_spike():
+    limiter = AdaptiveLimiter(8, latency_samples=5)
+    for _ in range(10):
+        limiter.observe(0, 200, 0.1)
+    limiter.observe(limiter.acquire(), 200, 1.0)
+
+    assert limiter.stats()["concurrency_limit"] == 4
+    assert limiter.stats()["latency_spikes"] == 1
+
+
+def test_limiter_blocks_above_limit():
+    limiter = AdaptiveLimiter(1)
+    limiter.acquire()
+    acquired = threading.Event()
+
+    def worker():
+        limiter.acquire()
+        acquired.set()
+
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    assert not acquired.wait(0.1)
+
+    limiter.release()
+    assert acquired.wait(2)
+    thread.join()
+
+
+def rate_limit_response(limit, period, remaining, reset, name=None, status_code=200):
+    headers = {
+        "x-ratelimit-limit": str(limit),
+        "x-ratelimit-period": str(period),
+        "x-ratelimit-remaining": str(remaining),
+        "x-ratelimit-reset": str(reset),
+    }
+    if name:
+        headers["x-ratelimit-name"] = name
+    return SimpleNamespace(status_code=status_code, headers=headers)
+
+
+def test_endpoint_key():
+    assert endpoint_key("GET", "/api/v1/monitor/12345?with_downtimes=true") == "GET /api/v1/monitor/{id}"
+    assert endpoint_key("GET", "/api/v2/roles") == "GET /api/v2/roles"
+
+
+def test_rate_limiter_paces_learned_endpoints():
+    limiter = RateLimiter()
+    assert limiter.reserve("GET", "/api/v1/monitor/1") == 0
+
+    limiter.update("GET", "/api/v1/monitor/1", rate_limit_response(10, 10, 2, 5), 0)
+    assert limiter.reserve("GET", "/api/v1/monitor/2") == 0
+    assert limiter.reserve("GET", "/api/v1/monitor/3") == 0
+    assert 4.9 < limiter.reserve("GET", "/api/v1/monitor/4") <= 5
+    assert limiter.reserve("GET", "/api/v1/dashboard/1") == 0
+    assert limiter.stats()["paced_requests"] == 1
+
+
+def test_rate_limiter_shares_named_limits():
+    limiter = RateLimiter()
+    limiter.update("GET", "/api/v1/monitor", rate_limit_response(10, 10, 0, 5, name="monitors"), 0)
+    limiter.update("POST", "/api/v1/monitor", rate_limit_response(10, 10, 0, 5, name="monitors"), 0)
+
+    assert 4.9 < limiter.reserve("POST", "/api/v1/monitor") <= 5
+    assert limiter.stats()["rate_limits"] == 1
+
+
+def test_token_bucket_restores_limit_on_reset():
+    bucket = TokenBucket(limit=10, period=60, remaining=10)
+    bucket.update(now=0, sent=0, limit=10, period=60, remaining=1, reset=5)
+
+    assert bucket.reserve(now=1) == 0
+    assert bucket.reserve(now=2) == 3
+    assert bucket.reserve(now=5) == 0
+    assert bucket.tokens == 8
+    # Responses to requests sent before the window reset are ignored
+    bucket.update(now=5, sent=4, limit=10, period=60, remaining=0, reset=1)
+    assert bucket.tokens == 8
+    assert bucket.reset_at == 65
+    # Reservations beyond the limit of the next window wait for the following one
+    for _ in range(8):
+        bucket.reserve(now=6)
+    assert bucket.reserve(now=6) == 59
+
+
+def test_token_bucket_keeps_earliest_reset():
+    bucket = TokenBucket(limit=10, period=60, remaining=10)
+    bucket.update(now=0, sent=0, limit=10, period=60, remaining=9, reset=30)
+    bucket.update(now=0.5, sent=0.5, limit=10, period=60, remaining=8, reset=29)
+    assert bucket.reset_at == 29.5
+
+    bucket.update(now=2, sent=2, limit=10, period=60, remaining=0, reset=29, throttled=True)
+    assert bucket.reset_at == 31
@@ -0,0 +1,46 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from unittest.mock import MagicMock
+
+from deepdiff import DeepDiff
+
+from datadog_sync.constants import FALSE
+from datadog_sync.utils.plan import plan_inputs, read_plan, stale_plan_inputs, write_plan, PLAN_VERSION
+
+
+def _config(source, destination):
+    config = MagicMock()
+    config.resources_arg = ["monitors"]
+    config.cleanup = FALSE
+    config.skip_failed_resource_connections = True
+    config.resources["monitors"].resource_config.source_resources = source
+    config.resources["monitors"].resource_config.destination_resources = destination
+    return config
+
+
+def test_stale_plan_inputs():
+    config = _config({"1": {"name": "a"}}, {})
+    plan = {"version": PLAN_VERSION, "inputs": plan_inputs(config)}
+    assert stale_plan_inputs(config, plan) == []
+
+    config.resources["monitors"].resource_config.destination_resources = {"1": {"id": 2}}
+    assert stale_plan_inputs(config, plan) == ["monitors destination"]
+
+    config.cleanup = 1
+    assert stale_plan_inputs(config, plan) == ["options", "monitors destination"]
+
+    assert stale_plan_inputs(config, {"version": 0, "inputs": plan["inputs"]}) == ["version"]
+
+
+def test_write_plan_serializes_diffs(tmp_path):
+    diff = DeepDiff({"a": 1, "b": "x"}, {"a": 2, "b": 1, "c": 3})
+    path = str(tmp_path / "plan.json")
+    write_plan(path, {"updates": {"monitors": {"1": diff}}})
+
+    planned = read_plan(path)["updates"]["monitors"]["1"]
+    assert planned["values_changed"] == {"root['a']": {"new_value": 2, "old_value": 1}}
+    assert planned["dictionary_item_added"] == ["root['c']"]
+    assert planned["type_changes"]["root['b']"]["new_type"] == "int"
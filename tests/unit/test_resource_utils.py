@@ -7,7 +7,7 @@ import pytest
 from unittest.mock import MagicMock, call
 
 from datadog_sync import models
-from datadog_sync.utils.resource_utils import find_attr
+from datadog_sync.utils.resource_utils import critical_path_priorities, find_attr
 from datadog_sync.utils.base_resource import BaseResource
 
 
@@ -55,6 +55,27 @@ def test_find_nested_list_attr():
     assert connect_func.call_count == 2
 
 
+def test_critical_path_priorities():
+    graph = {
+        "role": set(),
+        "user": {"role"},
+        "monitor": set(),
+        "composite": {"monitor"},
+        "slo": {"composite"},
+        "dashboard": {"slo", "monitor", "role"},
+        "dashboard_list": {"dashboard"},
+        "host_tag": set(),
+    }
+
+    priorities = critical_path_priorities(graph)
+
+    assert priorities["monitor"] == (4, 2)
+    assert priorities["composite"] == (3, 1)
+    assert priorities["role"] == (2, 2)
+    assert priorities["dashboard_list"] == (0, 0)
+    assert priorities["host_tag"] == (0, 0)
+
+
 def validate_order_list(order_list, resources):
     # checks that no dependency comes after the current resource in the order_list
     for resource in resources:
@@ -72,3 +93,102 @@ def validate_order_list(order_list, resources):
             return False
 
     return len(order_list) == len(set(order_list))
+
+
+def test_check_diff_task(config):
+    from datadog_sync.utils.resources_handler import ResourcesHandler
+    from datadog_sync.utils.resource_utils import check_diff, process_pool_executor
+
+    resource_config = config.resources["users"].resource_config
+    resource = {"id": "1", "attributes": {"name": "a", "created_at": "x"}, "relationships": {"roles": {"data": []}}}
+    state = {"id": "2", "attributes": {"name": "b", "created_at": "y"}, "relationships": {"roles": {"data": [1]}}}
+
+    handler = ResourcesHandler(config, False)
+    handler.diff_executor = process_pool_executor(1)
+    try:
+        diff = handler._check_diff(resource_config, resource, state)
+    finally:
+        handler.diff_executor.shutdown()
+
+    assert diff == check_diff(resource_config, resource, state)
+    assert "root['id']" not in str(diff)
+    assert "iterable_item_added" in diff
+
+
+def test_cleanup_batch_worker(config, monkeypatch):
+    from datadog_sync.utils.resources_handler import ResourcesHandler
+    from datadog_sync.utils.resource_utils import CustomClientHTTPError
+    from datadog_sync.utils.scheduler import CleanupBatch, CleanupNode
+
+    resource_config = config.resources["synthetics_tests"].resource_config
+    monkeypatch.setattr(
+        resource_config, "destination_resources", {f"{i}#{i}": {"public_id": f"abc-{i}"} for i in range(4)}
+    )
+    client = MagicMock()
+    monkeypatch.setattr(config, "destination_client", client)
+
+    def post(path, body):
+        if len(body["public_ids"]) > 1:
+            # Tests 2 and 3 are not deleted by the bulk request
+            deleted = [{"public_id": public_id} for public_id in body["public_ids"] if public_id < "abc-2"]
+            return MagicMock(json=MagicMock(return_value={"deleted_tests": deleted}))
+        if body["public_ids"] == ["abc-3"]:
+            raise CustomClientHTTPError(MagicMock(status_code=400, reason="Bad Request", text=""))
+        return MagicMock()
+
+    client.post.side_effect = post
+    handler = ResourcesHandler(config, False)
+    batch = CleanupBatch(tuple(CleanupNode(f"{i}#{i}") for i in range(4)))
+
+    failed = handler._cleanup_batch_worker(batch, "synthetics_tests")
+
+    assert failed == {"3#3"}
+    assert client.post.call_args_list[0] == call(
+        "/api/v1/synthetics/tests/delete", {"public_ids": ["abc-0", "abc-1", "abc-2", "abc-3"]}
+    )
+    assert client.post.call_count == 3
+    assert list(resource_config.destination_resources) == ["3#3"]
+
+
+def test_synthetics_tests_delete_resources(config, monkeypatch):
+    resource_config = config.resources["synthetics_tests"].resource_config
+    monkeypatch.setattr(
+        resource_config,
+        "destination_resources",
+        {"b#2": {"public_id": "mm6-8w7-65w"}, "a#1": {"public_id": "2z9-7as-gzr"}, "c#3": {"public_id": "sh7-vbm-yk6"}},
+    )
+    client = MagicMock()
+    client.post.return_value.json.return_value = {
+        "deleted_tests": [{"public_id": "2z9-7as-gzr"}, {"public_id": "sh7-vbm-yk6"}]
+    }
+    monkeypatch.setattr(config, "destination_client", client)
+
+    failed = config.resources["synthetics_tests"].delete_resources(["b#2", "a#1", "c#3"])
+
+    # A single request deletes every test, its public ids are sorted so the request body is deterministic
+    client.post.assert_called_once_with(
+        "/api/v1/synthetics/tests/delete", {"public_ids": ["2z9-7as-gzr", "mm6-8w7-65w", "sh7-vbm-yk6"]}
+    )
+    assert failed == ["b#2"]
+
+
+def test_service_level_objectives_delete_resources(config, monkeypatch):
+    resource_config = config.resources["service_level_objectives"].resource_config
+    monkeypatch.setattr(
+        resource_config,
+        "destination_resources",
+        {
+            "1": {"id": "abc", "thresholds": [{"timeframe": "30d"}, {"timeframe": "7d"}, {"timeframe": "30d"}]},
+            "2": {"id": "def", "thresholds": [{"timeframe": "90d"}]},
+            "3": {"id": "ghi"},
+        },
+    )
+    client = MagicMock()
+    client.post.return_value.json.return_value = {"data": {"deleted": ["abc"]}}
+    monkeypatch.setattr(config, "destination_client", client)
+
+    failed = config.resources["service_level_objectives"].delete_resources(["1", "2", "3"])
+
+    # Every timeframe of each SLO is deleted, which deletes the SLO itself
+    client.post.assert_called_once_with("/api/v1/slo/bulk_delete", {"abc": ["30d", "7d"], "def": ["90d"]})
+    assert failed == ["2", "3"]
@@ -0,0 +1,225 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import asyncio
+import json
+import os
+import threading
+from unittest.mock import MagicMock
+
+import pytest
+
+from datadog_sync.constants import FALSE, FORCE, IMPORT_CHECKPOINTS_DIR, IMPORT_INDEX_DIR, SOURCE_RESOURCES_DIR
+from datadog_sync.model.dashboards import Dashboards
+from datadog_sync.model.monitors import Monitors
+from datadog_sync.utils.base_resource import ResourceConfig
+from datadog_sync.utils.resource_utils import CustomClientHTTPError
+from datadog_sync.utils.resources_handler import ResourcesHandler
+
+
+class FakeMonitors(Monitors):
+    resource_config = ResourceConfig(
+        resource_connections={"monitors": ["query"]},
+        base_path="/api/v1/monitor",
+        excluded_attributes=["id"],
+    )
+
+
+class FakeDashboards(Dashboards):
+    resource_config = ResourceConfig(base_path="/api/v1/dashboard", excluded_attributes=["id"])
+
+
+class FakeNotebooks(Dashboards):
+    resource_type = "notebooks"
+    resource_config = ResourceConfig(base_path="/api/v1/notebooks", excluded_attributes=["id"])
+
+
+def _config(source, destination, cleanup=FALSE):
+    config = MagicMock()
+    config.resources_arg = ["monitors"]
+    config.cleanup = cleanup
+    config.max_workers = 2
+    config.max_concurrency = 2
+    config.diff_workers = 0
+    config.force_missing_dependencies = False
+    config.skip_failed_resource_connections = True
+    config.resume = False
+    config.full = True
+    config.async_engine = None
+
+    monitors = FakeMonitors(config)
+    monitors.resource_config.source_resources = source
+    monitors.resource_config.destination_resources = destination
+    synthetics_tests = MagicMock()
+    synthetics_tests.resource_config.destination_resources = {}
+    config.resources = {"monitors": monitors, "synthetics_tests": synthetics_tests}
+    return config
+
+
+def _import_config(wait, async_engine=None):
+    config = MagicMock()
+    config.resources_arg = ["dashboards", "notebooks"]
+    config.filters = {}
+    config.max_concurrency = 4
+    config.resume = False
+    config.incremental = False
+    config.async_engine = async_engine
+    config.resources = {"dashboards": FakeDashboards(config), "notebooks": FakeNotebooks(config)}
+
+    listed = {
+        path: [{"id": f"{prefix}{i}", "modified_at": "2023-01-01"} for i in range(4)]
+        for path, prefix in (("/api/v1/dashboard", "d"), ("/api/v1/notebooks", "n"))
+    }
+
+    def get(path, **kwargs):
+        # Every detail request is in flight while the other imports start
+        wait(path)
+        return MagicMock(json=lambda: {"id": path.rsplit("/", 1)[1]})
+
+    config.source_client.get_items.side_effect = lambda path, key=None: iter(listed[path])
+    config.source_client.get.side_effect = get
+    return config
+
+
+def _imported_ids(resource_type):
+    with open(os.path.join(IMPORT_INDEX_DIR, f"{resource_type}.json")) as f:
+        return {key: entry["ids"] for key, entry in json.load(f).items()}
+
+
+def _assert_imported(config):
+    for resource_type, prefix in (("dashboards", "d"), ("notebooks", "n")):
+        assert _imported_ids(resource_type) == {f"id:{prefix}{i}": [f"{prefix}{i}"] for i in range(4)}
+        with open(os.path.join(SOURCE_RESOURCES_DIR, f"{resource_type}.json")) as f:
+            assert json.load(f) == {f"{prefix}{i}": {"id": f"{prefix}{i}"} for i in range(4)}
+
+
+def test_import_resources_concurrent_types(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(SOURCE_RESOURCES_DIR)
+    started = {"/api/v1/dashboard": threading.Event(), "/api/v1/notebooks": threading.Event()}
+
+    def wait(path):
+        base_path = path.rsplit("/", 1)[0]
+        started[base_path].set()
+        # Each import waits until an import of the other type is in flight
+        other = next(event for other_path, event in started.items() if other_path != base_path)
+        assert other.wait(5)
+
+    config = _import_config(wait)
+    config.max_concurrency = 8
+    ResourcesHandler(config, False).import_resources()
+
+    # Both types are imported at the same time, each import records the IDs it imported
+    _assert_imported(config)
+    config.logger.error.assert_not_called()
+
+
+def test_import_resources_async_engine(tmp_path, monkeypatch):
+    pytest.importorskip("greenlet")
+    from datadog_sync.utils.async_client import AsyncEngine
+    from datadog_sync.utils.async_worker import await_
+
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(SOURCE_RESOURCES_DIR)
+    engine = AsyncEngine()
+    try:
+        config = _import_config(lambda path: await_(asyncio.sleep(0.05)), engine)
+        ResourcesHandler(config, False).import_resources()
+    finally:
+        engine.shutdown()
+
+    # The imports share the event loop thread, each of them records the IDs it imported
+    _assert_imported(config)
+
+
+def test_import_resources_resume_after_errors(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(SOURCE_RESOURCES_DIR)
+    config = _import_config(lambda path: None)
+    get = config.source_client.get.side_effect
+
+    def failing_get(path, **kwargs):
+        if path.endswith("/d1"):
+            raise CustomClientHTTPError(MagicMock(status_code=500, reason="Internal Server Error", text=""))
+        return get(path, **kwargs)
+
+    config.source_client.get.side_effect = failing_get
+    ResourcesHandler(config, False).import_resources()
+
+    # The checkpoint of the failed import is kept so it can be resumed
+    assert os.path.exists(IMPORT_CHECKPOINTS_DIR)
+    config.logger.warning.assert_called_once()
+
+    config = _import_config(lambda path: None)
+    config.resume = True
+    ResourcesHandler(config, False).import_resources()
+
+    # Only the resource which failed is imported again
+    assert [c.args[0] for c in config.source_client.get.call_args_list] == ["/api/v1/dashboard/d1"]
+    assert not os.path.exists(IMPORT_CHECKPOINTS_DIR)
+    _assert_imported(config)
+
+
+def test_apply_resources_cleanup_waiting_for_create(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "resources" / "destination").mkdir(parents=True)
+    # The composite monitor 2 is updated to reference the new monitor 1 instead of the stale monitor 3.
+    # Monitor 3 is deleted once the composite is updated, which waits for monitor 1 to be created.
+    source = {
+        "1": {"id": 1, "type": "metric alert", "query": "avg(last_5m):1 > 2"},
+        "2": {"id": 2, "type": "composite", "query": "1"},
+    }
+    destination = {
+        "2": {"id": 20, "type": "composite", "query": "30"},
+        "3": {"id": 30, "type": "metric alert", "query": "avg(last_5m):1 > 2"},
+    }
+    config = _config(source, destination, cleanup=FORCE)
+    requests = []
+
+    def post(path, body):
+        requests.append(("POST", path))
+        return MagicMock(json=lambda: {**body, "id": 10})
+
+    def put(path, body):
+        requests.append(("PUT", path))
+        return MagicMock(json=lambda: {**body, "id": 20})
+
+    config.destination_client.post.side_effect = post
+    config.destination_client.put.side_effect = put
+    config.destination_client.delete.side_effect = lambda path, **kwargs: requests.append(("DELETE", path))
+
+    handler = ResourcesHandler(config)
+    handler.config.resources["monitors"].pre_apply_hook = lambda: requests.append(("HOOK", "monitors"))
+    assert handler.apply_resources() == (2, 0)
+    assert requests == [
+        ("HOOK", "monitors"),
+        ("POST", "/api/v1/monitor"),
+        ("PUT", "/api/v1/monitor/20"),
+        ("DELETE", "/api/v1/monitor/30"),
+    ]
+    assert destination["2"]["query"] == "10"
+
+
+def test_plan_resources_dependent_resources():
+    source = {
+        "1": {"id": 1, "type": "metric alert", "query": "avg(last_5m):1 > 2"},
+        "2": {"id": 2, "type": "composite", "query": "1"},
+        "3": {"id": 3, "type": "metric alert", "query": "avg(last_5m):1 > 2"},
+        "4": {"id": 4, "type": "composite", "query": "3"},
+    }
+    destination = {
+        "2": {"id": 20, "type": "composite", "query": "30"},
+        "4": {"id": 40, "type": "composite", "query": "30"},
+    }
+    config = _config(source, destination)
+    handler = ResourcesHandler(config)
+    # Monitor 3 was synced after the dependency graph was built
+    destination["3"] = {"id": 30, "type": "metric alert", "query": "avg(last_5m):1 > 2"}
+
+    plan = handler.plan_resources()
+    # The composite 2 connects to the planned monitor 1, so its diff is only computed when applying.
+    # The composite 4 connects to the existing monitor 3 and is unchanged.
+    assert plan["creates"] == {"monitors": ["1"]}
+    assert plan["updates"] == {"monitors": {"2": None}}
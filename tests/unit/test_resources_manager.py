@@ -0,0 +1,31 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from unittest.mock import MagicMock
+
+from datadog_sync.constants import FALSE
+from datadog_sync.utils.resources_manager import ResourcesManager
+
+
+def test_cleanup_dependencies():
+    config = MagicMock()
+    config.resources_arg = []
+    config.cleanup = FALSE
+    monitors = config.resources["monitors"].resource_config
+    monitors.resource_connections = {"monitors": ["query"]}
+    monitors.destination_resources = {
+        "1": {"id": 101, "query": "avg(last_5m):1 > 2"},
+        "2": {"id": 102, "query": "101 && 103"},
+        "3": {"id": 103, "query": "avg(last_5m):1 > 2"},
+        "4": {"id": 104, "query": "103 || 1030"},
+    }
+    config.resources = {"monitors": config.resources["monitors"]}
+
+    manager = ResourcesManager(config)
+    manager.all_resources = {"1": "monitors", "2": "monitors", "5": "monitors"}
+    manager.all_cleanup_resources = {"3": "monitors", "4": "monitors"}
+
+    # Monitor 3 is still referenced by the synced monitor 2 and the deleted monitor 4
+    assert manager.cleanup_dependencies() == {"3": {"2", "4"}, "4": set()}
@@ -0,0 +1,94 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import time
+from email.utils import formatdate
+from types import SimpleNamespace
+
+import pytest
+
+from datadog_sync.utils.custom_client import BACKOFF_BASE, BACKOFF_CAP, retry_backoff
+from datadog_sync.utils.resource_utils import CustomClientHTTPError
+from datadog_sync.utils.retry import CircuitBreaker, RetryBudget
+
+
+def response(status_code, headers=None):
+    return SimpleNamespace(status_code=status_code, reason="", text="", headers=headers or {})
+
+
+def test_retry_backoff_jitter():
+    timeout = time.time() + 600
+    sleep, retry_count = retry_backoff(response(500), 0, timeout)
+    assert BACKOFF_BASE <= sleep <= BACKOFF_BASE * 3
+    assert retry_count == 1
+
+    for _ in range(100):
+        sleep, _ = retry_backoff(response(503), 1, timeout, previous_sleep=10)
+        assert BACKOFF_BASE <= sleep <= 30
+    sleep, _ = retry_backoff(response(503), 1, timeout, previous_sleep=BACKOFF_CAP)
+    assert sleep <= BACKOFF_CAP
+
+
+def test_retry_backoff_retry_after():
+    timeout = time.time() + 600
+    assert retry_backoff(response(503, {"retry-after": "7"}), 0, timeout)[0] == 7
+    assert retry_backoff(response(429, {"x-ratelimit-reset": "3", "retry-after": "7"}), 0, timeout)[0] == 3
+
+    sleep, _ = retry_backoff(response(503, {"retry-after": formatdate(time.time() + 20, usegmt=True)}), 0, timeout)
+    assert 18 <= sleep <= 20
+
+
+def test_retry_backoff_raises():
+    with pytest.raises(CustomClientHTTPError):
+        retry_backoff(response(404), 0, time.time() + 600)
+    with pytest.raises(CustomClientHTTPError):
+        retry_backoff(response(503, {"retry-after": "120"}), 0, time.time() + 60)
+
+
+def test_retry_budget():
+    budget = RetryBudget(ratio=0.5, reserve=2)
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+
+    budget.deposit()
+    budget.deposit()
+    assert budget.withdraw()
+    assert budget.stats() == {"retries": 3, "retries_denied": 1}
+
+
+def test_circuit_breaker():
+    breaker = CircuitBreaker(failure_threshold=2, cooldown=0.1)
+    breaker.record("GET /api/v1/monitor", response(500))
+    breaker.check("GET /api/v1/monitor")
+
+    breaker.record("GET /api/v1/monitor", response(502))
+    with pytest.raises(CustomClientHTTPError) as e:
+        breaker.check("GET /api/v1/monitor")
+    assert e.value.status_code == 502
+    # Other endpoints are not affected
+    breaker.check("GET /api/v1/dashboard")
+
+    time.sleep(0.1)
+    # A single request probes the endpoint once the cooldown passed
+    breaker.check("GET /api/v1/monitor")
+    with pytest.raises(CustomClientHTTPError):
+        breaker.check("GET /api/v1/monitor")
+
+    breaker.record("GET /api/v1/monitor", response(200))
+    breaker.check("GET /api/v1/monitor")
+    assert breaker.stats() == {"circuits_opened": 1, "fast_failures": 2}
+
+
+def test_circuit_breaker_reopens_on_failed_probe():
+    breaker = CircuitBreaker(failure_threshold=1, cooldown=0.1)
+    breaker.record("GET /api/v1/monitor", response(500))
+    time.sleep(0.1)
+    breaker.check("GET /api/v1/monitor")
+
+    breaker.record("GET /api/v1/monitor", response(500))
+    with pytest.raises(CustomClientHTTPError):
+        breaker.check("GET /api/v1/monitor")
+    assert breaker.stats()["circuits_opened"] == 2
@@ -0,0 +1,118 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue
+from threading import Event
+
+from datadog_sync.utils.scheduler import RESOURCE_DONE, PipelineGraph, RecordingDict, ResourceDispatcher
+
+
+def test_pipeline_graph_waits_for_dependencies():
+    graph = PipelineGraph(["monitors", "synthetics_tests"])
+
+    assert graph.add("1", "monitors", {})
+    assert not graph.add("2", "monitors", {"monitors": {"1", "3"}})
+    assert not graph.add("4", "synthetics_tests", {"monitors": {"2"}})
+
+    assert graph.mark_done("1") == []
+    assert graph.add("3", "monitors", {})
+    assert graph.mark_done("3") == ["2"]
+    assert graph.mark_done("2") == ["4"]
+    assert graph.waiting == {}
+
+
+def test_pipeline_graph_mark_imported():
+    graph = PipelineGraph(["monitors", "service_level_objectives"])
+
+    # Dependencies on types not part of the run are resolved right away
+    assert graph.add("1", "service_level_objectives", {"synthetics_tests": {"a"}})
+    assert not graph.add("2", "service_level_objectives", {"monitors": {"b", "c"}})
+    assert graph.add("c", "monitors", {})
+
+    # Monitor "b" was never imported, "c" still needs to be synced
+    assert graph.mark_imported("monitors") == []
+    assert graph.mark_done("c") == ["2"]
+
+    # Nodes registered after their dependency type is imported are only blocked by registered nodes
+    assert graph.add("3", "service_level_objectives", {"monitors": {"b", "c"}})
+
+
+def test_recording_dict():
+    resources = RecordingDict()
+    resources["1"] = {}
+    resources["2"] = {}
+    assert resources.pop_new_keys() == ["1", "2"]
+
+    resources["1"] = {"updated": True}
+    assert resources.pop_new_keys() == ["1"]
+    assert resources.pop_new_keys() == []
+    assert resources == {"1": {"updated": True}, "2": {}}
+
+
+def test_recording_dict_capture():
+    resources = RecordingDict()
+    with resources.capture() as captured:
+        resources["1"] = {}
+        resources["2"] = {}
+    resources["3"] = {}
+    assert captured == ["1", "2"]
+
+
+def test_pipeline_graph_skips_dependents_of_failed_nodes():
+    graph = PipelineGraph(["monitors", "service_level_objectives"])
+
+    assert graph.add("1", "monitors", {})
+    assert not graph.add("2", "monitors", {"monitors": {"1", "3"}})
+    assert not graph.add("4", "service_level_objectives", {"monitors": {"2"}})
+    assert graph.add("3", "monitors", {})
+
+    graph.mark_failed("1")
+    assert graph.pop_skipped() == [("2", {"1"}), ("4", {"2"})]
+    assert graph.waiting == {}
+    assert graph.mark_done("3") == []
+
+    # Nodes registered after their dependency failed are skipped right away
+    assert not graph.add("5", "service_level_objectives", {"monitors": {"2", "3"}})
+    assert graph.pop_skipped() == [("5", {"2"})]
+
+
+def test_resource_dispatcher():
+    events = Queue()
+    executor = ThreadPoolExecutor(3)
+    priorities = {"1": (2,), "2": (0,), "3": (1,), "4": (3,), "5": (4,)}
+    dispatcher = ResourceDispatcher(
+        executor, 3, lambda resource_type: 2 if resource_type == "monitors" else 3, priorities.get, events
+    )
+    for _id in ("1", "2", "3", "4"):
+        dispatcher.push(_id, "monitors")
+    dispatcher.push("5", "dashboards")
+    release = Event()
+
+    def worker(_id, resource_type):
+        release.wait(5)
+        return _id
+
+    # The highest priority resources run first, up to the concurrency of their type and the number of workers
+    futures = dispatcher.dispatch(worker)
+    assert dispatcher.running == {"monitors": 2, "dashboards": 1}
+    assert dispatcher.dispatch(worker) == []
+
+    # Finished resources are reported to the events queue and free their worker
+    release.set()
+    assert [future.result(timeout=5) for future in futures] == ["2", "3", "5"]
+    done = [events.get(timeout=5) for _ in futures]
+    assert sorted((event, _id, resource_type) for event, _id, resource_type, _ in done) == [
+        (RESOURCE_DONE, "2", "monitors"),
+        (RESOURCE_DONE, "3", "monitors"),
+        (RESOURCE_DONE, "5", "dashboards"),
+    ]
+    for _, _, resource_type, _ in done:
+        dispatcher.task_done(resource_type)
+
+    futures = dispatcher.dispatch(worker)
+    assert [future.result(timeout=5) for future in futures] == ["1", "4"]
+    assert not dispatcher.has_ready()
+    executor.shutdown()
@@ -0,0 +1,84 @@
+# Unless explicitly stated otherwise all files in this repository are licensed
+# under the 3-clause BSD style license (see LICENSE).
+# This product includes software developed at Datadog (https://www.datadoghq.com/).
+# Copyright 2019 Datadog, Inc.
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import requests
+
+from datadog_sync.utils.custom_client import CustomClient
+from datadog_sync.utils.single_flight import SingleFlight
+
+
+AUTH = {"apiKeyAuth": "123", "appKeyAuth": "123"}
+
+
+def test_single_flight_shares_result():
+    single_flight = SingleFlight()
+    calls = []
+
+    def slow(value):
+        calls.append(value)
+        time.sleep(0.1)
+        return [value]
+
+    with ThreadPoolExecutor(8) as executor:
+        results = list(executor.map(lambda _: single_flight.do("key", slow, 1), range(8)))
+
+    assert calls == [1]
+    assert all(result is results[0] for result in results)
+    assert single_flight.stats()["coalesced_requests"] == 7
+    assert not single_flight.calls
+
+
+def test_single_flight_shares_exception():
+    single_flight = SingleFlight()
+    started = threading.Event()
+
+    def failing():
+        started.set()
+        time.sleep(0.1)
+        raise ValueError("failed")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(single_flight.do, "key", failing)
+        started.wait()
+        follower = executor.submit(single_flight.do, "key", failing)
+        with pytest.raises(ValueError):
+            leader.result()
+        with pytest.raises(ValueError):
+            follower.result()
+
+    # Calls made once the failed call finished are made again
+    with pytest.raises(ValueError):
+        single_flight.do("key", failing)
+
+
+def test_client_coalesces_identical_gets(monkeypatch):
+    client = CustomClient("http://localhost", AUTH, 10, 10)
+    sent = []
+
+    def fake_get(url, **kwargs):
+        sent.append((url, kwargs.get("params")))
+        time.sleep(0.1)
+        resp = requests.Response()
+        resp.status_code = 200
+        resp._content = b'{"data": [{"id": "1"}]}'
+        return resp
+
+    monkeypatch.setattr(client.session, "get", fake_get)
+
+    with ThreadPoolExecutor(8) as executor:
+        futures = [executor.submit(client.get, "/api/v2/permissions") for _ in range(6)]
+        futures += [executor.submit(client.get, "/api/v2/permissions", params={"page": 1}) for _ in range(2)]
+        responses = [future.result().json() for future in futures]
+
+    assert len(sent) == 2
+    assert client.stats()["coalesced_requests"] == 6
+    # Every worker gets its own copy of the resources
+    responses[0]["data"].clear()
+    assert responses[1] == {"data": [{"id": "1"}]}